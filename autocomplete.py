@@ -0,0 +1,147 @@
+import json
+import os
+import re
+
+from machine_catalog import BUILTIN_CATALOG_PATH
+
+BUILTIN_VOCABULARY_PATH = os.path.join(os.path.dirname(BUILTIN_CATALOG_PATH), "machine_vocabulary.json")
+# Suggestions kept on each trie node, so a lookup never walks the subtree below it
+NODE_TOP_K = 10
+MIN_TRIGRAM_SIMILARITY = 0.3
+
+
+def normalize(text):
+    """Lowercase words and numbers split by single spaces, so CNC-Lathe matches cnc lathe and VF2 matches VF-2"""
+    return " ".join(re.findall(r"[a-z]+|[0-9]+", str(text).lower()))
+
+
+def trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TermIndex:
+    """Ranked autocomplete over a fixed vocabulary: a prefix trie plus a trigram index.
+
+    Every word of a term (and of its aliases) starts a path in the trie, so "lat" finds
+    "CNC Lathe". Each trie node keeps its best NODE_TOP_K terms by weight, which makes a
+    prefix lookup cost one step per typed character. Queries with no prefix match, such
+    as typos, fall back to trigram similarity. Aliases and spelling variants resolve to
+    one canonical term.
+    """
+
+    def __init__(self):
+        self.terms = []
+        self._weights = []
+        self._ids = {}  # normalized term or alias -> term id
+        self._spellings = []  # term id -> normalized term and aliases
+        self._by_weight = None
+        self._trie = {}
+        self._grams = {}  # trigram -> term ids
+
+    def __len__(self):
+        return len(self.terms)
+
+    def add(self, term, weight=1, aliases=()):
+        """Add a term, or raise the weight of one already indexed under the same normalized spelling"""
+        key = normalize(term)
+        if not key:
+            return
+        term_id = self._ids.get(key)
+        if term_id is None:
+            term_id = self._ids[key] = len(self.terms)
+            self.terms.append(term.strip())
+            self._weights.append(0)
+            self._spellings.append([])
+        self._weights[term_id] += weight
+        self._by_weight = None
+        for spelling in (key, *map(normalize, aliases)):
+            if spelling and self._ids.setdefault(spelling, term_id) == term_id and spelling not in self._spellings[term_id]:
+                self._spellings[term_id].append(spelling)
+                for gram in trigrams(spelling):
+                    self._grams.setdefault(gram, set()).add(term_id)
+        # Re-rank the term on every path, since its weight may have changed
+        for spelling in self._spellings[term_id]:
+            words = spelling.split(" ")
+            for start in range(len(words)):
+                self._insert(" ".join(words[start:]), term_id)
+
+    def _insert(self, suffix, term_id):
+        node = self._trie
+        for char in suffix:
+            node = node.setdefault(char, {})
+            top = node.setdefault("", [])
+            if term_id in top:
+                top.remove(term_id)
+            top.append(term_id)
+            top.sort(key=lambda i: -self._weights[i])
+            del top[NODE_TOP_K:]
+
+    def canonical(self, text):
+        """The indexed term text is a spelling or alias of, else text with surrounding space removed"""
+        term_id = self._ids.get(normalize(text))
+        return self.terms[term_id] if term_id is not None else str(text).strip()
+
+    def suggest(self, query, limit=8):
+        """Up to limit terms for what has been typed so far, best first"""
+        key = normalize(query)
+        if not key:
+            if self._by_weight is None:
+                self._by_weight = sorted(range(len(self.terms)), key=lambda i: -self._weights[i])
+            return [self.terms[i] for i in self._by_weight[:limit]]
+        node = self._trie
+        for char in key:
+            node = node.get(char)
+            if node is None:
+                break
+        matches = []
+        if node is not None:
+            # Terms that start with the query rank above those where a later word does
+            matches = sorted(node[""], key=lambda i: (not normalize(self.terms[i]).startswith(key), -self._weights[i]))
+        if len(matches) < limit:
+            matches += [i for i in self._similar(key) if i not in matches]
+        return [self.terms[i] for i in matches[:limit]]
+
+    def _similar(self, key):
+        """Term ids sharing enough trigrams with key, most similar first"""
+        grams = trigrams(key)
+        shared = {}
+        for gram in grams:
+            for term_id in self._grams.get(gram, ()):
+                shared[term_id] = shared.get(term_id, 0) + 1
+        scored = []
+        for term_id, count in shared.items():
+            similarity = count / len(grams | trigrams(normalize(self.terms[term_id])))
+            if similarity >= MIN_TRIGRAM_SIMILARITY:
+                scored.append((-similarity, -self._weights[term_id], term_id))
+        return [term_id for *_, term_id in sorted(scored)]
+
+
+def load_vocabulary(*paths):
+    """Load {"types": [{"name", "aliases"}], "models": [{"name", "type"}]} files; later files add entries"""
+    vocabulary = {"types": [], "models": []}
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        vocabulary["types"] += data.get("types", [])
+        vocabulary["models"] += data.get("models", [])
+    return vocabulary
+
+
+def build_indexes(catalog, vocabulary):
+    """Return (machine type index, model index) from the catalog and a vocabulary"""
+    types = TermIndex()
+    models = TermIndex()
+    # Types used across several industries are the likeliest answers, so they weigh more
+    for machines in catalog.values():
+        for machine in machines:
+            types.add(machine["type"], weight=2)
+            if machine["model"]:
+                models.add(machine["model"])
+    for entry in vocabulary["types"]:
+        types.add(entry["name"], aliases=entry.get("aliases", ()))
+    for entry in vocabulary["models"]:
+        models.add(entry["name"])
+        if entry.get("type"):
+            types.add(entry["type"], weight=0)
+    return types, models
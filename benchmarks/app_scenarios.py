@@ -0,0 +1,245 @@
+"""Headless benchmark suite for both apps, checked against a committed baseline.
+
+Drives each app with Streamlit's AppTest through the interactions users actually make:
+loading with 0/50/500 machines, editing, removing, AI suggestions from a stubbed API that
+streams like the real one, and submitting with N photos. Every interaction records wall
+time, the number of delta messages sent to the browser and their serialized size.
+Clicks inside a fragment rerun only that fragment, as they do in the browser.
+
+Deltas and bytes are deterministic, so they are compared tightly; wall time only fails
+the run when it grows past --time-tolerance. Exits 1 on a regression.
+
+    python benchmarks/app_scenarios.py [--photos 5] [--runs 3]
+    python benchmarks/app_scenarios.py --update-baseline
+"""
+import argparse
+import functools
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from streamlit.runtime.scriptrunner_utils.script_requests import RerunData
+from streamlit.testing.v1 import AppTest
+from streamlit.testing.v1 import local_script_runner
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from inventory import Machine, MachineInventory  # noqa: E402
+from thumbnail_pipeline import synthetic_photo  # noqa: E402
+
+APPS = ["onboarding_app.py", "onboarding_app_fresh.py"]
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+STUB_MACHINES = [
+    {"type": f"Stub Machine {i}", "model": "", "info": "Served by the benchmark API stub", "quantity": 1}
+    for i in range(6)
+]
+
+
+class StubCompletions(BaseHTTPRequestHandler):
+    """Stand-in for the chat completions API that streams its answer in small deltas"""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        content = json.dumps(STUB_MACHINES)
+        if not body.get("stream"):
+            payload = json.dumps({"choices": [{"message": {"content": content}}]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        for start in range(0, len(content), 40):
+            delta = {"choices": [{"delta": {"content": content[start:start + 40]}}]}
+            self.wfile.write(f"data: {json.dumps(delta)}\n\n".encode())
+        self.wfile.write(b"data: [DONE]\n\n")
+
+    def log_message(self, *args):
+        pass
+
+
+def fragment_id(at, name):
+    """Id of the fragment wrapping the function called name"""
+    # AppTest has no public way to target a fragment, so look through its fragment storage
+    for fid, wrapped in at._fragment_storage._fragments.items():
+        for cell in wrapped.__closure__ or ():
+            if getattr(cell.cell_contents, "__name__", None) == name:
+                return fid
+    raise LookupError(f"No fragment named {name}")
+
+
+def measure(at, fragment=None):
+    """Run the app once, scoped to a fragment if given; returns (seconds, deltas, bytes)"""
+    original_rerun_data = local_script_runner.RerunData
+    original_run = local_script_runner.LocalScriptRunner.run
+    sent = []
+
+    def counting_run(runner, *args, **kwargs):
+        tree = original_run(runner, *args, **kwargs)
+        sent.extend(msg for msg in runner.forward_msgs() if msg.HasField("delta"))
+        return tree
+
+    if fragment is not None:
+        # Mirrors what the browser sends when a widget inside a fragment is used
+        local_script_runner.RerunData = functools.partial(RerunData, fragment_id_queue=[fragment_id(at, fragment)])
+    local_script_runner.LocalScriptRunner.run = counting_run
+    try:
+        started = time.perf_counter()
+        at.run()
+        seconds = time.perf_counter() - started
+    finally:
+        local_script_runner.RerunData = original_rerun_data
+        local_script_runner.LocalScriptRunner.run = original_run
+    if at.exception:
+        raise RuntimeError(f"App raised: {at.exception[0].message}")
+    return seconds, len(sent), sum(msg.ByteSize() for msg in sent)
+
+
+def new_app(app, machines=0):
+    at = AppTest.from_file(os.path.join(ROOT, app), default_timeout=120)
+    if machines:
+        at.session_state.machines = MachineInventory(
+            Machine(f"CNC Lathe {i}", f"Model-{i}", "Benchmark machine", 1) for i in range(machines)
+        )
+    return at
+
+
+def button(at, label):
+    return next(b for b in at.button if (b.label or "").startswith(label))
+
+
+def scenarios(app, photos):
+    """Yield (name, at, fragment) for each measured interaction, after setting it up"""
+    for machines in (0, 50, 500):
+        at = new_app(app, machines)
+        yield f"load_{machines}_machines", at, None
+    yield "rerun_500_machines", at, None
+
+    at = new_app(app, 50)
+    at.run()
+    button(at, "Edit 1").click()
+    yield "edit_open", at, "machine_inventory"
+    next(s for s in at.selectbox if s.label == "Model").set_value("Haas VF-2")
+    button(at, "✅ Save Changes").click()
+    yield "edit_save", at, "machine_inventory"
+    button(at, "Remove 1").click()
+    yield "remove", at, "machine_inventory"
+
+    at = new_app(app)
+    at.run()
+    button(at, "🤖 Get AI Suggestions").click()
+    yield "ai_suggestions", at, "ai_suggestions_section"
+
+    at = new_app(app, 50)
+    at.run()
+    uploader = next(u for u in at.get("file_uploader") if u.key == "other_photos")
+    for i in range(photos):
+        uploader.upload(f"photo-{i}.jpg", synthetic_photo(i, 2), "image/jpeg")
+    at.run()
+    # The fresh app labels its submit button just "Submit"
+    button(at, "Submit").click()
+    yield f"submit_{photos}_photos", at, None
+
+
+def run_suite(photos, runs):
+    results = {}
+    for app in APPS:
+        # The first pass pays for imports, process-wide resources and the first API connection
+        for name, at, fragment in scenarios(app, photos):
+            measure(at, fragment)
+        samples = {}
+        for _ in range(runs):
+            for name, at, fragment in scenarios(app, photos):
+                samples.setdefault(name, []).append(measure(at, fragment))
+        results[app] = {
+            name: {
+                "seconds": round(statistics.median(s[0] for s in runs_), 4),
+                "deltas": runs_[0][1],
+                "bytes": runs_[0][2],
+            }
+            for name, runs_ in samples.items()
+        }
+    return results
+
+
+def compare(results, baseline, time_tolerance, size_tolerance):
+    """Print a table against the baseline and return the regressions found"""
+    regressions = []
+    for app, app_results in results.items():
+        print(app)
+        print(f"  {'interaction':<22} {'ms':>9} {'deltas':>7} {'bytes':>10}   vs baseline")
+        for name, result in app_results.items():
+            base = baseline.get(app, {}).get(name)
+            note = "new"
+            if base:
+                changes = []
+                if result["seconds"] > base["seconds"] * (1 + time_tolerance):
+                    changes.append(f"time {result['seconds'] / base['seconds']:.1f}x")
+                for metric in ("deltas", "bytes"):
+                    if result[metric] > base[metric] * (1 + size_tolerance):
+                        changes.append(f"{metric} {base[metric]:,} -> {result[metric]:,}")
+                regressions.extend(f"{app} {name}: {change}" for change in changes)
+                note = "REGRESSION " + ", ".join(changes) if changes else (
+                    f"{result['seconds'] / base['seconds']:.2f}x time" if base["seconds"] else "ok"
+                )
+            print(f"  {name:<22} {result['seconds'] * 1000:9.1f} {result['deltas']:7} {result['bytes']:10,}   {note}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--photos", type=int, default=5, help="photos uploaded before submitting")
+    parser.add_argument("--runs", type=int, default=3, help="wall time is the median of this many runs")
+    parser.add_argument("--time-tolerance", type=float, default=1.0, help="allowed wall time growth, 1.0 = 2x")
+    parser.add_argument("--size-tolerance", type=float, default=0.1, help="allowed delta and byte growth")
+    parser.add_argument("--update-baseline", action="store_true", help=f"write the results to {os.path.basename(BASELINE_PATH)}")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubCompletions)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    tmp = tempfile.mkdtemp(prefix="app-scenarios-")
+    os.environ.update({
+        "OPENAI_API_KEY": "benchmark",
+        "OPENAI_API_URL": f"http://127.0.0.1:{server.server_port}/v1/chat/completions",
+        # Every AI click should reach the stub rather than the suggestion cache
+        "SUGGESTION_CACHE_TTL_SECONDS": "0",
+        "PHOTO_STORE_PATH": os.path.join(tmp, "photos"),
+        "SUBMISSION_STORE_PATH": os.path.join(tmp, "submissions"),
+        "DRAFT_STORE_PATH": os.path.join(tmp, "drafts.sqlite3"),
+    })
+    os.environ.pop("OUTBOX_WEBHOOK_URLS", None)
+    os.chdir(ROOT)
+
+    results = run_suite(args.photos, args.runs)
+    server.shutdown()
+
+    if args.update_baseline:
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+        compare(results, {}, args.time_tolerance, args.size_tolerance)
+        print(f"Baseline written to {BASELINE_PATH}")
+        return
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)
+    regressions = compare(results, baseline, args.time_tolerance, args.size_tolerance)
+    if regressions:
+        print("\nRegressions against the baseline:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Measure type-ahead lookups against the machine type and model indexes.
+
+Replays every prefix of a set of typed queries, including misspellings that fall back
+to the trigram index, and reports build time and per-lookup latency percentiles.
+
+    python benchmarks/autocomplete_latency.py [--repeat 200]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from autocomplete import BUILTIN_VOCABULARY_PATH, build_indexes, load_vocabulary  # noqa: E402
+from machine_catalog import CATALOG  # noqa: E402
+
+TYPED = {
+    "types": ["cnc lathe", "CNC-Lathe", "milling", "weld", "5 axis", "injection moldng", "lathw", "press brake", "vmc"],
+    "models": ["haas vf2", "Haas ST-20", "bridgeport", "mazak integrex", "trumpf trubend", "fanuc robo"],
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    indexes = dict(zip(("types", "models"), build_indexes(CATALOG, load_vocabulary(BUILTIN_VOCABULARY_PATH))))
+    print(f"built in {(time.perf_counter() - started) * 1000:.1f} ms")
+    for name, index in indexes.items():
+        prefixes = [query[:end] for query in TYPED[name] for end in range(1, len(query) + 1)]
+        samples = []
+        for _ in range(args.repeat):
+            for prefix in prefixes:
+                started = time.perf_counter()
+                index.suggest(prefix)
+                samples.append(time.perf_counter() - started)
+        samples.sort()
+        print(
+            f"{name}: {len(index)} terms, {len(samples):,} lookups, "
+            f"p50 {statistics.median(samples) * 1e6:.1f} us, p99 {samples[int(len(samples) * 0.99)] * 1e6:.1f} us"
+        )
+        for query in TYPED[name]:
+            print(f"  {query!r:22} -> {index.canonical(query)!r:28} {index.suggest(query, 3)}")
+
+
+if __name__ == "__main__":
+    main()
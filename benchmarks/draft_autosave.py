@@ -0,0 +1,67 @@
+"""Compare draft autosave as per-change diffs against rewriting the whole session each time.
+
+Simulates a session editing, adding and removing machines in a large inventory, autosaving
+after every change the way the apps do, then times restoring the draft from its token.
+
+    python benchmarks/draft_autosave.py [--machines 500] [--changes 200]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from draft_store import DraftStore, machine_splice  # noqa: E402
+
+
+def synthetic_machine(index):
+    return {"type": "CNC Lathe", "model": f"Model-{index}", "info": "Bay 4, 2019", "quantity": 1, "photo": None}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--machines", type=int, default=500)
+    parser.add_argument("--changes", type=int, default=200)
+    args = parser.parse_args()
+    rng = random.Random(0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = DraftStore(os.path.join(tmp, "drafts.sqlite3"))
+        token = store.new_token()
+        machines = [synthetic_machine(i) for i in range(args.machines)]
+        store.append(token, [machine_splice([], machines)])
+        saved = [dict(machine) for machine in machines]
+        diff_bytes = 0
+        full_bytes = 0
+        started = time.perf_counter()
+        for change in range(args.changes):
+            roll = rng.random()
+            if roll < 0.7:
+                machines[rng.randrange(len(machines))]["info"] = f"Edited {change}"
+            elif roll < 0.85:
+                machines.append(synthetic_machine(args.machines + change))
+            else:
+                machines.pop(rng.randrange(len(machines)))
+            ops = [machine_splice(saved, machines)]
+            store.append(token, ops)
+            saved = [dict(machine) for machine in machines]
+            diff_bytes += sum(len(json.dumps(op)) for op in ops)
+            full_bytes += len(json.dumps({"machines": machines}))
+        seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        restored = store.load(token)
+        restore_seconds = time.perf_counter() - started
+
+    print(f"{args.changes} autosaves of a {args.machines}-machine draft in {seconds:.2f}s ({seconds / args.changes * 1000:.2f} ms each)")
+    print(f"  written as diffs: {diff_bytes / args.changes:,.0f} bytes per change")
+    print(f"  written as full state: {full_bytes / args.changes:,.0f} bytes per change")
+    print(f"  restore: {restore_seconds * 1000:.1f} ms, matches session: {restored['machines'] == machines}")
+
+
+if __name__ == "__main__":
+    main()
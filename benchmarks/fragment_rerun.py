@@ -0,0 +1,76 @@
+"""Compare full-app reruns with fragment-scoped reruns for a large inventory.
+
+Before fragments, every Edit/Remove/Save click and every industry change re-executed
+the whole script. This drives the app headlessly with Streamlit's AppTest and times a
+full rerun against a rerun of just the inventory or AI-suggestions fragment.
+
+    python benchmarks/fragment_rerun.py [--machines 200] [--runs 5] [--app onboarding_app.py]
+"""
+import argparse
+import functools
+import os
+import statistics
+import sys
+import time
+
+from streamlit.runtime.scriptrunner_utils.script_requests import RerunData
+from streamlit.testing.v1 import AppTest
+from streamlit.testing.v1 import local_script_runner
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app_scenarios import fragment_id  # noqa: E402
+from inventory import Machine, MachineInventory  # noqa: E402
+
+
+def time_reruns(at, runs, fragment_id=None):
+    """Median wall time and delta count of `runs` reruns, optionally scoped to one fragment"""
+    original_rerun_data = local_script_runner.RerunData
+    original_run = local_script_runner.LocalScriptRunner.run
+    delta_counts = []
+
+    def counting_run(runner, *args, **kwargs):
+        tree = original_run(runner, *args, **kwargs)
+        delta_counts.append(sum(1 for msg in runner.forward_msgs() if msg.HasField("delta")))
+        return tree
+
+    if fragment_id is not None:
+        # Mirrors what the browser sends when a widget inside a fragment is used
+        local_script_runner.RerunData = functools.partial(RerunData, fragment_id_queue=[fragment_id])
+    local_script_runner.LocalScriptRunner.run = counting_run
+    try:
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            at.run()
+            timings.append(time.perf_counter() - started)
+    finally:
+        local_script_runner.RerunData = original_rerun_data
+        local_script_runner.LocalScriptRunner.run = original_run
+    return statistics.median(timings), statistics.median(delta_counts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", default="onboarding_app.py")
+    parser.add_argument("--machines", type=int, default=200)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    at = AppTest.from_file(os.path.join(ROOT, args.app), default_timeout=120)
+    at.session_state.machines = MachineInventory(
+        Machine(f"CNC Lathe {i}", "", "Benchmark machine", 1) for i in range(args.machines)
+    )
+    at.run()
+    ai_section, inventory = fragment_id(at, "ai_suggestions_section"), fragment_id(at, "machine_inventory")
+
+    print(f"{args.app} with {args.machines} machines (median of {args.runs} runs)")
+    for label, fragment in [("full app rerun", None), ("AI section fragment", ai_section), ("inventory fragment", inventory)]:
+        seconds, deltas = time_reruns(at, args.runs, fragment)
+        print(f"  {label:<22} {seconds * 1000:8.1f} ms  {deltas:6.0f} deltas")
+
+
+if __name__ == "__main__":
+    main()
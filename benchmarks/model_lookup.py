@@ -0,0 +1,73 @@
+"""Compare the memory-mapped model reference with loading the CSV into a dict.
+
+Builds a synthetic reference of --models records, then reports how long each approach
+takes to become usable and what a lookup costs afterwards.
+
+    python benchmarks/model_lookup.py [--models 200000] [--lookups 100000]
+"""
+import argparse
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from autocomplete import normalize  # noqa: E402
+from model_reference import ModelRecord, ModelReference, build_reference, read_source  # noqa: E402
+
+
+def synthetic_records(count):
+    rng = random.Random(0)
+    manufacturers = [f"Maker{i}" for i in range(200)]
+    types = ["CNC Mill", "CNC Lathe", "Press Brake", "Laser Cutter", "Injection Molding Machine"]
+    return [
+        ModelRecord(rng.choice(manufacturers), f"X{i}-{rng.randrange(1000)}", rng.choice(types), rng.choice([None, 3, 5]), rng.randrange(1, 60))
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--models", type=int, default=200_000)
+    parser.add_argument("--lookups", type=int, default=100_000)
+    args = parser.parse_args()
+
+    records = synthetic_records(args.models)
+    tmp = tempfile.mkdtemp(prefix="model-lookup-")
+    csv_path = os.path.join(tmp, "models.csv")
+    bin_path = os.path.join(tmp, "models.bin")
+    with open(csv_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["manufacturer", "model", "type", "axes", "power_kw"])
+        writer.writerows((r.manufacturer, r.model, r.type, r.axes or "", r.power_kw) for r in records)
+    started = time.perf_counter()
+    build_reference(records, bin_path)
+    print(f"{args.models:,} models: built in {time.perf_counter() - started:.2f}s, {os.path.getsize(bin_path) / 1e6:.1f} MB")
+
+    started = time.perf_counter()
+    by_model = {}
+    for record in read_source(csv_path):
+        by_model.setdefault(normalize(record.name), record)
+        by_model.setdefault(normalize(record.model), record)
+    csv_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    reference = ModelReference(bin_path)
+    mmap_seconds = time.perf_counter() - started
+    print(f"ready after: CSV into a dict {csv_seconds * 1000:.0f} ms, mmap {mmap_seconds * 1000:.2f} ms")
+
+    rng = random.Random(1)
+    queries = [rng.choice(records).name for _ in range(args.lookups)] + ["Unknown 9000"] * (args.lookups // 10)
+    started = time.perf_counter()
+    found = sum(reference.lookup(query) is not None for query in queries)
+    mmap_lookup = (time.perf_counter() - started) / len(queries)
+    started = time.perf_counter()
+    sum(by_model.get(normalize(query)) is not None for query in queries)
+    dict_lookup = (time.perf_counter() - started) / len(queries)
+    print(f"lookup: mmap {mmap_lookup * 1e6:.1f} us, dict {dict_lookup * 1e6:.1f} us ({found:,} of {len(queries):,} found)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Drive the outbox against a local HTTP stand-in for the CRM/webhook endpoint.
+
+The stand-in fails a share of requests with 503 and records every submission it accepts,
+keyed by idempotency key. Reports delivery latency, batches, retries and whether each
+submission arrived exactly once after deduplication.
+
+    python benchmarks/outbox_delivery.py [--submissions 2000] [--failure-rate 0.2] [--batch-size 50]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import outbox as outbox_module  # noqa: E402
+from outbox import Outbox  # noqa: E402
+from submission_store import SubmissionStore  # noqa: E402
+
+
+class StandIn(BaseHTTPRequestHandler):
+    failure_rate = 0.0
+    received = {}
+    requests = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        with StandIn.lock:
+            StandIn.requests += 1
+            fail = random.random() < StandIn.failure_rate
+            if not fail:
+                for item in json.loads(body)["submissions"]:
+                    StandIn.received[item["idempotency_key"]] = StandIn.received.get(item["idempotency_key"], 0) + 1
+        self.send_response(503 if fail else 200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--submissions", type=int, default=2000)
+    parser.add_argument("--failure-rate", type=float, default=0.2)
+    parser.add_argument("--batch-size", type=int, default=50)
+    args = parser.parse_args()
+    StandIn.failure_rate = args.failure_rate
+    # Keep retries quick so the run finishes in seconds rather than minutes
+    outbox_module.BACKOFF_BASE_SECONDS = 0.05
+    outbox_module.BACKOFF_CAP_SECONDS = 0.5
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SubmissionStore(tmp, compact_seconds=0.1)
+        worker = Outbox(
+            store.db_path, [f"http://127.0.0.1:{server.server_port}/webhook"],
+            batch_size=args.batch_size, poll_seconds=0.05
+        ).start()
+        started = time.perf_counter()
+        ids = [store.submit({"email": f"user{i}@example.com", "machines": []}) for i in range(args.submissions)]
+        while worker.stats()["delivered"] < len(ids) and time.perf_counter() - started < 60:
+            time.sleep(0.05)
+        seconds = time.perf_counter() - started
+        stats = worker.stats()
+        worker.stop()
+        store.close()
+    server.shutdown()
+
+    duplicates = sum(count - 1 for count in StandIn.received.values())
+    missing = sum(1 for submission_id in ids if submission_id not in StandIn.received)
+    print(f"{len(ids):,} submissions, {args.failure_rate:.0%} of requests failing -> all delivered in {seconds:.2f}s")
+    print(f"  {StandIn.requests:,} requests, {stats['failed_batches']:,} failed batches retried, queue depth now {stats['queued']}")
+    print(f"  submit-to-delivery latency p50 {stats['latency_p50']:.2f}s, p95 {stats['latency_p95']:.2f}s")
+    print(f"  missing {missing}, duplicates received {duplicates} (dropped by idempotency key)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Compare per-session memory of the old dict inventory with the columnar MachineInventory.
+
+Before, st.session_state.machines was a list of dicts and each machine with a photo held
+the whole UploadedFile. Now the inventory is columnar and photos are photo-store keys.
+
+    python benchmarks/session_memory.py [--machines 500] [--photo-every 5] [--photo-kb 2048]
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inventory import Machine, MachineInventory  # noqa: E402
+from photo_store import PhotoStore  # noqa: E402
+
+
+def synthetic_machine(i):
+    return {"type": f"CNC Lathe {i % 20}", "model": f"Model-{i % 50}", "info": f"Serial {i:08d}", "quantity": 1 + i % 3}
+
+
+def photo_bytes(i, size):
+    # Distinct photos so the store cannot dedupe them
+    return i.to_bytes(4, "big") * (size // 4)
+
+
+def build_dicts(count, photo_every, photo_size):
+    machines = []
+    for i in range(count):
+        machine = synthetic_machine(i)
+        # Stand-in for the UploadedFile Streamlit kept in session state
+        machine["photo"] = io.BytesIO(photo_bytes(i, photo_size)) if photo_every and i % photo_every == 0 else None
+        machines.append(machine)
+    return machines
+
+
+def build_inventory(count, photo_every, photo_size, store):
+    inventory = MachineInventory()
+    for i in range(count):
+        machine = Machine.from_dict(synthetic_machine(i))
+        if photo_every and i % photo_every == 0:
+            machine.photo = store.put(photo_bytes(i, photo_size))
+        inventory.append(machine)
+    return inventory
+
+
+def retained_bytes(build):
+    """Bytes still allocated once build() returns, i.e. what the session would hold"""
+    tracemalloc.start()
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--machines", type=int, default=500)
+    parser.add_argument("--photo-every", type=int, default=5, help="every Nth machine has a photo")
+    parser.add_argument("--photo-kb", type=int, default=2048)
+    args = parser.parse_args()
+    photo_size = args.photo_kb * 1024
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = PhotoStore(tmp)
+        # Warm up so one-off interpreter allocations are not charged to either layout
+        build_dicts(10, 1, 1024)
+        build_inventory(10, 1, 1024, store)
+        for label, photo_every in (("no photos", 0), (f"photo on every {args.photo_every}", args.photo_every)):
+            before = retained_bytes(lambda: build_dicts(args.machines, photo_every, photo_size))
+            after = retained_bytes(lambda: build_inventory(args.machines, photo_every, photo_size, store))
+            print(
+                f"{args.machines:,} machines, {label}: dicts {before / 1e6:.2f} MB -> "
+                f"MachineInventory {after / 1e6:.2f} MB per session ({before / max(after, 1):.1f}x smaller)"
+            )
+
+
+if __name__ == "__main__":
+    main()
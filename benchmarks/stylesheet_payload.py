@@ -0,0 +1,62 @@
+"""Measure the stylesheet's share of each full rerun's payload, before and after minifying.
+
+For both apps this reports the raw and minified stylesheet sizes, the cost of a cached
+style_tag() call against reading the file every rerun, and the total element bytes of
+a first run under AppTest.
+
+    python benchmarks/stylesheet_payload.py [--reruns 1000]
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from stylesheet import style_tag  # noqa: E402
+
+APPS = {"onboarding_app.py": "onboarding.css", "onboarding_app_fresh.py": "style.css"}
+
+
+def payload_bytes(node):
+    """Serialized size of every element under an AppTest node"""
+    total = 0
+    for child in getattr(node, "children", {}).values():
+        proto = getattr(child, "proto", None)
+        if proto is not None and hasattr(proto, "ByteSize"):
+            total += proto.ByteSize()
+        total += payload_bytes(child)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reruns", type=int, default=1000)
+    args = parser.parse_args()
+
+    for app, stylesheet in APPS.items():
+        path = os.path.join(ROOT, stylesheet)
+        started = time.perf_counter()
+        for _ in range(args.reruns):
+            with open(path) as f:
+                raw = f"<style>{f.read()}</style>"
+        read_seconds = (time.perf_counter() - started) / args.reruns
+        style_tag(stylesheet)
+        started = time.perf_counter()
+        for _ in range(args.reruns):
+            minified = style_tag(stylesheet)
+        cached_seconds = (time.perf_counter() - started) / args.reruns
+
+        at = AppTest.from_file(os.path.join(ROOT, app), default_timeout=30).run()
+        total = payload_bytes(at._tree)
+        print(f"{app} ({stylesheet})")
+        print(f"  stylesheet per rerun: {len(raw.encode()):,} bytes raw -> {len(minified.encode()):,} bytes minified")
+        print(f"  first-run payload: {total:,} bytes, {len(minified.encode()) / total:.0%} of it stylesheet")
+        print(f"  per rerun: {read_seconds * 1e6:.1f} us reading the file vs {cached_seconds * 1e6:.1f} us cached")
+
+
+if __name__ == "__main__":
+    main()
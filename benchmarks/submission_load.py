@@ -0,0 +1,93 @@
+"""Load test the submission store with many sessions submitting at once.
+
+Each thread stands in for a Streamlit session pressing "Submit Onboarding". Reports
+throughput, submit latency, how many submits shared each fsync, and then kills the
+submitting process and reopens the store to check that every acknowledged submission survives.
+
+    python benchmarks/submission_load.py [--threads 32] [--submits 100] [--machines 20]
+"""
+import argparse
+import multiprocessing
+import os
+import signal
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from submission_store import SubmissionStore  # noqa: E402
+
+
+def synthetic_payload(thread, index, machines):
+    return {
+        "name": f"Tester {thread}",
+        "email": f"tester{thread}-{index}@example.com",
+        "notes": "Two shifts, 24/5",
+        "machines": [
+            {"type": "CNC Lathe", "model": f"Model-{i}", "info": "", "quantity": 1, "photo": None}
+            for i in range(machines)
+        ],
+        "layout_option": "Skip for now",
+        "other_photos": [],
+        "layout_sketches": [],
+    }
+
+
+def run_load(directory, args, results):
+    """Submit from many threads in a worker process, report back, then wait to be killed"""
+    store = SubmissionStore(directory)
+    latencies = []
+    ids = []
+    lock = threading.Lock()
+
+    def session(thread):
+        for index in range(args.submits):
+            started = time.perf_counter()
+            submission_id = store.submit(synthetic_payload(thread, index, args.machines))
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                ids.append(submission_id)
+
+    threads = [threading.Thread(target=session, args=(t,)) for t in range(args.threads)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results.put((time.perf_counter() - started, latencies, ids, store.stats()))
+    threading.Event().wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--submits", type=int, default=100, help="submits per thread")
+    parser.add_argument("--machines", type=int, default=20, help="machines per submission")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = multiprocessing.Queue()
+        worker = multiprocessing.Process(target=run_load, args=(tmp, args, results))
+        worker.start()
+        seconds, latencies, ids, stats = results.get()
+        # Kill the process that owns the log instead of closing the store, as a crash would
+        os.kill(worker.pid, signal.SIGKILL)
+        worker.join()
+
+        recovered = SubmissionStore(tmp)
+        missing = sum(1 for submission_id in ids if recovered.get(submission_id) is None)
+        recovered.close()
+
+    latencies.sort()
+    print(f"{len(ids):,} submits from {args.threads} threads in {seconds:.2f}s -> {len(ids) / seconds:,.0f} submits/s")
+    print(f"  latency p50 {statistics.median(latencies) * 1000:.1f} ms, p99 {latencies[int(len(latencies) * 0.99)] * 1000:.1f} ms")
+    print(f"  {stats['fsyncs']:,} fsyncs, {stats['per_fsync']:.1f} submits per fsync, {stats['uncompacted']} left in the log")
+    print(f"  after killing the writer and reopening: {len(ids) - missing:,} of {len(ids):,} submissions present")
+
+
+if __name__ == "__main__":
+    main()
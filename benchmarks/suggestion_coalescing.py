@@ -0,0 +1,144 @@
+"""Check that concurrent sessions asking for the same industry share one upstream call.
+
+Starts a local stand-in for the chat completions API that answers slowly enough for
+every caller to arrive while the first call is still in flight, then fires --sessions
+concurrent post() calls and --sessions concurrent stream() calls with the same cache key.
+Exits 1 unless each burst reaches the stand-in exactly once and every caller gets the
+same answer.
+
+It then opens streams and abandons each one after the first delta, the way a session
+does when the user clicks something while suggestions are loading, and exits 1 if that
+opened the circuit breaker: an abandoned stream is not an API failure.
+
+    python benchmarks/suggestion_coalescing.py [--sessions 50] [--delay 0.5]
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from circuit_breaker import CircuitOpenError  # noqa: E402
+from suggestion_client import SuggestionClient  # noqa: E402
+
+ANSWER = json.dumps([{"type": f"Machine {i}", "model": "", "info": "", "quantity": 1} for i in range(6)])
+
+
+class StandIn(BaseHTTPRequestHandler):
+    delay = 0.5
+    requests = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with StandIn.lock:
+            StandIn.requests += 1
+        if not payload.get("stream"):
+            time.sleep(StandIn.delay)
+            body = json.dumps({"choices": [{"message": {"content": ANSWER}}]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        chunks = [ANSWER[i:i + 20] for i in range(0, len(ANSWER), 20)]
+        try:
+            for chunk in chunks:
+                time.sleep(StandIn.delay / len(chunks))
+                self.wfile.write(f"data: {json.dumps({'choices': [{'delta': {'content': chunk}}]})}\n\n".encode())
+                self.wfile.flush()
+            self.wfile.write(b"data: [DONE]\n\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client abandoned the stream
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+def burst(sessions, call):
+    """Run call() from sessions threads released together; return (answers, errors, seconds)"""
+    start = threading.Barrier(sessions)
+    answers = []
+    errors = []
+
+    def session():
+        start.wait()
+        try:
+            answers.append(call())
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=session) for _ in range(sessions)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return answers, errors, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--delay", type=float, default=0.5, help="seconds the stand-in takes to answer")
+    args = parser.parse_args()
+    StandIn.delay = args.delay
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = SuggestionClient(f"http://127.0.0.1:{server.server_port}/v1/chat/completions")
+    key = ("Automotive", 1, "benchmark")
+    calls = {
+        "post": lambda: client.post(key, {}, {"stream": False}).json()["choices"][0]["message"]["content"],
+        "stream": lambda: "".join(client.stream(key, {}, {"stream": True})),
+    }
+    failures = []
+    print(f"{args.sessions} concurrent sessions, stand-in answers in {args.delay:.2f}s")
+    print(f"{'call':>6} {'upstream':>9} {'coalesced':>10} {'seconds':>8}")
+    for name, call in calls.items():
+        requests_before, coalesced_before = StandIn.requests, client.coalesced_calls
+        answers, errors, seconds = burst(args.sessions, call)
+        upstream = StandIn.requests - requests_before
+        print(f"{name:>6} {upstream:9} {client.coalesced_calls - coalesced_before:10} {seconds:8.2f}")
+        if upstream != 1:
+            failures.append(f"{name}: {upstream} upstream calls for {args.sessions} sessions, expected 1")
+        if errors:
+            failures.append(f"{name}: {len(errors)} sessions failed, first with {errors[0]!r}")
+        if any(answer != ANSWER for answer in answers):
+            failures.append(f"{name}: sessions got different answers")
+
+    abandoned = client.breaker.failure_threshold * 2
+    for i in range(abandoned):
+        stream = client.stream(("Abandoned", i), {}, {"stream": True})
+        try:
+            next(stream)
+        except CircuitOpenError:
+            break
+        stream.close()
+    # Cancellation reaches the upstream task on the loop thread
+    time.sleep(0.2)
+    state = client.breaker.state
+    print(f"{abandoned} abandoned streams -> circuit {state}")
+    if state != "closed":
+        failures.append(f"abandoned streams opened the circuit ({state})")
+    server.shutdown()
+
+    if failures:
+        print("FAILED")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
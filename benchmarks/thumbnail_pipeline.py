@@ -0,0 +1,60 @@
+"""Measure what the submit summary sends for a dozen phone photos, before and after thumbnails.
+
+Before, every upload went to st.image at full camera resolution. Now the summary shows
+300px thumbnails produced once per photo by ImagePipeline and cached by content hash.
+
+    python benchmarks/thumbnail_pipeline.py [--photos 12] [--megapixels 12]
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image  # noqa: E402
+
+from image_pipeline import ImagePipeline  # noqa: E402
+from photo_store import PhotoStore  # noqa: E402
+
+
+def synthetic_photo(seed, megapixels):
+    """A noisy JPEG roughly the size of a phone photo, rotated via EXIF like a portrait shot"""
+    width = int((megapixels * 1e6 * 4 / 3) ** 0.5)
+    height = int(width * 3 / 4)
+    image = Image.effect_noise((width // 8, height // 8), 40 + seed).convert("RGB").resize((width, height))
+    exif = image.getexif()
+    exif[0x0112] = 6
+    output = io.BytesIO()
+    image.save(output, "JPEG", quality=90, exif=exif)
+    return output.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--photos", type=int, default=12)
+    parser.add_argument("--megapixels", type=float, default=12)
+    args = parser.parse_args()
+
+    photos = [synthetic_photo(i, args.megapixels) for i in range(args.photos)]
+    with tempfile.TemporaryDirectory() as tmp:
+        pipeline = ImagePipeline(PhotoStore(tmp))
+        started = time.perf_counter()
+        for photo in photos:
+            pipeline.ensure_variants(pipeline.store.put(photo))
+        first = time.perf_counter() - started
+        started = time.perf_counter()
+        thumbnails = [pipeline.variant_path(pipeline.store.put(photo)) for photo in photos]
+        cached = time.perf_counter() - started
+        original_bytes = sum(len(photo) for photo in photos)
+        thumbnail_bytes = sum(os.path.getsize(path) for path in thumbnails)
+
+    print(f"{args.photos} photos at {args.megapixels:g} MP")
+    print(f"  summary payload: {original_bytes / 1e6:.1f} MB originals -> {thumbnail_bytes / 1e3:.0f} KB thumbnails")
+    print(f"  processing: {first * 1000 / args.photos:.0f} ms/photo first time, {cached * 1000 / args.photos:.1f} ms/photo cached")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Compare submit latency with photos processed at submit time vs in the background pool.
+
+Before, every photo was decoded and rendered in the `if submit:` block. Now uploads are
+queued on UploadProcessor as they arrive, so submit only waits for work already done.
+
+    python benchmarks/upload_latency.py [--photos 12] [--megapixels 12] [--workers 4]
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from image_pipeline import ImagePipeline  # noqa: E402
+from photo_store import PhotoStore  # noqa: E402
+from thumbnail_pipeline import synthetic_photo  # noqa: E402
+from upload_processor import UploadProcessor  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--photos", type=int, default=12)
+    parser.add_argument("--megapixels", type=float, default=12)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+    photos = [synthetic_photo(i, args.megapixels) for i in range(args.photos)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pipeline = ImagePipeline(PhotoStore(tmp))
+        started = time.perf_counter()
+        for photo in photos:
+            pipeline.variant_path(pipeline.store.put(photo))
+        inline = time.perf_counter() - started
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pipeline = ImagePipeline(PhotoStore(tmp))
+        processor = UploadProcessor(pipeline, max_workers=args.workers)
+        started = time.perf_counter()
+        keys = [processor.submit(io.BytesIO(photo)) for photo in photos]
+        queued = time.perf_counter() - started
+        for key in keys:
+            processor.wait(key)
+        background = time.perf_counter() - started
+        # By submit time the user has spent longer on the form than the pool needed
+        started = time.perf_counter()
+        for key in keys:
+            processor.wait(key)
+            pipeline.variant_path(key)
+        submit = time.perf_counter() - started
+
+    print(f"{args.photos} photos at {args.megapixels:g} MP, {args.workers} workers")
+    print(f"  before: submit spends {inline:.2f}s processing photos")
+    print(f"  after:  uploads queued in {queued * 1000:.0f} ms, pool done after {background:.2f}s, submit spends {submit * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Load test serve.py with 1, 2 and 4 workers and report rerun throughput.
+
+Each simulated browser takes its worker cookie from the proxy, opens the Streamlit
+websocket through it and requests full reruns back to back, the way a user clicking
+through the form would. Throughput only scales with workers up to the number of CPUs.
+
+    python benchmarks/worker_scaling.py [--workers 1 2 4] [--sessions 16] [--seconds 20]
+"""
+import argparse
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def wait_until_up(port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"serve.py did not come up on port {port}")
+
+
+def worker_cookie(port):
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health") as response:
+        for header in response.headers.get_all("Set-Cookie") or ():
+            if header.startswith("onboarding_worker="):
+                return header.split(";")[0]
+    return ""
+
+
+async def session(port, stop_at, latencies):
+    cookie = await asyncio.to_thread(worker_cookie, port)
+    rerun = BackMsg()
+    rerun.rerun_script.query_string = ""
+    async with websockets.connect(
+        f"ws://127.0.0.1:{port}/_stcore/stream", subprotocols=["streamlit"],
+        additional_headers={"Cookie": cookie}, max_size=None,
+    ) as ws:
+        while time.monotonic() < stop_at:
+            started = time.monotonic()
+            await ws.send(rerun.SerializeToString())
+            while True:
+                msg = ForwardMsg()
+                msg.ParseFromString(await ws.recv())
+                if msg.WhichOneof("type") == "script_finished":
+                    break
+            latencies.append(time.monotonic() - started)
+
+
+async def drive(port, sessions, seconds):
+    latencies = []
+    started = time.monotonic()
+    await asyncio.gather(*(session(port, started + seconds, latencies) for _ in range(sessions)))
+    return latencies, time.monotonic() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--sessions", type=int, default=16, help="concurrent browsers")
+    parser.add_argument("--seconds", type=float, default=20, help="length of each run")
+    parser.add_argument("--port", type=int, default=8700)
+    parser.add_argument("--app", default="onboarding_app.py")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="worker-scaling-")
+    env = dict(
+        os.environ,
+        PHOTO_STORE_PATH=os.path.join(tmp, "photos"),
+        SUBMISSION_STORE_PATH=os.path.join(tmp, "submissions"),
+        DRAFT_STORE_PATH=os.path.join(tmp, "drafts.sqlite3"),
+        SUGGESTION_CACHE_PATH=os.path.join(tmp, "suggestions.sqlite3"),
+    )
+    env.pop("OUTBOX_WEBHOOK_URLS", None)
+    print(f"{os.cpu_count()} CPUs, {args.sessions} sessions, {args.seconds:.0f}s per run")
+    print(f"{'workers':>7} {'reruns/s':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    baseline = None
+    for workers in args.workers:
+        server = subprocess.Popen(
+            [sys.executable, os.path.join(ROOT, "serve.py"), "--app", args.app,
+             "--workers", str(workers), "--port", str(args.port)],
+            cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            wait_until_up(args.port)
+            # Wait for every worker, not just the first one to answer the health check
+            time.sleep(2 + workers)
+            latencies, elapsed = asyncio.run(drive(args.port, args.sessions, args.seconds))
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait()
+        latencies.sort()
+        throughput = len(latencies) / elapsed
+        baseline = baseline or throughput
+        print(
+            f"{workers:7} {throughput:9.1f} {latencies[len(latencies) // 2] * 1000:8.1f} "
+            f"{latencies[int(len(latencies) * 0.95)] * 1000:8.1f}   {throughput / baseline:.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
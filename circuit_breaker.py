@@ -0,0 +1,84 @@
+import threading
+import time
+from collections import deque
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling upstream while the circuit is open"""
+
+
+class CircuitBreaker:
+    """Thread-safe circuit breaker shared by every session in the process.
+
+    Failures, and successes slower than slow_call_seconds, are counted over a sliding
+    window. Once failure_threshold of them accumulate the circuit opens and calls are
+    refused for reset_timeout_seconds. It then goes half-open and lets up to
+    half_open_max_calls trial calls through: a success closes it, a failure reopens it.
+    """
+
+    def __init__(self, failure_threshold=5, window_seconds=60.0, reset_timeout_seconds=30.0,
+                 slow_call_seconds=None, half_open_max_calls=1):
+        self.failure_threshold = failure_threshold
+        self.window_seconds = window_seconds
+        self.reset_timeout_seconds = reset_timeout_seconds
+        self.slow_call_seconds = slow_call_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self._state = CLOSED
+        self._failures = deque()
+        self._opened_at = 0.0
+        self._trial_calls = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def _current_state(self, now):
+        if self._state == OPEN and now - self._opened_at >= self.reset_timeout_seconds:
+            self._state = HALF_OPEN
+            self._trial_calls = 0
+        return self._state
+
+    def allow(self):
+        """Return True if a call may go upstream now; half-open trial slots are consumed"""
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and self._trial_calls < self.half_open_max_calls:
+                self._trial_calls += 1
+                return True
+            return False
+
+    def release(self):
+        """Give back a half-open trial slot taken by a call that was abandoned before it finished"""
+        with self._lock:
+            if self._current_state(time.monotonic()) == HALF_OPEN and self._trial_calls:
+                self._trial_calls -= 1
+
+    def record_success(self, latency_seconds):
+        """Record a completed call; slow successes count as failures"""
+        if self.slow_call_seconds is not None and latency_seconds > self.slow_call_seconds:
+            self.record_failure()
+            return
+        with self._lock:
+            if self._current_state(time.monotonic()) == HALF_OPEN:
+                self._state = CLOSED
+                self._failures.clear()
+
+    def record_failure(self):
+        """Record a failed call, opening the circuit once the threshold is reached"""
+        now = time.monotonic()
+        with self._lock:
+            state = self._current_state(now)
+            self._failures.append(now)
+            while self._failures and now - self._failures[0] > self.window_seconds:
+                self._failures.popleft()
+            if state == HALF_OPEN or len(self._failures) >= self.failure_threshold:
+                self._state = OPEN
+                self._opened_at = now
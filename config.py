@@ -0,0 +1,30 @@
+import os
+
+import streamlit as st
+
+
+def get_setting(name, default=None):
+    """Read a setting from Streamlit secrets, falling back to environment variables"""
+    try:
+        if name in st.secrets:
+            return st.secrets[name]
+    except FileNotFoundError:
+        # No secrets.toml configured for this deployment
+        pass
+    return os.environ.get(name, default)
+
+
+def get_int_setting(name, default):
+    """Read an integer setting, using the default when unset or malformed"""
+    try:
+        return int(get_setting(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def get_float_setting(name, default):
+    """Read a float setting, using the default when unset or malformed"""
+    try:
+        return float(get_setting(name, default))
+    except (TypeError, ValueError):
+        return default
@@ -0,0 +1,118 @@
+import json
+import secrets
+import sqlite3
+import threading
+import time
+
+
+def empty_draft():
+    return {"machines": [], "fields": {}}
+
+
+def machine_splice(old, new):
+    """Smallest single splice turning the old machine list into the new one, or None if equal.
+
+    Appends, removals, inserts and single-machine edits all become one op that carries
+    only the machines that changed, however long the inventory is.
+    """
+    if old == new:
+        return None
+    start = 0
+    while start < len(old) and start < len(new) and old[start] == new[start]:
+        start += 1
+    old_stop, new_stop = len(old), len(new)
+    while old_stop > start and new_stop > start and old[old_stop - 1] == new[new_stop - 1]:
+        old_stop -= 1
+        new_stop -= 1
+    return {"op": "splice", "start": start, "stop": old_stop, "machines": new[start:new_stop]}
+
+
+def apply_op(draft, op):
+    if op["op"] == "splice":
+        draft["machines"][op["start"]:op["stop"]] = op["machines"]
+    elif op["op"] == "set":
+        draft["fields"][op["field"]] = op["value"]
+
+
+class DraftStore:
+    """Autosaved onboarding drafts in SQLite, keyed by a resumable token.
+
+    Each autosave appends only the ops that changed (see machine_splice). Once a draft has
+    snapshot_every ops they are folded into a snapshot, so restoring stays one read of the
+    snapshot plus a short tail of ops.
+    """
+
+    def __init__(self, path, snapshot_every=50):
+        self.snapshot_every = snapshot_every
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS drafts "
+            "(token TEXT PRIMARY KEY, snapshot TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS draft_ops "
+            "(token TEXT NOT NULL, seq INTEGER NOT NULL, op TEXT NOT NULL, PRIMARY KEY (token, seq))"
+        )
+        self._db.commit()
+
+    @staticmethod
+    def new_token():
+        return secrets.token_urlsafe(16)
+
+    def append(self, token, ops):
+        """Record a batch of ops against a draft, creating the draft on first use"""
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR IGNORE INTO drafts (token, snapshot, updated_at) VALUES (?, ?, ?)",
+                (token, json.dumps(empty_draft()), now)
+            )
+            last = self._db.execute(
+                "SELECT COALESCE(MAX(seq), 0), COUNT(*) FROM draft_ops WHERE token = ?", (token,)
+            ).fetchone()
+            self._db.executemany(
+                "INSERT INTO draft_ops (token, seq, op) VALUES (?, ?, ?)",
+                [(token, last[0] + i + 1, json.dumps(op)) for i, op in enumerate(ops)]
+            )
+            self._db.execute("UPDATE drafts SET updated_at = ? WHERE token = ?", (now, token))
+            if last[1] + len(ops) >= self.snapshot_every:
+                self._snapshot(token)
+            self._db.commit()
+
+    def _snapshot(self, token):
+        draft = self._load(token)
+        self._db.execute("UPDATE drafts SET snapshot = ? WHERE token = ?", (json.dumps(draft), token))
+        self._db.execute("DELETE FROM draft_ops WHERE token = ?", (token,))
+
+    def _load(self, token):
+        row = self._db.execute("SELECT snapshot FROM drafts WHERE token = ?", (token,)).fetchone()
+        if row is None:
+            return None
+        draft = json.loads(row[0])
+        for (op,) in self._db.execute("SELECT op FROM draft_ops WHERE token = ? ORDER BY seq", (token,)):
+            apply_op(draft, json.loads(op))
+        return draft
+
+    def load(self, token):
+        """Return a draft as {"machines": [...], "fields": {...}}, or None if the token is unknown"""
+        with self._lock:
+            return self._load(token)
+
+    def delete(self, token):
+        with self._lock:
+            self._db.execute("DELETE FROM draft_ops WHERE token = ?", (token,))
+            self._db.execute("DELETE FROM drafts WHERE token = ?", (token,))
+            self._db.commit()
+
+    def collect(self, max_age_seconds):
+        """Delete drafts nobody has touched for max_age_seconds, returning how many were removed"""
+        cutoff = time.time() - max_age_seconds
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM draft_ops WHERE token IN (SELECT token FROM drafts WHERE updated_at < ?)", (cutoff,)
+            )
+            removed = self._db.execute("DELETE FROM drafts WHERE updated_at < ?", (cutoff,)).rowcount
+            self._db.commit()
+        return removed
@@ -0,0 +1,84 @@
+import asyncio
+import random
+import threading
+
+import httpx
+
+from config import get_float_setting, get_int_setting
+
+CONNECT_TIMEOUT_SECONDS = get_float_setting("HTTP_CONNECT_TIMEOUT_SECONDS", 3.0)
+READ_TIMEOUT_SECONDS = get_float_setting("HTTP_READ_TIMEOUT_SECONDS", 10.0)
+POOL_SIZE = get_int_setting("HTTP_POOL_SIZE", 10)
+MAX_RETRIES = get_int_setting("HTTP_MAX_RETRIES", 2)
+BACKOFF_BASE_SECONDS = 0.25
+BACKOFF_CAP_SECONDS = 4.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_lock = threading.Lock()
+_loop = None
+_client = None
+
+
+def get_loop():
+    """Return the process-wide event loop all outbound HTTP runs on, starting it on first use"""
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="http-client", daemon=True).start()
+    return _loop
+
+
+def run(coro):
+    """Run a coroutine on the shared loop from a synchronous thread and return its result"""
+    return asyncio.run_coroutine_threadsafe(coro, get_loop()).result()
+
+
+def get_client():
+    """Return the pooled keep-alive client; only call this from the shared loop"""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE),
+            timeout=httpx.Timeout(READ_TIMEOUT_SECONDS, connect=CONNECT_TIMEOUT_SECONDS)
+        )
+    return _client
+
+
+def backoff_delay(attempt, retry_after=None):
+    """Full-jitter exponential backoff, honouring a numeric Retry-After header when present"""
+    if retry_after is not None:
+        try:
+            return min(float(retry_after), BACKOFF_CAP_SECONDS)
+        except ValueError:
+            pass
+    return random.uniform(0, min(BACKOFF_CAP_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+
+async def post_json(url, payload, headers=None, max_retries=MAX_RETRIES):
+    """POST payload as JSON, retrying 429/5xx responses and connection errors with jittered backoff"""
+    for attempt in range(max_retries + 1):
+        retry_after = None
+        try:
+            response = await get_client().post(url, headers=headers, json=payload)
+        except httpx.TransportError:
+            if attempt == max_retries:
+                raise
+        else:
+            if response.status_code not in RETRY_STATUSES or attempt == max_retries:
+                return response
+            retry_after = response.headers.get("Retry-After")
+        await asyncio.sleep(backoff_delay(attempt, retry_after))
+
+
+async def stream_lines(url, payload, headers=None):
+    """POST payload as JSON and yield response lines as they arrive.
+
+    Streams are not retried, since part of the body may already have been consumed.
+    """
+    async with get_client().stream("POST", url, headers=headers, json=payload) as response:
+        if response.status_code != 200:
+            await response.aread()
+            response.raise_for_status()
+        async for line in response.aiter_lines():
+            yield line
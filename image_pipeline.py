@@ -0,0 +1,64 @@
+import io
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+# Longest edge in pixels of each derived variant; thumbnails match the width=300 summary images
+VARIANT_SIZES = {"thumb": 300}
+JPEG_QUALITY = 85
+
+
+class ImagePipeline:
+    """Decodes each uploaded photo once and caches its downscaled variants by content hash.
+
+    Originals live in the photo store under their SHA-256 key and each variant under
+    "<key>-<variant>". Variants are upright (EXIF orientation applied) RGB JPEGs,
+    so pages only ever send the small versions of 12-MP phone photos.
+    """
+
+    def __init__(self, store, sizes=None, quality=JPEG_QUALITY):
+        self.store = store
+        self.sizes = sorted((sizes or VARIANT_SIZES).items(), key=lambda item: item[1], reverse=True)
+        self.quality = quality
+
+    def variant_key(self, key, variant):
+        return f"{key}-{variant}"
+
+    def ensure_variants(self, key):
+        """Write any missing variants of a stored photo; raises ValueError if it is not a readable image"""
+        if not all(self.store.exists(self.variant_key(key, variant)) for variant, _ in self.sizes):
+            self._write_variants(key)
+
+    def variant_path(self, key, variant="thumb"):
+        """Path of a variant of a stored photo, generating it if it is missing"""
+        self.ensure_variants(key)
+        return self.store.path(self.variant_key(key, variant))
+
+    def _write_variants(self, key):
+        try:
+            # Decode straight from the stored file rather than holding the upload in memory
+            image = Image.open(self.store.path(key))
+            # Let the JPEG decoder scale down by a power of two while decoding the largest variant
+            largest = self.sizes[0][1]
+            image.draft("RGB", (largest, largest))
+            image = ImageOps.exif_transpose(image)
+            image = self._flatten(image)
+        except Image.DecompressionBombError:
+            raise ValueError("The image has too many pixels to process.") from None
+        except (UnidentifiedImageError, OSError):
+            raise ValueError("Could not read the image; upload a JPG or PNG photo.") from None
+        # Each variant is downscaled from the previous, larger one rather than the original
+        for variant, size in self.sizes:
+            image.thumbnail((size, size), Image.LANCZOS)
+            output = io.BytesIO()
+            image.save(output, "JPEG", quality=self.quality, optimize=True)
+            self.store.write(self.variant_key(key, variant), output.getvalue())
+
+    @staticmethod
+    def _flatten(image):
+        """Convert to RGB, compositing transparent PNGs onto white"""
+        if image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info:
+            image = image.convert("RGBA")
+            flattened = Image.new("RGB", image.size, "white")
+            flattened.paste(image, mask=image.getchannel("A"))
+            return flattened
+        return image.convert("RGB") if image.mode != "RGB" else image
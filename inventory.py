@@ -0,0 +1,172 @@
+import itertools
+import sys
+from array import array
+from dataclasses import dataclass
+
+# Process-wide, so an inventory swapped in by AI suggestions or a draft never reuses
+# an id (and with it the widget keys) of the machines it replaced
+_machine_ids = itertools.count(1)
+# Quantities are stored in a C long array; no plant has anywhere near this many of one machine
+MAX_QUANTITY = 1_000_000
+
+
+@dataclass(slots=True)
+class Machine:
+    """One inventory line; photo is a photo-store key, never the image itself"""
+    type: str = ""
+    model: str = ""
+    info: str = ""
+    quantity: int = 1
+    photo: str | None = None
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a machine from a suggestion or catalog dict, tolerating missing fields"""
+        try:
+            quantity = min(MAX_QUANTITY, max(1, int(data.get("quantity") or 1)))
+        except (TypeError, ValueError, OverflowError):
+            quantity = 1
+        return cls(
+            type=str(data.get("type") or ""),
+            model=str(data.get("model") or ""),
+            info=str(data.get("info") or ""),
+            quantity=quantity,
+            photo=data.get("photo")
+        )
+
+    def to_dict(self):
+        return {"type": self.type, "model": self.model, "info": self.info,
+                "quantity": self.quantity, "photo": self.photo}
+
+
+class MachineInventory:
+    """Columnar machine list: one list per field instead of one object per machine.
+
+    Indexing returns a Machine copy, so edits are written back with inventory[i] = machine.
+    Types and models repeat across large plants and are interned to share one string each.
+    Every machine also gets an id that survives removals of the machines before it, with
+    an id -> position index, so widget keys and the edit panel can follow the machine
+    rather than its position in the list. Totals for the summary and header badge are
+    kept up to date on every add, edit and remove, so reading them never rescans the list.
+    """
+
+    __slots__ = ("_types", "_models", "_infos", "_quantities", "_photos", "_ids", "_positions",
+                 "_total_quantity", "_by_type", "_with_photo", "_missing_model")
+    _COLUMNS = ("_types", "_models", "_infos", "_quantities", "_photos", "_ids")
+
+    def __init__(self, machines=()):
+        self._types = []
+        self._models = []
+        self._infos = []
+        self._quantities = array("l")
+        self._photos = []
+        self._ids = array("q")
+        self._positions = {}
+        self._total_quantity = 0
+        self._by_type = {}  # type -> number of machines
+        self._with_photo = 0
+        self._missing_model = 0
+        self.extend(machines)
+
+    @classmethod
+    def from_dicts(cls, dicts):
+        return cls(Machine.from_dict(data) for data in dicts)
+
+    def __len__(self):
+        return len(self._types)
+
+    def __getitem__(self, index):
+        return Machine(self._types[index], self._models[index], self._infos[index],
+                       self._quantities[index], self._photos[index])
+
+    def __setitem__(self, index, machine):
+        old = self[index]
+        # The array store is the one step that can fail (OverflowError), so it goes first
+        self._quantities[index] = machine.quantity
+        self._count(old.type, old.model, old.quantity, old.photo, -1)
+        self._count(machine.type, machine.model, machine.quantity, machine.photo, 1)
+        self._types[index] = sys.intern(machine.type)
+        self._models[index] = sys.intern(machine.model)
+        self._infos[index] = machine.info
+        self._photos[index] = machine.photo
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def __eq__(self, other):
+        if not isinstance(other, MachineInventory):
+            return NotImplemented
+        # Ids identify machines, not their contents
+        return all(getattr(self, column) == getattr(other, column) for column in self._COLUMNS[:-1])
+
+    def _count(self, machine_type, model, quantity, photo, sign):
+        """Add a machine's fields to the running totals, or take them out with sign=-1"""
+        self._total_quantity += sign * quantity
+        self._by_type[machine_type] = self._by_type.get(machine_type, 0) + sign
+        if not self._by_type[machine_type]:
+            del self._by_type[machine_type]
+        self._with_photo += sign * bool(photo)
+        self._missing_model += sign * (not model.strip())
+
+    def append(self, machine):
+        # As in __setitem__, the array append can fail, so it runs before any other column changes
+        self._quantities.append(machine.quantity)
+        self._count(machine.type, machine.model, machine.quantity, machine.photo, 1)
+        self._types.append(sys.intern(machine.type))
+        self._models.append(sys.intern(machine.model))
+        self._infos.append(machine.info)
+        self._photos.append(machine.photo)
+        machine_id = next(_machine_ids)
+        self._positions[machine_id] = len(self._ids)
+        self._ids.append(machine_id)
+
+    def extend(self, machines):
+        for machine in machines:
+            self.append(machine)
+
+    def pop(self, index=-1):
+        index = range(len(self))[index]
+        machine = self[index]
+        self._count(machine.type, machine.model, machine.quantity, machine.photo, -1)
+        del self._positions[self._ids[index]]
+        for column in self._COLUMNS:
+            del getattr(self, column)[index]
+        for position in range(index, len(self)):
+            self._positions[self._ids[position]] = position
+        return machine
+
+    def id_at(self, index):
+        """Stable id of the machine at index"""
+        return self._ids[index]
+
+    def position(self, machine_id):
+        """Current index of the machine with this id, or None if it has been removed"""
+        return self._positions.get(machine_id)
+
+    def remove(self, machine_id):
+        """Remove the machine with this id and return it"""
+        return self.pop(self._positions[machine_id])
+
+    def total_quantity(self):
+        """Sum of machine quantities"""
+        return self._total_quantity
+
+    def type_count(self):
+        """Number of distinct machine types"""
+        return len(self._by_type)
+
+    def photo_count(self):
+        """Number of machines that have a photo"""
+        return self._with_photo
+
+    def missing_model_count(self):
+        """Number of machines with no model given"""
+        return self._missing_model
+
+    def photo_keys(self):
+        """Photo-store keys of machines that have a photo, in inventory order"""
+        return [key for key in self._photos if key]
+
+    def to_dicts(self):
+        return [machine.to_dict() for machine in self]
@@ -0,0 +1,23 @@
+import math
+
+
+def filter_machines(machines, query):
+    """Return (index, machine) pairs whose type, model or info contain query, ignoring case.
+
+    Indexes refer to positions in the unfiltered list so Edit/Remove act on the right machine.
+    """
+    query = query.strip().lower()
+    if not query:
+        return list(enumerate(machines))
+    return [
+        (i, machine) for i, machine in enumerate(machines)
+        if query in f"{machine.type}\n{machine.model}\n{machine.info}".lower()
+    ]
+
+
+def paginate(items, page, page_size):
+    """Return (page_items, page, page_count), clamping page into range"""
+    page_count = max(1, math.ceil(len(items) / page_size))
+    page = min(max(page, 0), page_count - 1)
+    start = page * page_size
+    return items[start:start + page_size], page, page_count
@@ -0,0 +1,37 @@
+import json
+import os
+from types import MappingProxyType
+
+from config import get_setting
+
+DEFAULT_INDUSTRY = "General Manufacturing"
+BUILTIN_CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "machine_catalog.json")
+
+
+def load_catalog(*paths):
+    """Load industry -> machines mappings from JSON files; later files add or replace industries"""
+    catalog = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for industry, machines in json.load(f).items():
+                catalog[industry] = tuple(
+                    MappingProxyType({
+                        "type": machine["type"],
+                        "model": machine.get("model", ""),
+                        "info": machine.get("info", ""),
+                        "quantity": int(machine.get("quantity", 1)),
+                    })
+                    for machine in machines
+                )
+    return MappingProxyType(catalog)
+
+
+# Loaded once per process; MACHINE_CATALOG_PATH can point at an extra file of industries
+CATALOG = load_catalog(BUILTIN_CATALOG_PATH, *filter(None, [get_setting("MACHINE_CATALOG_PATH")]))
+INDUSTRIES = tuple(CATALOG)
+
+
+def suggestions_for(industry):
+    """Return fresh, editable machine dicts for an industry, defaulting to General Manufacturing"""
+    machines = CATALOG.get(industry) or CATALOG[DEFAULT_INDUSTRY]
+    return [dict(machine) for machine in machines]
@@ -0,0 +1,136 @@
+import csv
+import io
+from dataclasses import dataclass, field
+
+from inventory import MAX_QUANTITY, Machine
+
+# Spreadsheet headers we accept for each machine field, compared case-insensitively
+COLUMN_ALIASES = {
+    "type": ("type", "machine type", "machine", "asset type", "equipment"),
+    "model": ("model", "model number", "make/model"),
+    "info": ("info", "additional info", "description", "notes", "serial number"),
+    "quantity": ("quantity", "qty", "count"),
+}
+MAX_REPORTED_ERRORS = 100
+MAX_FIELD_LENGTH = 500
+
+
+@dataclass
+class ImportResult:
+    """Outcome of a bulk import; only the first MAX_REPORTED_ERRORS errors are kept"""
+    machines: list = field(default_factory=list)
+    errors: list = field(default_factory=list)
+    rows_read: int = 0
+    error_count: int = 0
+    duplicate_count: int = 0
+
+
+def iter_csv_rows(binary_file):
+    """Yield rows of an uploaded CSV one at a time as lists of strings"""
+    text = io.TextIOWrapper(binary_file, encoding="utf-8-sig", newline="")
+    try:
+        yield from csv.reader(text)
+    except csv.Error as e:
+        raise ValueError(f"Could not read the CSV file: {e}") from None
+    finally:
+        # Leave the underlying upload open for Streamlit
+        text.detach()
+
+
+def iter_xlsx_rows(binary_file):
+    """Yield rows of the first worksheet of an uploaded XLSX one at a time"""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError("XLSX import needs the openpyxl package; upload a CSV instead.") from None
+    # read_only mode streams rows from the sheet XML instead of building the whole workbook
+    try:
+        workbook = load_workbook(binary_file, read_only=True, data_only=True)
+    except Exception:
+        raise ValueError("Could not read the XLSX file; check that it is a valid Excel workbook.") from None
+    try:
+        for row in workbook.worksheets[0].iter_rows(values_only=True):
+            yield ["" if value is None else str(value) for value in row]
+    finally:
+        workbook.close()
+
+
+def read_rows(binary_file, filename):
+    """Pick a row reader from the upload's file extension"""
+    if filename.lower().endswith(".xlsx"):
+        return iter_xlsx_rows(binary_file)
+    return iter_csv_rows(binary_file)
+
+
+def _column_positions(header):
+    normalized = [str(cell).strip().lower() for cell in header]
+    positions = {}
+    for name, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in normalized:
+                positions[name] = normalized.index(alias)
+                break
+    if "type" not in positions:
+        raise ValueError("The first row must contain a 'type' (or 'machine type') column.")
+    return positions
+
+
+def _parse_row(row, positions):
+    def cell(name):
+        index = positions.get(name)
+        if index is None or index >= len(row):
+            return ""
+        return str(row[index]).strip()
+
+    machine = Machine(type=cell("type"), model=cell("model"), info=cell("info"))
+    if not machine.type:
+        raise ValueError("missing machine type")
+    if any(len(value) > MAX_FIELD_LENGTH for value in (machine.type, machine.model, machine.info)):
+        raise ValueError(f"a value is longer than {MAX_FIELD_LENGTH} characters")
+    quantity = cell("quantity") or "1"
+    try:
+        machine.quantity = int(float(quantity))
+    except ValueError:
+        raise ValueError(f"quantity {quantity!r} is not a number") from None
+    except OverflowError:
+        # inf and -inf parse as floats but have no integer value
+        raise ValueError(f"quantity must be between 1 and {MAX_QUANTITY:,}") from None
+    if not 1 <= machine.quantity <= MAX_QUANTITY:
+        raise ValueError(f"quantity must be between 1 and {MAX_QUANTITY:,}")
+    return machine
+
+
+def import_machines(rows, existing_machines=()):
+    """Validate and dedupe spreadsheet rows into Machine records.
+
+    rows is an iterator whose first item is the header row; it is consumed one row at a
+    time. Rows whose (type, model) matches an existing machine or an earlier row are
+    skipped as duplicates. Raises ValueError if the header has no type column.
+    """
+    result = ImportResult()
+    rows = iter(rows)
+    header = next(rows, None)
+    if header is None:
+        raise ValueError("The file is empty.")
+    positions = _column_positions(header)
+    seen = {(m.type.lower(), m.model.lower()) for m in existing_machines}
+
+    # Row 1 is the header, so data rows are numbered from 2 as in a spreadsheet
+    for row_number, row in enumerate(rows, start=2):
+        if not any(str(value).strip() for value in row):
+            continue
+        result.rows_read += 1
+        try:
+            machine = _parse_row(row, positions)
+        except ValueError as e:
+            result.error_count += 1
+            if len(result.errors) < MAX_REPORTED_ERRORS:
+                result.errors.append(f"Row {row_number}: {e}")
+            continue
+        key = (machine.type.lower(), machine.model.lower())
+        if key in seen:
+            result.duplicate_count += 1
+            continue
+        seen.add(key)
+        result.machines.append(machine)
+    return result
@@ -0,0 +1,148 @@
+"""Offline manufacturer/model reference, stored as a sorted binary file read through mmap.
+
+Rebuild data/machine_models.bin after editing data/machine_models.csv:
+
+    python model_reference.py [data/machine_models.csv] [data/machine_models.bin]
+"""
+import csv
+import mmap
+import os
+import struct
+import sys
+from dataclasses import dataclass
+
+from autocomplete import normalize
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+BUILTIN_SOURCE_PATH = os.path.join(DATA_DIR, "machine_models.csv")
+BUILTIN_REFERENCE_PATH = os.path.join(DATA_DIR, "machine_models.bin")
+
+MAGIC = b"MREF"
+VERSION = 1
+HEADER = struct.Struct("<4sII")  # magic, version, index entries
+ENTRY = struct.Struct("<IHIH")  # key offset, key length, record offset, record length
+FIELD_SEPARATOR = "\x1f"
+
+
+@dataclass(slots=True)
+class ModelRecord:
+    """One reference entry; axes and power_kw are None when they don't apply or aren't known"""
+    manufacturer: str
+    model: str
+    type: str
+    axes: int | None = None
+    power_kw: float | None = None
+
+    @property
+    def name(self):
+        return f"{self.manufacturer} {self.model}"
+
+    def specs(self):
+        """Axes and power, used to fill in a machine's info"""
+        parts = []
+        if self.axes:
+            parts.append(f"{self.axes}-axis")
+        if self.power_kw:
+            parts.append(f"~{self.power_kw:g} kW rated power")
+        return " • ".join(parts)
+
+    def summary(self):
+        return " • ".join(filter(None, [self.type, self.specs()]))
+
+    def encode(self):
+        fields = (self.manufacturer, self.model, self.type, self.axes or "", self.power_kw or "")
+        return FIELD_SEPARATOR.join(str(field) for field in fields).encode()
+
+    @classmethod
+    def decode(cls, data):
+        manufacturer, model, machine_type, axes, power_kw = data.decode().split(FIELD_SEPARATOR)
+        return cls(manufacturer, model, machine_type, int(axes) if axes else None, float(power_kw) if power_kw else None)
+
+
+def read_source(path):
+    """Read ModelRecords from a CSV with manufacturer, model, type, axes and power_kw columns"""
+    with open(path, newline="", encoding="utf-8") as f:
+        return [
+            ModelRecord(
+                row["manufacturer"].strip(), row["model"].strip(), row["type"].strip(),
+                int(row["axes"]) if row.get("axes") else None,
+                float(row["power_kw"]) if row.get("power_kw") else None,
+            )
+            for row in csv.DictReader(f)
+        ]
+
+
+def build_reference(records, path):
+    """Write records to path, findable by "manufacturer model" and by the model alone"""
+    blob = bytearray()
+    entries = {}
+    for record in records:
+        data = record.encode()
+        record_offset = len(blob)
+        blob += data
+        # The first record keeps a key two manufacturers share, e.g. a bare model number
+        for key in (normalize(record.name), normalize(record.model)):
+            entries.setdefault(key.encode(), (record_offset, len(data)))
+    blob_offset = HEADER.size + ENTRY.size * len(entries)
+    index = bytearray()
+    for key, (record_offset, record_length) in sorted(entries.items()):
+        index += ENTRY.pack(blob_offset + len(blob), len(key), blob_offset + record_offset, record_length)
+        blob += key
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(entries)))
+        f.write(index)
+        f.write(blob)
+    os.replace(tmp_path, path)
+
+
+class ModelReference:
+    """Read-only lookup of manufacturer/model records by model number.
+
+    The file is memory-mapped, so opening it reads nothing but the header and every
+    worker process shares the same pages. Lookups binary-search the sorted key index
+    and decode only the one record they return.
+    """
+
+    def __init__(self, path=BUILTIN_REFERENCE_PATH):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self._count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} model reference")
+
+    def __len__(self):
+        return self._count
+
+    def _key(self, position):
+        key_offset, key_length, _, _ = ENTRY.unpack_from(self._map, HEADER.size + ENTRY.size * position)
+        return self._map[key_offset:key_offset + key_length]
+
+    def lookup(self, model):
+        """The record for a model number such as "Haas VF-2" or "vf2", or None if it isn't known"""
+        key = normalize(model).encode()
+        if not key:
+            return None
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low == self._count or self._key(low) != key:
+            return None
+        _, _, record_offset, record_length = ENTRY.unpack_from(self._map, HEADER.size + ENTRY.size * low)
+        return ModelRecord.decode(self._map[record_offset:record_offset + record_length])
+
+    def close(self):
+        self._map.close()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    source = args[0] if args else BUILTIN_SOURCE_PATH
+    target = args[1] if len(args) > 1 else BUILTIN_REFERENCE_PATH
+    records = read_source(source)
+    build_reference(records, target)
+    print(f"Wrote {len(records)} models to {target}")
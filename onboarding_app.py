@@ -1,6 +1,16 @@
 import streamlit as st
-import requests
-import json
+
+from config import get_setting
+from inventory import Machine, MachineInventory
+from machine_catalog import INDUSTRIES, suggestions_for
+from onboarding_session import (
+    autosave_draft, backfill_pending_suggestions, bulk_import_section, collect_photo_uploads,
+    edit_machine_form, get_machine_suggestions, init_session, inventory_badge, photo_thumbnail,
+    remove_machine, render_sidebar_stats, show_celebration, start_editing, submit_onboarding,
+    sync_photo_refs, visible_machines
+)
+from section_profiler import finish_rerun, profile_section, render_profile_panel, start_rerun
+from stylesheet import style_tag
 
 # Page configuration
 st.set_page_config(
@@ -10,651 +20,167 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-# Custom CSS for modern, Figma-inspired design
-st.markdown("""
-<style>
-/* Reset and base styles */
-* {
-    margin: 0;
-    padding: 0;
-    box-sizing: border-box;
-}
-
-/* Modern typography */
-@import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap');
-
-.main .block-container {
-    font-family: 'Inter', -apple-system, BlinkMacSystemFont, sans-serif;
-    max-width: 1200px;
-    padding: 0 1rem;
-}
-
-/* Header styles */
-.main-header {
-    font-size: 2.5rem;
-    font-weight: 700;
-    color: #1a1a1a;
-    text-align: center;
-    margin: 2rem 0 3rem 0;
-}
-
-/* Card styles */
-.modern-card {
-    background: #ffffff;
-    border: 1px solid #e5e7eb;
-    border-radius: 12px;
-    padding: 2rem;
-    margin: 1.5rem 0;
-    box-shadow: 0 1px 3px rgba(0, 0, 0, 0.1);
-    transition: all 0.2s ease;
-}
-
-.modern-card:hover {
-    box-shadow: 0 4px 12px rgba(0, 0, 0, 0.15);
-    transform: translateY(-2px);
-}
-
-.card-header {
-    font-size: 1.5rem;
-    font-weight: 600;
-    color: #1a1a1a;
-    margin-bottom: 1rem;
-    display: flex;
-    align-items: center;
-    gap: 0.5rem;
-}
-
-.card-subtitle {
-    color: #6b7280;
-    font-size: 0.95rem;
-    margin-bottom: 1.5rem;
-    line-height: 1.5;
-}
-
-/* Button styles */
-.modern-button {
-    background: linear-gradient(135deg, #502DD5 0%, #7C3AED 100%);
-    color: white;
-    border: none;
-    border-radius: 8px;
-    padding: 0.75rem 1.5rem;
-    font-weight: 500;
-    font-size: 0.95rem;
-    cursor: pointer;
-    transition: all 0.2s ease;
-    text-decoration: none;
-    display: inline-flex;
-    align-items: center;
-    gap: 0.5rem;
-}
-
-.modern-button:hover {
-    transform: translateY(-1px);
-    box-shadow: 0 4px 12px rgba(80, 45, 213, 0.3);
-}
-
-.secondary-button {
-    background: #f8fafc;
-    color: #374151;
-    border: 1px solid #d1d5db;
-    border-radius: 8px;
-    padding: 0.75rem 1.5rem;
-    font-weight: 500;
-    font-size: 0.95rem;
-    cursor: pointer;
-    transition: all 0.2s ease;
-    text-decoration: none;
-    display: inline-flex;
-    align-items: center;
-    gap: 0.5rem;
-}
-
-.secondary-button:hover {
-    background: #f1f5f9;
-    border-color: #9ca3af;
-}
-
-/* Form styles */
-.stTextInput > div > div > input {
-    border: 1px solid #d1d5db;
-    border-radius: 8px;
-    padding: 0.75rem;
-    font-size: 0.95rem;
-    transition: all 0.2s ease;
-}
-
-.stTextInput > div > div > input:focus {
-    border-color: #502DD5;
-    box-shadow: 0 0 0 3px rgba(80, 45, 213, 0.1);
-}
-
-.stTextArea > div > div > textarea {
-    border: 1px solid #d1d5db;
-    border-radius: 8px;
-    padding: 0.75rem;
-    font-size: 0.95rem;
-    transition: all 0.2s ease;
-}
-
-.stTextArea > div > div > textarea:focus {
-    border-color: #502DD5;
-    box-shadow: 0 0 0 3px rgba(80, 45, 213, 0.1);
-}
-
-/* Selectbox styles */
-.stSelectbox > div > div > div {
-    border: 1px solid #d1d5db;
-    border-radius: 8px;
-    transition: all 0.2s ease;
-}
-
-.stSelectbox > div > div > div:focus-within {
-    border-color: #502DD5;
-    box-shadow: 0 0 0 3px rgba(80, 45, 213, 0.1);
-}
-
-/* Machine item styles */
-.machine-item {
-    background: #f8fafc;
-    border: 1px solid #e5e7eb;
-    border-radius: 8px;
-    padding: 1rem;
-    margin: 0.5rem 0;
-    transition: all 0.2s ease;
-}
-
-.machine-item:hover {
-    background: #f1f5f9;
-    border-color: #d1d5db;
-}
-
-.machine-title {
-    font-weight: 600;
-    color: #1a1a1a;
-    margin-bottom: 0.25rem;
-}
-
-.machine-details {
-    color: #6b7280;
-    font-size: 0.9rem;
-}
-
-/* Success and info styles */
-.success-message {
-    background: linear-gradient(135deg, #10b981 0%, #059669 100%);
-    color: white;
-    padding: 1rem 1.5rem;
-    border-radius: 8px;
-    margin: 1rem 0;
-    font-weight: 500;
-}
-
-.info-message {
-    background: #eff6ff;
-    color: #1e40af;
-    padding: 1rem 1.5rem;
-    border-radius: 8px;
-    margin: 1rem 0;
-    border-left: 4px solid #3b82f6;
-}
-
-/* Responsive design */
-@media (max-width: 768px) {
-    .main-header {
-        font-size: 2rem;
-        margin: 1.5rem 0 2rem 0;
-    }
-    
-    .modern-card {
-        padding: 1.5rem;
-        margin: 1rem 0;
-    }
-    
-    .card-header {
-        font-size: 1.25rem;
-    }
-}
-
-/* Grid layout */
-.grid-container {
-    display: grid;
-    grid-template-columns: repeat(auto-fit, minmax(300px, 1fr));
-    gap: 1.5rem;
-    margin: 1.5rem 0;
-}
-
-/* Progress indicator */
-.progress-bar {
-    background: #f1f5f9;
-    border-radius: 8px;
-    height: 8px;
-    margin: 1rem 0;
-    overflow: hidden;
-}
-
-.progress-fill {
-    background: linear-gradient(135deg, #502DD5 0%, #7C3AED 100%);
-    height: 100%;
-    border-radius: 8px;
-    transition: width 0.3s ease;
-}
-
-/* Animation classes */
-.fade-in {
-    animation: fadeIn 0.5s ease-in;
-}
-
-@keyframes fadeIn {
-    from { opacity: 0; transform: translateY(10px); }
-    to { opacity: 1; transform: translateY(0); }
-}
-
-/* Custom checkbox */
-.stCheckbox > div > div {
-    background: #f8fafc;
-    border: 1px solid #d1d5db;
-    border-radius: 6px;
-}
-
-.stCheckbox > div > div:checked {
-    background: #502DD5;
-    border-color: #502DD5;
-}
-
-/* File uploader */
-.stFileUploader > div > div {
-    border: 2px dashed #d1d5db;
-    border-radius: 8px;
-    background: #f8fafc;
-    transition: all 0.2s ease;
-}
-
-.stFileUploader > div > div:hover {
-    border-color: #502DD5;
-    background: #f0f4ff;
-}
-
-/* Radio buttons */
-.stRadio > div > div {
-    background: #f8fafc;
-    border: 1px solid #d1d5db;
-    border-radius: 8px;
-}
-
-.stRadio > div > div:checked {
-    background: #502DD5;
-    border-color: #502DD5;
-}
-
-/* Hide Streamlit default elements */
-#MainMenu {visibility: hidden;}
-footer {visibility: hidden;}
-header {visibility: hidden;}
-
-/* Custom scrollbar */
-::-webkit-scrollbar {
-    width: 8px;
-}
-
-::-webkit-scrollbar-track {
-    background: #f1f5f9;
-}
-
-::-webkit-scrollbar-thumb {
-    background: #cbd5e1;
-    border-radius: 4px;
-}
-
-::-webkit-scrollbar-thumb:hover {
-    background: #94a3b8;
-}
-</style>
-""", unsafe_allow_html=True)
-
-# LLM API configuration
-def get_machine_suggestions(industry):
-    """Get machine suggestions from LLM based on industry"""
-    try:
-        # Using a free LLM API (you can replace with OpenAI, Anthropic, etc.)
-        api_url = "https://api.openai.com/v1/chat/completions"
-        
-        prompt = f"""Based on the {industry} industry, suggest 6-8 common machines that would be found in a typical manufacturing facility. 
-        For each machine, provide:
-        - Machine type (e.g., Lathe, Milling Machine, CNC Router)
-        - Typical quantity (1-3)
-        - Brief description of its use in this industry
-        
-        Return as JSON array with format:
-        [{{"type": "Machine Type", "model": "", "info": "Brief description", "quantity": 1}}]
-        
-        Focus on machines that are essential for {industry} manufacturing."""
-        
-        # For demo purposes, using a fallback if API is not configured
-        if not st.secrets.get("OPENAI_API_KEY"):
-            # Fallback suggestions based on industry
-            fallback_suggestions = {
-                "Automotive": [
-                    {"type": "CNC Lathe", "model": "", "info": "Precision turning for automotive parts", "quantity": 2},
-                    {"type": "Milling Machine", "model": "", "info": "Complex machining operations", "quantity": 1},
-                    {"type": "Welding Station", "model": "", "info": "Metal joining and fabrication", "quantity": 2},
-                    {"type": "Press Brake", "model": "", "info": "Sheet metal bending", "quantity": 1},
-                    {"type": "Laser Cutter", "model": "", "info": "Precision cutting of metal sheets", "quantity": 1},
-                    {"type": "Quality Control Station", "model": "", "info": "Measurement and inspection", "quantity": 1}
-                ],
-                "Aerospace": [
-                    {"type": "5-Axis CNC Mill", "model": "", "info": "Complex aerospace component machining", "quantity": 1},
-                    {"type": "EDM Machine", "model": "", "info": "Precision electrical discharge machining", "quantity": 1},
-                    {"type": "Coordinate Measuring Machine", "model": "", "info": "High-precision measurement", "quantity": 1},
-                    {"type": "Composite Layup Station", "model": "", "info": "Composite material processing", "quantity": 1},
-                    {"type": "Heat Treatment Oven", "model": "", "info": "Material hardening and tempering", "quantity": 1},
-                    {"type": "Ultrasonic Testing Station", "model": "", "info": "Non-destructive testing", "quantity": 1}
-                ],
-                "Electronics": [
-                    {"type": "PCB Assembly Line", "model": "", "info": "Circuit board assembly", "quantity": 1},
-                    {"type": "SMT Machine", "model": "", "info": "Surface mount technology placement", "quantity": 1},
-                    {"type": "Reflow Oven", "model": "", "info": "PCB component soldering", "quantity": 1},
-                    {"type": "Testing Station", "model": "", "info": "Electronic component testing", "quantity": 2},
-                    {"type": "3D Printer", "model": "", "info": "Prototype and enclosure printing", "quantity": 1},
-                    {"type": "Laser Marking System", "model": "", "info": "Component identification", "quantity": 1}
-                ],
-                "Food & Beverage": [
-                    {"type": "Filling Machine", "model": "", "info": "Product packaging and filling", "quantity": 1},
-                    {"type": "Conveyor System", "model": "", "info": "Product movement and sorting", "quantity": 2},
-                    {"type": "Pasteurization Unit", "model": "", "info": "Food safety processing", "quantity": 1},
-                    {"type": "Packaging Machine", "model": "", "info": "Product sealing and labeling", "quantity": 1},
-                    {"type": "Quality Control Lab", "model": "", "info": "Food safety testing", "quantity": 1},
-                    {"type": "Cleaning Station", "model": "", "info": "Equipment sanitization", "quantity": 1}
-                ],
-                "Pharmaceutical": [
-                    {"type": "Tablet Press", "model": "", "info": "Pharmaceutical tablet manufacturing", "quantity": 1},
-                    {"type": "Capsule Filling Machine", "model": "", "info": "Capsule production", "quantity": 1},
-                    {"type": "Coating Machine", "model": "", "info": "Tablet coating and finishing", "quantity": 1},
-                    {"type": "Blending Station", "model": "", "info": "Powder mixing and blending", "quantity": 1},
-                    {"type": "Quality Control Lab", "model": "", "info": "Product testing and validation", "quantity": 1},
-                    {"type": "Clean Room Equipment", "model": "", "info": "Sterile manufacturing environment", "quantity": 1}
-                ],
-                "General Manufacturing": [
-                    {"type": "CNC Lathe", "model": "", "info": "General purpose turning operations", "quantity": 2},
-                    {"type": "Milling Machine", "model": "", "info": "Versatile machining operations", "quantity": 1},
-                    {"type": "Drill Press", "model": "", "info": "Hole drilling and tapping", "quantity": 1},
-                    {"type": "Band Saw", "model": "", "info": "Material cutting and shaping", "quantity": 1},
-                    {"type": "Welding Station", "model": "", "info": "Metal joining and fabrication", "quantity": 1},
-                    {"type": "Quality Control Station", "model": "", "info": "Measurement and inspection", "quantity": 1}
-                ]
-            }
-            return fallback_suggestions.get(industry, fallback_suggestions["General Manufacturing"])
-        
-        headers = {
-            "Authorization": f"Bearer {st.secrets['OPENAI_API_KEY']}",
-            "Content-Type": "application/json"
-        }
-        
-        data = {
-            "model": "gpt-3.5-turbo",
-            "messages": [
-                {"role": "system", "content": "You are a manufacturing expert. Provide accurate, industry-specific machine suggestions."},
-                {"role": "user", "content": prompt}
-            ],
-            "temperature": 0.7,
-            "max_tokens": 500
-        }
-        
-        response = requests.post(api_url, headers=headers, json=data, timeout=10)
-        if response.status_code == 200:
-            result = response.json()
-            suggestions_text = result['choices'][0]['message']['content']
-            try:
-                # Parse JSON from response
-                suggestions = json.loads(suggestions_text)
-                return suggestions
-            except json.JSONDecodeError:
-                st.warning("AI response format issue, using fallback suggestions.")
-                return None
-        else:
-            st.warning(f"API Error: {response.status_code}. Using fallback suggestions.")
-            return None
-            
-    except Exception as e:
-        st.warning(f"Error getting suggestions: {str(e)}. Using fallback suggestions.")
-        return None
-
-# Initialize session state
-if 'machines' not in st.session_state:
-    st.session_state.machines = []
+PROFILE_PANEL = str(get_setting("PROFILE_PANEL", "false")).lower() == "true"
+PROFILE_LOG = str(get_setting("PROFILE_LOG", "false")).lower() == "true"
 
-# Celebration messages for machine additions
-celebration_messages = [
-    "🎉 Another machine joins the team!",
-    "🛠️ You're building a powerhouse!",
-    "🔧 That one's a beauty. Welcome aboard!",
-    "🚀 Let's keep the momentum rolling!",
-    "💪 That machine is ready to work!"
-]
+# Section timings for this rerun; see PROFILE_PANEL / PROFILE_LOG / PROFILE_METRICS_PORT
+start_rerun()
 
-if 'celebration_index' not in st.session_state:
-    st.session_state.celebration_index = 0
+# Custom CSS for modern, Figma-inspired design
+with profile_section("stylesheet"):
+    st.markdown(style_tag("onboarding.css"), unsafe_allow_html=True)
 
-def show_celebration():
-    """Show celebration message and balloons, then rotate to next message"""
-    message = celebration_messages[st.session_state.celebration_index]
-    st.success(message)
-    st.balloons()
-    # Rotate to next celebration message
-    st.session_state.celebration_index = (st.session_state.celebration_index + 1) % len(celebration_messages)
+# Set up session state, resuming the draft linked in the URL if there is one
+init_session()
 
 # Main header
 st.markdown('<h1 class="main-header">Guidewheel Onboarding</h1>', unsafe_allow_html=True)
 
-# Machine editing interface (outside the form)
-if st.session_state.machines and ('editing_machine' in st.session_state and st.session_state.editing_machine is not None):
-    edit_idx = st.session_state.editing_machine
-    machine = st.session_state.machines[edit_idx]
-    
+def machine_photo_heading():
+    st.markdown("""
+    <div class="modern-card">
+        <div class="card-header">📸 Machine Photo</div>
+        <div class="card-subtitle">Upload a photo to help us identify this machine</div>
+    </div>
+    """, unsafe_allow_html=True)
+
+def render_edit_panel(edit_idx):
+    """Edit panel for the machine at edit_idx; rendered inside the inventory fragment"""
     st.markdown("""
     <div class="modern-card fade-in">
         <div class="card-header">✏️ Edit Machine</div>
         <div class="card-subtitle">Update the details for this machine</div>
     </div>
     """, unsafe_allow_html=True)
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        machine["type"] = st.text_input(
-            "Machine Type",
-            value=machine["type"],
-            placeholder="e.g., Lathe, Milling Machine, CNC Router",
-            key=f"edit_type_{edit_idx}"
-        )
-        machine["quantity"] = st.number_input(
-            "Quantity",
-            min_value=1,
-            value=machine["quantity"],
-            key=f"edit_qty_{edit_idx}"
-        )
-    
-    with col2:
-        machine["model"] = st.text_input(
-            "Model",
-            value=machine["model"],
-            placeholder="e.g., Haas VF-2, Bridgeport Series I",
-            key=f"edit_model_{edit_idx}"
-        )
-        machine["info"] = st.text_input(
-            "Additional Info",
-            value=machine["info"],
-            placeholder="Serial number, year, modifications, etc.",
-            key=f"edit_info_{edit_idx}"
-        )
-    
-    # Machine photo upload
+    edit_machine_form(edit_idx, photo_heading=machine_photo_heading)
+
+# AI Suggestions Section
+@st.fragment
+@profile_section("ai_suggestions")
+def ai_suggestions_section():
+    """Industry picker and suggestion buttons; changing the industry only reruns this fragment"""
     st.markdown("""
-    <div class="modern-card">
-        <div class="card-header">📸 Machine Photo</div>
-        <div class="card-subtitle">Upload a photo to help us identify this machine</div>
+    <div class="modern-card fade-in">
+        <div class="card-header">🤖 AI-Powered Machine Suggestions</div>
+        <div class="card-subtitle">Select your industry and let AI suggest relevant machines for your facility</div>
     </div>
     """, unsafe_allow_html=True)
-    
-    machine["photo"] = st.file_uploader(
-        f"Upload photo of Machine {edit_idx + 1}",
-        type=["jpg", "jpeg", "png"],
-        key=f"machine_photo_{edit_idx}"
-    )
-    
-    col1, col2 = st.columns(2)
+
+    col1, col2, col3 = st.columns([2, 2, 1])
+
     with col1:
-        if st.button("✅ Save Changes", key=f"save_{edit_idx}", use_container_width=True):
-            show_celebration()
-            st.session_state.editing_machine = None
-            st.rerun()
+        industry = st.selectbox(
+            "Select your industry:",
+            INDUSTRIES,
+            help="Choose your industry for AI-powered machine suggestions"
+        )
+
+    # Streamed suggestions are previewed here, below the buttons, while the response is still arriving
+    streamed_machines = st.container()
+
+    def show_streamed_machine(machine):
+        """Add a streamed machine to the inventory and preview its card immediately"""
+        st.session_state.machines.append(Machine.from_dict(machine))
+        streamed_machines.markdown(f"""
+        <div class="machine-item fade-in">
+            <div class="machine-title">Machine {len(st.session_state.machines)}: {machine.get('type', '')}</div>
+            <div class="machine-details">{machine.get('info') or 'No additional info'}</div>
+        </div>
+        """, unsafe_allow_html=True)
+
     with col2:
-        if st.button("❌ Cancel", key=f"cancel_{edit_idx}", use_container_width=True):
-            st.session_state.editing_machine = None
+        if st.button("🤖 Get AI Suggestions", help="Get industry-specific machine suggestions powered by AI", use_container_width=True):
+            with st.spinner("🤖 AI is analyzing your industry..."):
+                # Suggestions replace the current list, so start empty and let streamed machines fill it
+                st.session_state.machines = MachineInventory()
+                suggestions = get_machine_suggestions(
+                    industry, on_machine=show_streamed_machine,
+                    on_error=lambda message: st.warning(f"{message}. Using fallback suggestions.")
+                )
+                if suggestions:
+                    st.session_state.machines = MachineInventory.from_dicts(suggestions)
+                    st.success(f"✨ AI magic activated! {len(suggestions)} {industry} machines added.")
+                    st.balloons()
+                    st.rerun()
+                else:
+                    # If AI fails, use fallback suggestions
+                    fallback = suggestions_for(industry)
+                    st.session_state.machines = MachineInventory.from_dicts(fallback)
+                    st.success(f"✨ Using industry-specific suggestions! {len(fallback)} {industry} machines added.")
+                    st.balloons()
+                    st.rerun()
+
+    with col3:
+        if st.button("➕ Add Machine Manually", key="add_machine_form", help="Add a new machine manually to your list.", use_container_width=True):
+            st.session_state.machines.append(Machine())
+            show_celebration()
             st.rerun()
 
-# AI Suggestions Section
-st.markdown("""
-<div class="modern-card fade-in">
-    <div class="card-header">🤖 AI-Powered Machine Suggestions</div>
-    <div class="card-subtitle">Select your industry and let AI suggest relevant machines for your facility</div>
-</div>
-""", unsafe_allow_html=True)
+ai_suggestions_section()
 
-col1, col2, col3 = st.columns([2, 2, 1])
+bulk_import_section()
 
-with col1:
-    industry = st.selectbox(
-        "Select your industry:",
-        ["General Manufacturing", "Automotive", "Aerospace", "Electronics", "Food & Beverage", "Pharmaceutical"],
-        help="Choose your industry for AI-powered machine suggestions"
-    )
-
-with col2:
-    if st.button("🤖 Get AI Suggestions", help="Get industry-specific machine suggestions powered by AI", use_container_width=True):
-        with st.spinner("🤖 AI is analyzing your industry..."):
-            suggestions = get_machine_suggestions(industry)
-            if suggestions:
-                st.session_state.machines = suggestions
-                st.success(f"✨ AI magic activated! {len(suggestions)} {industry} machines added.")
-                st.balloons()
-                st.rerun()
-            else:
-                # If AI fails, use fallback suggestions
-                fallback_suggestions = {
-                    "Automotive": [
-                        {"type": "CNC Lathe", "model": "", "info": "Precision turning for automotive parts", "quantity": 2},
-                        {"type": "Milling Machine", "model": "", "info": "Complex machining operations", "quantity": 1},
-                        {"type": "Welding Station", "model": "", "info": "Metal joining and fabrication", "quantity": 2},
-                        {"type": "Press Brake", "model": "", "info": "Sheet metal bending", "quantity": 1},
-                        {"type": "Laser Cutter", "model": "", "info": "Precision cutting of metal sheets", "quantity": 1},
-                        {"type": "Quality Control Station", "model": "", "info": "Measurement and inspection", "quantity": 1}
-                    ],
-                    "Aerospace": [
-                        {"type": "5-Axis CNC Mill", "model": "", "info": "Complex aerospace component machining", "quantity": 1},
-                        {"type": "EDM Machine", "model": "", "info": "Precision electrical discharge machining", "quantity": 1},
-                        {"type": "Coordinate Measuring Machine", "model": "", "info": "High-precision measurement", "quantity": 1},
-                        {"type": "Composite Layup Station", "model": "", "info": "Composite material processing", "quantity": 1},
-                        {"type": "Heat Treatment Oven", "model": "", "info": "Material hardening and tempering", "quantity": 1},
-                        {"type": "Ultrasonic Testing Station", "model": "", "info": "Non-destructive testing", "quantity": 1}
-                    ],
-                    "Electronics": [
-                        {"type": "PCB Assembly Line", "model": "", "info": "Circuit board assembly", "quantity": 1},
-                        {"type": "SMT Machine", "model": "", "info": "Surface mount technology placement", "quantity": 1},
-                        {"type": "Reflow Oven", "model": "", "info": "PCB component soldering", "quantity": 1},
-                        {"type": "Testing Station", "model": "", "info": "Electronic component testing", "quantity": 2},
-                        {"type": "3D Printer", "model": "", "info": "Prototype and enclosure printing", "quantity": 1},
-                        {"type": "Laser Marking System", "model": "", "info": "Component identification", "quantity": 1}
-                    ],
-                    "Food & Beverage": [
-                        {"type": "Filling Machine", "model": "", "info": "Product packaging and filling", "quantity": 1},
-                        {"type": "Conveyor System", "model": "", "info": "Product movement and sorting", "quantity": 2},
-                        {"type": "Pasteurization Unit", "model": "", "info": "Food safety processing", "quantity": 1},
-                        {"type": "Packaging Machine", "model": "", "info": "Product sealing and labeling", "quantity": 1},
-                        {"type": "Quality Control Lab", "model": "", "info": "Food safety testing", "quantity": 1},
-                        {"type": "Cleaning Station", "model": "", "info": "Equipment sanitization", "quantity": 1}
-                    ],
-                    "Pharmaceutical": [
-                        {"type": "Tablet Press", "model": "", "info": "Pharmaceutical tablet manufacturing", "quantity": 1},
-                        {"type": "Capsule Filling Machine", "model": "", "info": "Capsule production", "quantity": 1},
-                        {"type": "Coating Machine", "model": "", "info": "Tablet coating and finishing", "quantity": 1},
-                        {"type": "Blending Station", "model": "", "info": "Powder mixing and blending", "quantity": 1},
-                        {"type": "Quality Control Lab", "model": "", "info": "Product testing and validation", "quantity": 1},
-                        {"type": "Clean Room Equipment", "model": "", "info": "Sterile manufacturing environment", "quantity": 1}
-                    ],
-                    "General Manufacturing": [
-                        {"type": "CNC Lathe", "model": "", "info": "General purpose turning operations", "quantity": 2},
-                        {"type": "Milling Machine", "model": "", "info": "Versatile machining operations", "quantity": 1},
-                        {"type": "Drill Press", "model": "", "info": "Hole drilling and tapping", "quantity": 1},
-                        {"type": "Band Saw", "model": "", "info": "Material cutting and shaping", "quantity": 1},
-                        {"type": "Welding Station", "model": "", "info": "Metal joining and fabrication", "quantity": 1},
-                        {"type": "Quality Control Station", "model": "", "info": "Measurement and inspection", "quantity": 1}
-                    ]
-                }
-                fallback = fallback_suggestions.get(industry, fallback_suggestions["General Manufacturing"])
-                st.session_state.machines = fallback
-                st.success(f"✨ Using industry-specific suggestions! {len(fallback)} {industry} machines added.")
-                st.balloons()
-                st.rerun()
+if 'pending_suggestions' in st.session_state:
+    backfill_pending_suggestions()
 
-with col3:
-    if st.button("➕ Add Machine Manually", key="add_machine_form", help="Add a new machine manually to your list.", use_container_width=True):
-        st.session_state.machines.append({"type": "", "model": "", "info": "", "quantity": 1})
-        show_celebration()
-        st.rerun()
+render_sidebar_stats()
 
 # Machine Inventory Section
-st.markdown("""
-<div class="modern-card fade-in">
-    <div class="card-header">🔧 Machine Inventory</div>
-    <div class="card-subtitle">Review and manage your machine list</div>
-</div>
-""", unsafe_allow_html=True)
+@st.fragment
+@profile_section("inventory")
+def machine_inventory():
+    """Edit panel and machine list; Edit/Remove/Save/Cancel only rerun this fragment"""
+    if st.session_state.pop('celebrate', False):
+        show_celebration()
+    edit_idx = st.session_state.machines.position(st.session_state.get('editing_machine'))
+    if edit_idx is not None:
+        render_edit_panel(edit_idx)
+    
+    st.markdown(f"""
+    <div class="modern-card fade-in">
+        <div class="card-header">🔧 Machine Inventory <span class="inventory-badge">{inventory_badge()}</span></div>
+        <div class="card-subtitle">Review and manage your machine list</div>
+    </div>
+    """, unsafe_allow_html=True)
 
-if st.session_state.machines:
-    for i, machine in enumerate(st.session_state.machines):
-        st.markdown(f"""
-        <div class="machine-item fade-in">
-            <div class="machine-title">Machine {i+1}: {machine['type']}</div>
-            <div class="machine-details">
-                Model: {machine['model'] if machine['model'] else 'Not specified'} | 
-                Quantity: {machine['quantity']} | 
-                {machine['info'] if machine['info'] else 'No additional info'}
-                {' 📸' if machine.get('photo') else ''}
+    if st.session_state.machines:
+        for i, machine in visible_machines():
+            machine_id = st.session_state.machines.id_at(i)
+            st.markdown(f"""
+            <div class="machine-item fade-in">
+                <div class="machine-title">Machine {i+1}: {machine.type}</div>
+                <div class="machine-details">
+                    Model: {machine.model if machine.model else 'Not specified'} | 
+                    Quantity: {machine.quantity} | 
+                    {machine.info if machine.info else 'No additional info'}
+                    {' 📸' if machine.photo else ''}
+                </div>
             </div>
+            """, unsafe_allow_html=True)
+            
+            col1, col2 = st.columns([1, 1])
+            with col1:
+                st.button(f"Edit {i+1}", key=f"form_edit_{machine_id}", on_click=start_editing, args=(machine_id,), use_container_width=True)
+            with col2:
+                st.button(f"Remove {i+1}", key=f"form_remove_{machine_id}", on_click=remove_machine, args=(machine_id,), use_container_width=True)
+    else:
+        st.markdown("""
+        <div class="info-message">
+            💡 Start by adding machines using AI suggestions or manually. This will help us understand your facility better.
         </div>
         """, unsafe_allow_html=True)
-        
-        col1, col2 = st.columns([1, 1])
-        with col1:
-            if st.button(f"Edit {i+1}", key=f"form_edit_{i}", use_container_width=True):
-                st.session_state.editing_machine = i
-                st.rerun()
-        with col2:
-            if st.button(f"Remove {i+1}", key=f"form_remove_{i}", use_container_width=True):
-                st.session_state.machines.pop(i)
-                st.rerun()
-else:
-    st.markdown("""
-    <div class="info-message">
-        💡 Start by adding machines using AI suggestions or manually. This will help us understand your facility better.
-    </div>
-    """, unsafe_allow_html=True)
-
-# Main Form
-with st.form(key="onboarding_form"):
-    st.markdown("""
-    <div class="modern-card fade-in">
-        <div class="card-header">📝 Additional Information</div>
-        <div class="card-subtitle">Help us understand your setup better</div>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    notes = st.text_area(
-        "Optional notes:",
-        placeholder="Any additional information about your facility, processes, or specific requirements...",
-        height=100
-    )
     
+    # Edits and removals may have attached or dropped photos
+    sync_photo_refs()
+    autosave_draft()
+
+machine_inventory()
+
+# Photo uploads live outside the form so each file starts processing as soon as it arrives
+@st.fragment
+@profile_section("photo_uploads")
+def photo_uploads_section():
+    """Facility photo and layout sketch uploaders; uploads only rerun this fragment and are thumbnailed in the background"""
     st.markdown("""
     <div class="modern-card">
         <div class="card-header">📸 Facility Photos</div>
@@ -666,6 +192,7 @@ with st.form(key="onboarding_form"):
         "Upload photos (whiteboards, factory layout, safety equipment, etc.):",
         type=["jpg", "jpeg", "png"],
         accept_multiple_files=True,
+        key="other_photos",
         help="Upload any relevant photos: whiteboard diagrams, factory layouts, safety equipment, certifications, or other important documentation."
     )
     
@@ -679,6 +206,7 @@ with st.form(key="onboarding_form"):
     layout_option = st.radio(
         "Layout sharing method:",
         ["I have existing sketches to upload", "Skip for now"],
+        key="layout_option",
         help="Choose whether you want to upload existing sketches/diagrams or skip for now."
     )
     
@@ -688,9 +216,29 @@ with st.form(key="onboarding_form"):
             "Upload your line layout sketches/diagrams:",
             type=["jpg", "jpeg", "png"],
             accept_multiple_files=True,
+            key="layout_sketches",
             help="Upload any existing sketches, diagrams, or drawings of your production line layout."
         )
     
+    collect_photo_uploads(other_photos, layout_sketches)
+
+photo_uploads_section()
+
+# Main Form
+with profile_section("form"), st.form(key="onboarding_form"):
+    st.markdown("""
+    <div class="modern-card fade-in">
+        <div class="card-header">📝 Additional Information</div>
+        <div class="card-subtitle">Help us understand your setup better</div>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    notes = st.text_area(
+        "Optional notes:",
+        placeholder="Any additional information about your facility, processes, or specific requirements...",
+        height=100
+    )
+    
     st.markdown("""
     <div class="modern-card">
         <div class="card-header">👤 Contact Information</div>
@@ -720,122 +268,144 @@ with st.form(key="onboarding_form"):
 
 # Success Section
 if submit:
-    st.markdown("""
-    <div class="success-message fade-in">
-        🎉 Onboarding submitted successfully! Welcome to Guidewheel!
-    </div>
-    """, unsafe_allow_html=True)
-    st.balloons()
-    
-    st.markdown("""
-    <div class="modern-card fade-in">
-        <div class="card-header">📋 Your Setup Summary</div>
-        <div class="card-subtitle">Here's what we'll be working with</div>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # Layout option summary
-    layout_summary = layout_option
-    if layout_option == "I have existing sketches to upload" and layout_sketches:
-        layout_summary += f" ({len(layout_sketches)} files)"
-    
-    col1, col2 = st.columns(2)
+    with profile_section("summary"):
+        # Uploads were queued by photo_uploads_section, so their thumbnails are usually ready by now
+        layout_option = st.session_state.layout_option
+        other_photos = st.session_state.other_photo_keys
+        layout_sketches = st.session_state.layout_sketch_keys
+    
+        submission_id = submit_onboarding(
+            name, email, {"name": teammate_name, "email": teammate_email} if invite_teammate else None, notes
+        )
     
-    with col1:
         st.markdown("""
-        <div class="modern-card">
-            <div class="card-header">👤 Contact Information</div>
+        <div class="success-message fade-in">
+            🎉 Onboarding submitted successfully! Welcome to Guidewheel!
         </div>
         """, unsafe_allow_html=True)
-        st.write(f"**Name:** {name}")
-        st.write(f"**Email:** {email}")
-        if invite_teammate:
-            st.write(f"**Teammate:** {teammate_name} ({teammate_email})")
+        st.caption(f"Submission reference: {submission_id}")
+        st.balloons()
     
-    with col2:
         st.markdown("""
-        <div class="modern-card">
-            <div class="card-header">🔧 Machine Inventory</div>
+        <div class="modern-card fade-in">
+            <div class="card-header">📋 Your Setup Summary</div>
+            <div class="card-subtitle">Here's what we'll be working with</div>
         </div>
         """, unsafe_allow_html=True)
-        for i, machine in enumerate(st.session_state.machines):
-            machine_info = f"• {machine['type']}"
-            if machine['model']:
-                machine_info += f" ({machine['model']})"
-            machine_info += f": {machine['quantity']}"
-            if machine['info']:
-                machine_info += f" - {machine['info']}"
-            st.write(machine_info)
     
-    if notes:
-        st.markdown("""
-        <div class="modern-card">
-            <div class="card-header">📝 Additional Notes</div>
-        </div>
-        """, unsafe_allow_html=True)
-        st.write(notes)
+        # Layout option summary
+        layout_summary = layout_option
+        if layout_option == "I have existing sketches to upload" and layout_sketches:
+            layout_summary += f" ({len(layout_sketches)} files)"
     
-    st.markdown("""
-    <div class="modern-card">
-        <div class="card-header">🎨 Line Layout</div>
-    </div>
-    """, unsafe_allow_html=True)
-    st.write(layout_summary)
+        col1, col2 = st.columns(2)
     
-    # Count photos
-    machine_photo_count = sum(1 for machine in st.session_state.machines if machine.get('photo'))
-    other_photo_count = (len(other_photos) if other_photos else 0) + \
-                       (len(layout_sketches) if layout_sketches else 0)
+        with col1:
+            st.markdown("""
+            <div class="modern-card">
+                <div class="card-header">👤 Contact Information</div>
+            </div>
+            """, unsafe_allow_html=True)
+            st.write(f"**Name:** {name}")
+            st.write(f"**Email:** {email}")
+            if invite_teammate:
+                st.write(f"**Teammate:** {teammate_name} ({teammate_email})")
     
-    st.markdown("""
-    <div class="modern-card">
-        <div class="card-header">📸 Uploaded Assets</div>
-    </div>
-    """, unsafe_allow_html=True)
-    st.write(f"• Machine photos: {machine_photo_count}")
-    st.write(f"• Other photos: {other_photo_count}")
-    st.write(f"• Total photos: {machine_photo_count + other_photo_count}")
+        with col2:
+            st.markdown(f"""
+            <div class="modern-card">
+                <div class="card-header">🔧 Machine Inventory ({st.session_state.machines.total_quantity()} total)</div>
+            </div>
+            """, unsafe_allow_html=True)
+            for i, machine in enumerate(st.session_state.machines):
+                machine_info = f"• {machine.type}"
+                if machine.model:
+                    machine_info += f" ({machine.model})"
+                machine_info += f": {machine.quantity}"
+                if machine.info:
+                    machine_info += f" - {machine.info}"
+                st.write(machine_info)
+            st.caption(inventory_badge())
+    
+        if notes:
+            st.markdown("""
+            <div class="modern-card">
+                <div class="card-header">📝 Additional Notes</div>
+            </div>
+            """, unsafe_allow_html=True)
+            st.write(notes)
     
-    st.markdown("""
-    <div class="modern-card fade-in">
-        <div class="card-header">🤝 Meet Your Guidewheel Buddy</div>
-        <div class="card-subtitle">Alex will reach out to guide your setup and answer any questions</div>
-    </div>
-    """, unsafe_allow_html=True)
+        st.markdown("""
+        <div class="modern-card">
+            <div class="card-header">🎨 Line Layout</div>
+        </div>
+        """, unsafe_allow_html=True)
+        st.write(layout_summary)
     
-    st.markdown("""
-    <div style="text-align: center; padding: 2rem; background: linear-gradient(135deg, #f8fafc 0%, #f1f5f9 100%); border-radius: 12px; margin: 2rem 0;">
-        <h3 style="color: #1a1a1a; margin-bottom: 1rem;">🎉 Welcome to the Guidewheel family!</h3>
-        <p style="color: #6b7280; font-size: 1.1rem;">We're excited to help you get started with your manufacturing journey.</p>
-    </div>
-    """, unsafe_allow_html=True)
+        # Count photos
+        machine_photo_count = st.session_state.machines.photo_count()
+        other_photo_count = (len(other_photos) if other_photos else 0) + \
+                           (len(layout_sketches) if layout_sketches else 0)
     
-    # Display uploaded photos
-    machine_photos_to_show = [machine for machine in st.session_state.machines if machine.get('photo')]
-    if machine_photos_to_show:
         st.markdown("""
         <div class="modern-card">
-            <div class="card-header">📸 Machine Photos</div>
+            <div class="card-header">📸 Uploaded Assets</div>
         </div>
         """, unsafe_allow_html=True)
-        for i, machine in enumerate(machine_photos_to_show):
-            st.image(machine['photo'], caption=f"Machine {i+1}: {machine['type']}", width=300)
+        st.write(f"• Machine photos: {machine_photo_count}")
+        st.write(f"• Other photos: {other_photo_count}")
+        st.write(f"• Total photos: {machine_photo_count + other_photo_count}")
     
-    if other_photos:
         st.markdown("""
-        <div class="modern-card">
-            <div class="card-header">📸 Facility Photos</div>
+        <div class="modern-card fade-in">
+            <div class="card-header">🤝 Meet Your Guidewheel Buddy</div>
+            <div class="card-subtitle">Alex will reach out to guide your setup and answer any questions</div>
         </div>
         """, unsafe_allow_html=True)
-        for i, photo in enumerate(other_photos):
-            st.image(photo, caption=f"Photo {i+1}", width=300)
     
-    if layout_sketches:
         st.markdown("""
-        <div class="modern-card">
-            <div class="card-header">🎨 Line Layout Sketches</div>
+        <div style="text-align: center; padding: 2rem; background: linear-gradient(135deg, #f8fafc 0%, #f1f5f9 100%); border-radius: 12px; margin: 2rem 0;">
+            <h3 style="color: #1a1a1a; margin-bottom: 1rem;">🎉 Welcome to the Guidewheel family!</h3>
+            <p style="color: #6b7280; font-size: 1.1rem;">We're excited to help you get started with your manufacturing journey.</p>
         </div>
         """, unsafe_allow_html=True)
-        for i, sketch in enumerate(layout_sketches):
-            st.image(sketch, caption=f"Layout Sketch {i+1}", width=300)
-
+    
+        # Display uploaded photos
+        machine_photos_to_show = [machine for machine in st.session_state.machines if machine.photo]
+        if machine_photos_to_show:
+            st.markdown("""
+            <div class="modern-card">
+                <div class="card-header">📸 Machine Photos</div>
+            </div>
+            """, unsafe_allow_html=True)
+            for i, machine in enumerate(machine_photos_to_show):
+                thumbnail = photo_thumbnail(machine.photo)
+                if thumbnail:
+                    st.image(thumbnail, caption=f"Machine {i+1}: {machine.type}", width=300)
+    
+        if other_photos:
+            st.markdown("""
+            <div class="modern-card">
+                <div class="card-header">📸 Facility Photos</div>
+            </div>
+            """, unsafe_allow_html=True)
+            for i, photo in enumerate(other_photos):
+                thumbnail = photo_thumbnail(photo)
+                if thumbnail:
+                    st.image(thumbnail, caption=f"Photo {i+1}", width=300)
+    
+        if layout_sketches:
+            st.markdown("""
+            <div class="modern-card">
+                <div class="card-header">🎨 Line Layout Sketches</div>
+            </div>
+            """, unsafe_allow_html=True)
+            for i, sketch in enumerate(layout_sketches):
+                thumbnail = photo_thumbnail(sketch)
+                if thumbnail:
+                    st.image(thumbnail, caption=f"Layout Sketch {i+1}", width=300)
+
+# Per-section timings: one log line per rerun with PROFILE_LOG, a sidebar table with PROFILE_PANEL
+finish_rerun(log=PROFILE_LOG)
+if PROFILE_PANEL:
+    render_profile_panel()
@@ -1,113 +1,27 @@
 import streamlit as st
-import requests
-import json
-
-# Load custom CSS
-with open('style.css') as f:
-    st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
-
-# LLM API configuration
-def get_machine_suggestions(industry):
-    """Get machine suggestions from LLM based on industry"""
-    try:
-        # Using a free LLM API (you can replace with OpenAI, Anthropic, etc.)
-        api_url = "https://api.openai.com/v1/chat/completions"
-        
-        prompt = f"""Based on the {industry} industry, suggest 6-8 common machines that would be found in a typical manufacturing facility. 
-        For each machine, provide:
-        - Machine type (e.g., Lathe, Milling Machine, CNC Router)
-        - Typical quantity (1-3)
-        - Brief description of its use in this industry
-        
-        Return as JSON array with format:
-        [{{"type": "Machine Type", "model": "", "info": "Brief description", "quantity": 1}}]
-        
-        Focus on machines that are essential for {industry} manufacturing."""
-        
-        # For demo purposes, using a fallback if API is not configured
-        if not st.secrets.get("OPENAI_API_KEY"):
-            # Fallback suggestions based on industry
-            fallback_suggestions = {
-                "Automotive": [
-                    {"type": "CNC Lathe", "model": "", "info": "Precision turning for automotive parts", "quantity": 2},
-                    {"type": "Milling Machine", "model": "", "info": "Complex machining operations", "quantity": 1},
-                    {"type": "Welding Station", "model": "", "info": "Metal joining and fabrication", "quantity": 2},
-                    {"type": "Press Brake", "model": "", "info": "Sheet metal bending", "quantity": 1},
-                    {"type": "Laser Cutter", "model": "", "info": "Precision cutting of metal sheets", "quantity": 1},
-                    {"type": "Quality Control Station", "model": "", "info": "Measurement and inspection", "quantity": 1}
-                ],
-                "Aerospace": [
-                    {"type": "5-Axis CNC Mill", "model": "", "info": "Complex aerospace component machining", "quantity": 1},
-                    {"type": "EDM Machine", "model": "", "info": "Precision electrical discharge machining", "quantity": 1},
-                    {"type": "Coordinate Measuring Machine", "model": "", "info": "High-precision measurement", "quantity": 1},
-                    {"type": "Composite Layup Station", "model": "", "info": "Composite material processing", "quantity": 1},
-                    {"type": "Heat Treatment Oven", "model": "", "info": "Material hardening and tempering", "quantity": 1},
-                    {"type": "Ultrasonic Testing Station", "model": "", "info": "Non-destructive testing", "quantity": 1}
-                ],
-                "Electronics": [
-                    {"type": "PCB Assembly Line", "model": "", "info": "Circuit board assembly", "quantity": 1},
-                    {"type": "SMT Machine", "model": "", "info": "Surface mount technology placement", "quantity": 1},
-                    {"type": "Reflow Oven", "model": "", "info": "PCB component soldering", "quantity": 1},
-                    {"type": "Testing Station", "model": "", "info": "Electronic component testing", "quantity": 2},
-                    {"type": "3D Printer", "model": "", "info": "Prototype and enclosure printing", "quantity": 1},
-                    {"type": "Laser Marking System", "model": "", "info": "Component identification", "quantity": 1}
-                ],
-                "Food & Beverage": [
-                    {"type": "Filling Machine", "model": "", "info": "Product packaging and filling", "quantity": 1},
-                    {"type": "Conveyor System", "model": "", "info": "Product movement and sorting", "quantity": 2},
-                    {"type": "Pasteurization Unit", "model": "", "info": "Food safety processing", "quantity": 1},
-                    {"type": "Packaging Machine", "model": "", "info": "Product sealing and labeling", "quantity": 1},
-                    {"type": "Quality Control Lab", "model": "", "info": "Food safety testing", "quantity": 1},
-                    {"type": "Cleaning Station", "model": "", "info": "Equipment sanitization", "quantity": 1}
-                ],
-                "Pharmaceutical": [
-                    {"type": "Tablet Press", "model": "", "info": "Pharmaceutical tablet manufacturing", "quantity": 1},
-                    {"type": "Capsule Filling Machine", "model": "", "info": "Capsule production", "quantity": 1},
-                    {"type": "Coating Machine", "model": "", "info": "Tablet coating and finishing", "quantity": 1},
-                    {"type": "Blending Station", "model": "", "info": "Powder mixing and blending", "quantity": 1},
-                    {"type": "Quality Control Lab", "model": "", "info": "Product testing and validation", "quantity": 1},
-                    {"type": "Clean Room Equipment", "model": "", "info": "Sterile manufacturing environment", "quantity": 1}
-                ],
-                "General Manufacturing": [
-                    {"type": "CNC Lathe", "model": "", "info": "General purpose turning operations", "quantity": 2},
-                    {"type": "Milling Machine", "model": "", "info": "Versatile machining operations", "quantity": 1},
-                    {"type": "Drill Press", "model": "", "info": "Hole drilling and tapping", "quantity": 1},
-                    {"type": "Band Saw", "model": "", "info": "Material cutting and shaping", "quantity": 1},
-                    {"type": "Welding Station", "model": "", "info": "Metal joining and fabrication", "quantity": 1},
-                    {"type": "Quality Control Station", "model": "", "info": "Measurement and inspection", "quantity": 1}
-                ]
-            }
-            return fallback_suggestions.get(industry, fallback_suggestions["General Manufacturing"])
-        
-        headers = {
-            "Authorization": f"Bearer {st.secrets['OPENAI_API_KEY']}",
-            "Content-Type": "application/json"
-        }
-        
-        data = {
-            "model": "gpt-3.5-turbo",
-            "messages": [
-                {"role": "system", "content": "You are a manufacturing expert. Provide accurate, industry-specific machine suggestions."},
-                {"role": "user", "content": prompt}
-            ],
-            "temperature": 0.7,
-            "max_tokens": 500
-        }
-        
-        response = requests.post(api_url, headers=headers, json=data)
-        if response.status_code == 200:
-            result = response.json()
-            suggestions_text = result['choices'][0]['message']['content']
-            # Parse JSON from response
-            suggestions = json.loads(suggestions_text)
-            return suggestions
-        else:
-            st.error(f"API Error: {response.status_code}")
-            return None
-            
-    except Exception as e:
-        st.error(f"Error getting suggestions: {str(e)}")
-        return None
+
+from config import get_setting
+from inventory import MAX_QUANTITY, Machine, MachineInventory
+from machine_catalog import INDUSTRIES
+from onboarding_session import (
+    autocomplete_options, autosave_draft, backfill_pending_suggestions, bulk_import_section,
+    collect_photo_uploads, edit_machine_form, get_autocomplete, get_machine_suggestions,
+    get_model_reference, init_session, inventory_badge, photo_thumbnail, queue_uploads,
+    remove_machine, render_sidebar_stats, show_celebration, start_editing, submit_onboarding,
+    sync_photo_refs, visible_machines
+)
+from section_profiler import finish_rerun, profile_section, render_profile_panel, start_rerun
+from stylesheet import style_tag
+
+PROFILE_PANEL = str(get_setting("PROFILE_PANEL", "false")).lower() == "true"
+PROFILE_LOG = str(get_setting("PROFILE_LOG", "false")).lower() == "true"
+
+# Section timings for this rerun; see PROFILE_PANEL / PROFILE_LOG / PROFILE_METRICS_PORT
+start_rerun()
+
+# Load custom CSS (read and minified once per process)
+with profile_section("stylesheet"):
+    st.markdown(style_tag("style.css"), unsafe_allow_html=True)
 
 # Enterprise Header
 st.markdown("""
@@ -119,111 +33,30 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-# Initialize session state for machines if not exists
-if 'machines' not in st.session_state:
-    st.session_state.machines = []
-
-# Initialize total machine count if not exists
-if 'total_machines' not in st.session_state:
-    st.session_state.total_machines = 0
+# Set up session state, resuming the draft linked in the URL if there is one
+init_session()
 
 # Initialize manual form state
 if 'show_manual_form' not in st.session_state:
     st.session_state.show_manual_form = False
 
-# Celebration messages for machine additions
-celebration_messages = [
-    "🎉 Another machine joins the team!",
-    "🛠️ You're building a powerhouse!",
-    "🔧 That one's a beauty. Welcome aboard!",
-    "🚀 Let's keep the momentum rolling!",
-    "💪 That machine is ready to work!"
-]
-
-if 'celebration_index' not in st.session_state:
-    st.session_state.celebration_index = 0
-
-def show_celebration():
-    """Show celebration message and balloons, then rotate to next message"""
-    message = celebration_messages[st.session_state.celebration_index]
-    st.success(message)
-    st.balloons()
-    # Rotate to next celebration message
-    st.session_state.celebration_index = (st.session_state.celebration_index + 1) % len(celebration_messages)
-
-# Function to update total machine count
-def update_total_machines():
-    """Calculate and update the total number of machines"""
-    total = sum(machine.get('quantity', 1) for machine in st.session_state.machines)
-    st.session_state.total_machines = total
-
-# Update total machines count on app load
-if 'total_machines' not in st.session_state:
-    update_total_machines()
-
-# Machine editing interface (outside the form)
-if st.session_state.machines and ('editing_machine' in st.session_state and st.session_state.editing_machine is not None):
-    edit_idx = st.session_state.editing_machine
-    machine = st.session_state.machines[edit_idx]
-    
+def render_edit_panel(edit_idx):
+    """Edit panel for the machine at edit_idx; rendered inside the inventory fragment"""
     st.markdown("""
     <div style="background: white; border: 1px solid #e1e5e9; border-radius: 12px; padding: 2rem; margin: 1rem 0; box-shadow: 0 2px 8px rgba(0,0,0,0.08);">
         <h3 style="color: #502DD5; margin: 0 0 1.5rem 0; font-weight: 500;">Edit Machine Configuration</h3>
     """, unsafe_allow_html=True)
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        machine["type"] = st.text_input(
-            "Machine Type",
-            value=machine["type"],
-            placeholder="e.g., Lathe, Milling Machine, CNC Router",
-            key=f"edit_type_{edit_idx}"
-        )
-        machine["quantity"] = st.number_input(
-            "Quantity",
-            min_value=1,
-            value=machine["quantity"],
-            key=f"edit_qty_{edit_idx}"
-        )
-    
-    with col2:
-        machine["model"] = st.text_input(
-            "Model",
-            value=machine["model"],
-            placeholder="e.g., Haas VF-2, Bridgeport Series I",
-            key=f"edit_model_{edit_idx}"
-        )
-        machine["info"] = st.text_input(
-            "Additional Info",
-            value=machine["info"],
-            placeholder="Serial number, year, modifications, etc.",
-            key=f"edit_info_{edit_idx}"
-        )
-    
-    # Machine photo upload
-    st.write("**Machine Photo:**")
-    machine["photo"] = st.file_uploader(
-        f"Upload photo of Machine {edit_idx + 1}",
-        type=["jpg", "jpeg", "png"],
-        key=f"machine_photo_{edit_idx}"
-    )
-    
-    col1, col2 = st.columns(2)
-    with col1:
-        if st.button("✅ Save Changes", key=f"save_{edit_idx}", use_container_width=True):
-            show_celebration()
-            st.session_state.editing_machine = None
-            st.rerun()
-    with col2:
-        if st.button("❌ Cancel", key=f"cancel_{edit_idx}", use_container_width=True):
-            st.session_state.editing_machine = None
-            st.rerun()
-    
+    edit_machine_form(edit_idx, photo_heading=lambda: st.write("**Machine Photo:**"))
     st.markdown("</div>", unsafe_allow_html=True)
 
 # Manual Machine Addition Form
-if st.session_state.show_manual_form:
+@st.fragment
+@profile_section("manual_form")
+def manual_machine_form():
+    """Add-machine form; typing only reruns this fragment, saving reruns the app to refresh the inventory"""
+    if not st.session_state.show_manual_form:
+        return
+    
     st.markdown("""
     <div style="background: white; border: 1px solid #e1e5e9; border-radius: 12px; padding: 2rem; margin: 2rem 0; box-shadow: 0 2px 8px rgba(0,0,0,0.08);">
         <div style="display: flex; align-items: center; margin-bottom: 1.5rem;">
@@ -236,34 +69,50 @@ if st.session_state.show_manual_form:
             </div>
         </div>
     """, unsafe_allow_html=True)
-    
+
+    type_index, model_index = get_autocomplete()
     col1, col2 = st.columns(2)
-    
+
     with col1:
-        machine_type = st.text_input(
+        machine_type = type_index.canonical(st.selectbox(
             "Machine Type *",
+            autocomplete_options(type_index, ""),
+            index=None,
             placeholder="e.g., CNC Lathe, Milling Machine, Welding Station",
-            help="Enter the type or name of the machine"
-        )
+            accept_new_options=True,
+            help="Pick or type the type or name of the machine"
+        ) or "")
         quantity = st.number_input(
             "Quantity *",
             min_value=1,
+            max_value=MAX_QUANTITY,
             value=1,
             help="How many of this machine do you have?"
         )
-    
+
     with col2:
-        model = st.text_input(
+        model = model_index.canonical(st.selectbox(
             "Model",
+            autocomplete_options(model_index, ""),
+            index=None,
             placeholder="e.g., Haas VF-2, Bridgeport Series I",
-            help="Optional: Enter the specific model number"
-        )
+            accept_new_options=True,
+            help="Optional: Pick or type the specific model number"
+        ) or "")
         info = st.text_input(
             "Additional Info",
             placeholder="e.g., Serial number, year, modifications",
             help="Optional: Any additional information about this machine"
         )
-    
+
+    # A known model fills in the rest, so picking "Haas VF-2" alone is enough
+    record = get_model_reference().lookup(model) if model else None
+    if record is not None:
+        model = record.name
+        machine_type = machine_type or record.type
+        info = info or record.specs()
+        st.caption(f"📘 {record.name}: {record.summary()}")
+
     # Machine photo upload
     st.write("**Machine Photo (Optional):**")
     machine_photo = st.file_uploader(
@@ -271,48 +120,50 @@ if st.session_state.show_manual_form:
         type=["jpg", "jpeg", "png"],
         help="Upload a photo to help us understand your setup better"
     )
-    
+
     col1, col2, col3 = st.columns([1, 1, 1])
     with col1:
         if st.button("✅ Save Machine", use_container_width=True, type="primary"):
             if machine_type.strip():  # Check if machine type is provided
-                new_machine = {
-                    "type": machine_type.strip(),
-                    "model": model.strip(),
-                    "info": info.strip(),
-                    "quantity": quantity,
-                    "photo": machine_photo
-                }
+                new_machine = Machine(
+                    type=machine_type.strip(),
+                    model=model.strip(),
+                    info=info.strip(),
+                    quantity=quantity,
+                    photo=queue_uploads([machine_photo])[0] if machine_photo else None
+                )
                 st.session_state.machines.append(new_machine)
                 st.session_state.show_manual_form = False
                 show_celebration()
                 st.rerun()
             else:
                 st.error("❌ Please enter a machine type")
-    
+
     with col2:
         if st.button("➕ Add Another", use_container_width=True):
             if machine_type.strip():
-                new_machine = {
-                    "type": machine_type.strip(),
-                    "model": model.strip(),
-                    "info": info.strip(),
-                    "quantity": quantity,
-                    "photo": machine_photo
-                }
+                new_machine = Machine(
+                    type=machine_type.strip(),
+                    model=model.strip(),
+                    info=info.strip(),
+                    quantity=quantity,
+                    photo=queue_uploads([machine_photo])[0] if machine_photo else None
+                )
                 st.session_state.machines.append(new_machine)
                 show_celebration()
                 st.rerun()
             else:
                 st.error("❌ Please enter a machine type")
-    
+
     with col3:
         if st.button("❌ Cancel", use_container_width=True):
             st.session_state.show_manual_form = False
             st.rerun()
-    
+
     st.markdown("</div>", unsafe_allow_html=True)
 
+manual_machine_form()
+
 # Enterprise Machine Setup Section
 st.markdown("""
 <div style="background: white; border: 1px solid #e1e5e9; border-radius: 12px; padding: 2rem; margin: 2rem 0; box-shadow: 0 2px 8px rgba(0,0,0,0.08);">
@@ -329,122 +180,149 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # AI Suggestions Card
-st.markdown("""
-<div style="background: linear-gradient(135deg, #f8f9ff 0%, #ffffff 100%); border: 1px solid #e1e5e9; border-radius: 12px; padding: 2rem; margin: 1rem 0; box-shadow: 0 2px 8px rgba(0,0,0,0.08);">
-    <div style="display: flex; align-items: center; margin-bottom: 1.5rem;">
-        <div style="background: linear-gradient(135deg, #502DD5, #32B3F1); width: 36px; height: 36px; border-radius: 8px; display: flex; align-items: center; justify-content: center; margin-right: 1rem;">
-            <span style="color: white; font-size: 1rem;">🤖</span>
-        </div>
-        <div>
-            <h3 style="color: #2c3e50; margin: 0; font-weight: 500; font-size: 1.2rem;">AI-Powered Suggestions</h3>
-            <p style="color: #7f8c8d; margin: 0; font-size: 0.9rem;">Get industry-specific machine recommendations</p>
+@st.fragment
+@profile_section("ai_suggestions")
+def ai_suggestions_section():
+    """Industry picker and suggestion buttons; changing the industry only reruns this fragment"""
+    st.markdown("""
+    <div style="background: linear-gradient(135deg, #f8f9ff 0%, #ffffff 100%); border: 1px solid #e1e5e9; border-radius: 12px; padding: 2rem; margin: 1rem 0; box-shadow: 0 2px 8px rgba(0,0,0,0.08);">
+        <div style="display: flex; align-items: center; margin-bottom: 1.5rem;">
+            <div style="background: linear-gradient(135deg, #502DD5, #32B3F1); width: 36px; height: 36px; border-radius: 8px; display: flex; align-items: center; justify-content: center; margin-right: 1rem;">
+                <span style="color: white; font-size: 1rem;">🤖</span>
+            </div>
+            <div>
+                <h3 style="color: #2c3e50; margin: 0; font-weight: 500; font-size: 1.2rem;">AI-Powered Suggestions</h3>
+                <p style="color: #7f8c8d; margin: 0; font-size: 0.9rem;">Get industry-specific machine recommendations</p>
+            </div>
         </div>
     </div>
-</div>
-""", unsafe_allow_html=True)
+    """, unsafe_allow_html=True)
 
-col1, col2, col3 = st.columns([2, 2, 1])
+    col1, col2, col3 = st.columns([2, 2, 1])
 
-with col1:
-    industry = st.selectbox(
-        "Select your industry:",
-        ["General Manufacturing", "Automotive", "Aerospace", "Electronics", "Food & Beverage", "Pharmaceutical"],
-        help="Choose your industry for AI-powered machine suggestions"
-    )
+    with col1:
+        industry = st.selectbox(
+            "Select your industry:",
+            INDUSTRIES,
+            help="Choose your industry for AI-powered machine suggestions"
+        )
 
-with col2:
-    if st.button("🤖 Get AI Suggestions", help="Get industry-specific machine suggestions powered by AI", use_container_width=True):
-        with st.spinner("🤖 AI is analyzing your industry..."):
-            suggestions = get_machine_suggestions(industry)
-            if suggestions:
-                st.session_state.machines = suggestions
-                st.success(f"✨ AI magic activated! {len(suggestions)} {industry} machines added.")
-                st.balloons()
-                st.rerun()
-            else:
-                st.error("❌ Could not get AI suggestions. Please try again or use manual entry.")
+    # Streamed suggestions are previewed here, below the buttons, while the response is still arriving
+    streamed_machines = st.container()
 
-with col3:
-    if st.button("➕ Add Machine Manually", key="add_machine_form", help="Add a new machine manually to your list.", use_container_width=True):
-        st.session_state.show_manual_form = True
-        show_celebration()
-        st.rerun()
+    def show_streamed_machine(machine):
+        """Add a streamed machine to the inventory and preview its card immediately"""
+        st.session_state.machines.append(Machine.from_dict(machine))
+        streamed_machines.markdown(f"""
+        <div style="background: #f8f9fa; border: 1px solid #e9ecef; border-radius: 8px; padding: 1rem 1.5rem; margin: 0.5rem 0;">
+            <div style="font-weight: 600; color: #502DD5; font-size: 1.1rem;">{machine.get('type', '')}</div>
+            <div style="color: #868e96; font-size: 0.85rem; margin-top: 0.25rem;">{machine.get('info', '')}</div>
+        </div>
+        """, unsafe_allow_html=True)
 
-# Update total machines count before displaying
-update_total_machines()
+    with col2:
+        if st.button("🤖 Get AI Suggestions", help="Get industry-specific machine suggestions powered by AI", use_container_width=True):
+            with st.spinner("🤖 AI is analyzing your industry..."):
+                # Suggestions replace the current list; keep the old one in case the request fails
+                previous_machines = st.session_state.machines
+                st.session_state.machines = MachineInventory()
+                suggestions = get_machine_suggestions(industry, on_machine=show_streamed_machine)
+                if suggestions:
+                    st.session_state.machines = MachineInventory.from_dicts(suggestions)
+                    st.success(f"✨ AI magic activated! {len(suggestions)} {industry} machines added.")
+                    st.balloons()
+                    st.rerun()
+                else:
+                    st.session_state.machines = previous_machines
+                    st.error("❌ Could not get AI suggestions. Please try again or use manual entry.")
 
-# Machine Inventory Section
-st.markdown(f"""
-<div style="background: white; border: 1px solid #e1e5e9; border-radius: 12px; padding: 2rem; margin: 2rem 0; box-shadow: 0 2px 8px rgba(0,0,0,0.08);">
-    <div style="display: flex; align-items: center; margin-bottom: 1.5rem;">
-        <div style="background: linear-gradient(135deg, #502DD5, #32B3F1); width: 36px; height: 36px; border-radius: 8px; display: flex; align-items: center; justify-content: center; margin-right: 1rem;">
-            <span style="color: white; font-size: 1rem;">📋</span>
-        </div>
-        <div>
-            <h2 style="color: #2c3e50; margin: 0; font-weight: 500; font-size: 1.2rem;">Machine Inventory</h2>
-            <p style="color: #7f8c8d; margin: 0; font-size: 0.9rem;">Review and manage your machine list • Total: {st.session_state.total_machines} machines</p>
-        </div>
-    </div>
-</div>
-""", unsafe_allow_html=True)
+    with col3:
+        if st.button("➕ Add Machine Manually", key="add_machine_form", help="Add a new machine manually to your list.", use_container_width=True):
+            st.session_state.show_manual_form = True
+            show_celebration()
+            st.rerun()
 
-# Show machine summary with edit/remove options
-if st.session_state.machines:
-    for i, machine in enumerate(st.session_state.machines):
-        st.markdown(f"""
-        <div style="background: #f8f9fa; border: 1px solid #e9ecef; border-radius: 8px; padding: 1.5rem; margin: 0.5rem 0;">
-            <div style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 1rem;">
-                <div style="flex: 1;">
-                    <div style="font-weight: 600; color: #502DD5; font-size: 1.1rem;">{machine['type']}</div>
-                    <div style="color: #6c757d; font-size: 0.9rem; margin-top: 0.25rem;">
-                        Model: {machine['model'] if machine['model'] else 'Not specified'} • Qty: {machine['quantity']}
-                    </div>
-                    {f'<div style="color: #868e96; font-size: 0.85rem; margin-top: 0.25rem;">{machine["info"]}</div>' if machine['info'] else ''}
-                    {'<span style="color: #32B3F1; font-size: 0.9rem;">📸 Photo uploaded</span>' if machine.get('photo') else ''}
-                </div>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        col1, col2 = st.columns([1, 1])
-        with col1:
-            if st.button(f"Edit {i+1}", key=f"form_edit_{i}", use_container_width=True):
-                st.session_state.editing_machine = i
-                st.rerun()
-        with col2:
-            if st.button(f"Remove {i+1}", key=f"form_remove_{i}", use_container_width=True):
-                st.session_state.machines.pop(i)
-                st.rerun()
-else:
-    st.markdown("""
-    <div style="background: #f8f9fa; border: 1px solid #e9ecef; border-radius: 8px; padding: 2rem; text-align: center; color: #6c757d;">
-        <div style="font-size: 2rem; margin-bottom: 1rem;">📋</div>
-        <div style="font-weight: 500; margin-bottom: 0.5rem;">No machines added yet</div>
-        <div style="font-size: 0.9rem;">Click "Add Machine Manually" to start building your inventory, or use AI suggestions for industry-specific machines.</div>
-    </div>
-    """, unsafe_allow_html=True)
+ai_suggestions_section()
 
-# Main Form Section
-with st.form(key="onboarding_form"):
-    st.markdown("""
+bulk_import_section()
+
+if 'pending_suggestions' in st.session_state:
+    backfill_pending_suggestions()
+
+render_sidebar_stats()
+
+# Machine Inventory Section
+@st.fragment
+@profile_section("inventory")
+def machine_inventory():
+    """Edit panel, total badge and machine list; Edit/Remove/Save/Cancel only rerun this fragment"""
+    if st.session_state.pop('celebrate', False):
+        show_celebration()
+    edit_idx = st.session_state.machines.position(st.session_state.get('editing_machine'))
+    if edit_idx is not None:
+        render_edit_panel(edit_idx)
+
+    st.markdown(f"""
     <div style="background: white; border: 1px solid #e1e5e9; border-radius: 12px; padding: 2rem; margin: 2rem 0; box-shadow: 0 2px 8px rgba(0,0,0,0.08);">
         <div style="display: flex; align-items: center; margin-bottom: 1.5rem;">
             <div style="background: linear-gradient(135deg, #502DD5, #32B3F1); width: 36px; height: 36px; border-radius: 8px; display: flex; align-items: center; justify-content: center; margin-right: 1rem;">
-                <span style="color: white; font-size: 1rem;">📝</span>
+                <span style="color: white; font-size: 1rem;">📋</span>
             </div>
             <div>
-                <h2 style="color: #2c3e50; margin: 0; font-weight: 500; font-size: 1.2rem;">Additional Information</h2>
-                <p style="color: #7f8c8d; margin: 0; font-size: 0.9rem;">Provide additional context for your setup</p>
+                <h2 style="color: #2c3e50; margin: 0; font-weight: 500; font-size: 1.2rem;">Machine Inventory</h2>
+                <p style="color: #7f8c8d; margin: 0; font-size: 0.9rem;">Review and manage your machine list</p>
+            </div>
+            <div style="margin-left: auto; background: #f0ecfd; color: #502DD5; border-radius: 999px; padding: 0.25rem 0.75rem; font-size: 0.85rem; font-weight: 500; white-space: nowrap;">
+                {inventory_badge()}
             </div>
         </div>
+    </div>
     """, unsafe_allow_html=True)
+
+    # Show machine summary with edit/remove options
+    if st.session_state.machines:
+        for i, machine in visible_machines():
+            machine_id = st.session_state.machines.id_at(i)
+            st.markdown(f"""
+            <div style="background: #f8f9fa; border: 1px solid #e9ecef; border-radius: 8px; padding: 1.5rem; margin: 0.5rem 0;">
+                <div style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 1rem;">
+                    <div style="flex: 1;">
+                        <div style="font-weight: 600; color: #502DD5; font-size: 1.1rem;">{machine.type}</div>
+                        <div style="color: #6c757d; font-size: 0.9rem; margin-top: 0.25rem;">
+                            Model: {machine.model if machine.model else 'Not specified'} • Qty: {machine.quantity}
+                        </div>
+                        {f'<div style="color: #868e96; font-size: 0.85rem; margin-top: 0.25rem;">{machine.info}</div>' if machine.info else ''}
+                        {'<span style="color: #32B3F1; font-size: 0.9rem;">📸 Photo uploaded</span>' if machine.photo else ''}
+                    </div>
+                </div>
+            </div>
+            """, unsafe_allow_html=True)
+        
+            col1, col2 = st.columns([1, 1])
+            with col1:
+                st.button(f"Edit {i+1}", key=f"form_edit_{machine_id}", on_click=start_editing, args=(machine_id,), use_container_width=True)
+            with col2:
+                st.button(f"Remove {i+1}", key=f"form_remove_{machine_id}", on_click=remove_machine, args=(machine_id,), use_container_width=True)
+    else:
+        st.markdown("""
+        <div style="background: #f8f9fa; border: 1px solid #e9ecef; border-radius: 8px; padding: 2rem; text-align: center; color: #6c757d;">
+            <div style="font-size: 2rem; margin-bottom: 1rem;">📋</div>
+            <div style="font-weight: 500; margin-bottom: 0.5rem;">No machines added yet</div>
+            <div style="font-size: 0.9rem;">Click "Add Machine Manually" to start building your inventory, or use AI suggestions for industry-specific machines.</div>
+        </div>
+        """, unsafe_allow_html=True)
     
-    notes = st.text_area(
-        "Additional Notes",
-        placeholder="Any additional information about your setup, requirements, or special considerations...",
-        height=100
-    )
-    
+    # Edits and removals may have attached or dropped photos
+    sync_photo_refs()
+    autosave_draft()
+
+machine_inventory()
+
+# Photo uploads live outside the form so each file starts processing as soon as it arrives
+@st.fragment
+@profile_section("photo_uploads")
+def photo_uploads_section():
+    """Facility photo and layout sketch uploaders; uploads only rerun this fragment and are thumbnailed in the background"""
     st.markdown("""
     <div style="background: white; border: 1px solid #e1e5e9; border-radius: 12px; padding: 2rem; margin: 2rem 0; box-shadow: 0 2px 8px rgba(0,0,0,0.08);">
         <div style="display: flex; align-items: center; margin-bottom: 1.5rem;">
@@ -462,6 +340,7 @@ with st.form(key="onboarding_form"):
         "Upload additional photos",
         type=["jpg", "jpeg", "png"],
         accept_multiple_files=True,
+        key="other_photos",
         help="Upload any relevant photos: whiteboard diagrams, factory layouts, safety equipment, certifications, or other important documentation."
     )
     
@@ -481,6 +360,7 @@ with st.form(key="onboarding_form"):
     layout_option = st.radio(
         "How would you like to share your line layout?",
         ["I have existing sketches to upload", "Skip for now"],
+        key="layout_option",
         help="Choose whether you want to upload existing sketches/diagrams or skip for now."
     )
     layout_sketches = None
@@ -489,9 +369,35 @@ with st.form(key="onboarding_form"):
             "Upload your line layout sketches/diagrams:",
             type=["jpg", "jpeg", "png"],
             accept_multiple_files=True,
+            key="layout_sketches",
             help="Upload any existing sketches, diagrams, or drawings of your production line layout."
         )
     
+    collect_photo_uploads(other_photos, layout_sketches)
+
+photo_uploads_section()
+
+# Main Form Section
+with profile_section("form"), st.form(key="onboarding_form"):
+    st.markdown("""
+    <div style="background: white; border: 1px solid #e1e5e9; border-radius: 12px; padding: 2rem; margin: 2rem 0; box-shadow: 0 2px 8px rgba(0,0,0,0.08);">
+        <div style="display: flex; align-items: center; margin-bottom: 1.5rem;">
+            <div style="background: linear-gradient(135deg, #502DD5, #32B3F1); width: 36px; height: 36px; border-radius: 8px; display: flex; align-items: center; justify-content: center; margin-right: 1rem;">
+                <span style="color: white; font-size: 1rem;">📝</span>
+            </div>
+            <div>
+                <h2 style="color: #2c3e50; margin: 0; font-weight: 500; font-size: 1.2rem;">Additional Information</h2>
+                <p style="color: #7f8c8d; margin: 0; font-size: 0.9rem;">Provide additional context for your setup</p>
+            </div>
+        </div>
+    """, unsafe_allow_html=True)
+    
+    notes = st.text_area(
+        "Additional Notes",
+        placeholder="Any additional information about your setup, requirements, or special considerations...",
+        height=100
+    )
+    
     st.markdown("""
     <div style="background: white; border: 1px solid #e1e5e9; border-radius: 12px; padding: 2rem; margin: 2rem 0; box-shadow: 0 2px 8px rgba(0,0,0,0.08);">
         <div style="display: flex; align-items: center; margin-bottom: 1.5rem;">
@@ -547,134 +453,157 @@ with st.form(key="onboarding_form"):
     submit = st.form_submit_button("Submit", use_container_width=True)
 
 if submit:
-    st.markdown("""
-    <div style="background: linear-gradient(135deg, #d4edda, #c3e6cb); border: 1px solid #c3e6cb; border-radius: 12px; padding: 2rem; margin: 2rem 0; text-align: center;">
-        <div style="font-size: 3rem; margin-bottom: 1rem;">🎉</div>
-        <h2 style="color: #155724; margin: 0 0 0.5rem 0; font-weight: 600;">Onboarding Submitted Successfully!</h2>
-        <p style="color: #155724; margin: 0; font-size: 1.1rem;">Thank you for providing your information. We're excited to help you get started!</p>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    st.balloons()
-    
-    # Enterprise Summary Section
-    st.markdown("""
-    <div style="background: white; border: 1px solid #e1e5e9; border-radius: 12px; padding: 2rem; margin: 2rem 0; box-shadow: 0 2px 8px rgba(0,0,0,0.08);">
-        <h2 style="color: #2c3e50; margin: 0 0 1.5rem 0; font-weight: 600; font-size: 1.5rem;">📋 Setup Summary</h2>
-        <p style="color: #7f8c8d; margin: 0 0 2rem 0;">Here's what we'll be working with for your installation:</p>
-    """, unsafe_allow_html=True)
-    
-    # Layout option summary
-    layout_summary = layout_option
-    if layout_option == "I have existing sketches to upload" and layout_sketches:
-        layout_summary += f" ({len(layout_sketches)} files)"
-    
-    col1, col2 = st.columns(2)
+    with profile_section("summary"):
+        # Uploads were queued by photo_uploads_section, so their thumbnails are usually ready by now
+        layout_option = st.session_state.layout_option
+        other_photos = st.session_state.other_photo_keys
+        layout_sketches = st.session_state.layout_sketch_keys
+    
+        submission_id = submit_onboarding(
+            name, email, {"name": teammate_name, "email": teammate_email} if invite_teammate else None, notes
+        )
     
-    with col1:
         st.markdown("""
-        <div style="background: #f8f9fa; border-radius: 8px; padding: 1.5rem;">
-            <h3 style="color: #502DD5; margin: 0 0 1rem 0; font-weight: 500;">👤 Contact Information</h3>
+        <div style="background: linear-gradient(135deg, #d4edda, #c3e6cb); border: 1px solid #c3e6cb; border-radius: 12px; padding: 2rem; margin: 2rem 0; text-align: center;">
+            <div style="font-size: 3rem; margin-bottom: 1rem;">🎉</div>
+            <h2 style="color: #155724; margin: 0 0 0.5rem 0; font-weight: 600;">Onboarding Submitted Successfully!</h2>
+            <p style="color: #155724; margin: 0; font-size: 1.1rem;">Thank you for providing your information. We're excited to help you get started!</p>
+        </div>
         """, unsafe_allow_html=True)
-        st.write(f"**Name:** {name}")
-        st.write(f"**Email:** {email}")
-        if invite_teammate:
-            st.write(f"**Teammate:** {teammate_name} ({teammate_email})")
-        st.markdown("</div>", unsafe_allow_html=True)
     
-    with col2:
-        st.markdown(f"""
-        <div style="background: #f8f9fa; border-radius: 8px; padding: 1.5rem;">
-            <h3 style="color: #502DD5; margin: 0 0 1rem 0; font-weight: 500;">🔧 Machine Inventory ({st.session_state.total_machines} total)</h3>
-        """, unsafe_allow_html=True)
-        for i, machine in enumerate(st.session_state.machines):
-            machine_info = f"• {machine['type']}"
-            if machine['model']:
-                machine_info += f" ({machine['model']})"
-            machine_info += f": {machine['quantity']}"
-            if machine['info']:
-                machine_info += f" - {machine['info']}"
-            st.write(machine_info)
-        st.markdown("</div>", unsafe_allow_html=True)
+        st.caption(f"Submission reference: {submission_id}")
+        st.balloons()
     
-    if notes:
+        # Enterprise Summary Section
         st.markdown("""
-        <div style="background: #f8f9fa; border-radius: 8px; padding: 1.5rem; margin-top: 1rem;">
-            <h3 style="color: #502DD5; margin: 0 0 1rem 0; font-weight: 500;">📝 Additional Notes</h3>
+        <div style="background: white; border: 1px solid #e1e5e9; border-radius: 12px; padding: 2rem; margin: 2rem 0; box-shadow: 0 2px 8px rgba(0,0,0,0.08);">
+            <h2 style="color: #2c3e50; margin: 0 0 1.5rem 0; font-weight: 600; font-size: 1.5rem;">📋 Setup Summary</h2>
+            <p style="color: #7f8c8d; margin: 0 0 2rem 0;">Here's what we'll be working with for your installation:</p>
         """, unsafe_allow_html=True)
-        st.write(notes)
-        st.markdown("</div>", unsafe_allow_html=True)
     
-    st.markdown("""
-    <div style="background: #f8f9fa; border-radius: 8px; padding: 1.5rem; margin-top: 1rem;">
-        <h3 style="color: #502DD5; margin: 0 0 1rem 0; font-weight: 500;">🏭 Line Layout</h3>
-        <p style="margin: 0;">{}</p>
-    </div>
-    """.format(layout_summary), unsafe_allow_html=True)
+        # Layout option summary
+        layout_summary = layout_option
+        if layout_option == "I have existing sketches to upload" and layout_sketches:
+            layout_summary += f" ({len(layout_sketches)} files)"
     
-    # Asset Summary
-    machine_photo_count = sum(1 for machine in st.session_state.machines if machine.get('photo'))
-    other_photo_count = (len(other_photos) if other_photos else 0) + (len(layout_sketches) if layout_sketches else 0)
+        col1, col2 = st.columns(2)
     
-    st.markdown(f"""
-    <div style="background: #f8f9fa; border-radius: 8px; padding: 1.5rem; margin-top: 1rem;">
-        <h3 style="color: #502DD5; margin: 0 0 1rem 0; font-weight: 500;">📸 Uploaded Assets</h3>
-        <p style="margin: 0.5rem 0;"><strong>Machine photos:</strong> {machine_photo_count}</p>
-        <p style="margin: 0.5rem 0;"><strong>Other photos:</strong> {other_photo_count}</p>
-        <p style="margin: 0.5rem 0;"><strong>Total assets:</strong> {machine_photo_count + other_photo_count}</p>
-    </div>
-    """, unsafe_allow_html=True)
+        with col1:
+            st.markdown("""
+            <div style="background: #f8f9fa; border-radius: 8px; padding: 1.5rem;">
+                <h3 style="color: #502DD5; margin: 0 0 1rem 0; font-weight: 500;">👤 Contact Information</h3>
+            """, unsafe_allow_html=True)
+            st.write(f"**Name:** {name}")
+            st.write(f"**Email:** {email}")
+            if invite_teammate:
+                st.write(f"**Teammate:** {teammate_name} ({teammate_email})")
+            st.markdown("</div>", unsafe_allow_html=True)
     
-    st.markdown("</div>", unsafe_allow_html=True)
+        with col2:
+            st.markdown(f"""
+            <div style="background: #f8f9fa; border-radius: 8px; padding: 1.5rem;">
+                <h3 style="color: #502DD5; margin: 0 0 1rem 0; font-weight: 500;">🔧 Machine Inventory ({st.session_state.machines.total_quantity()} total)</h3>
+            """, unsafe_allow_html=True)
+            for i, machine in enumerate(st.session_state.machines):
+                machine_info = f"• {machine.type}"
+                if machine.model:
+                    machine_info += f" ({machine.model})"
+                machine_info += f": {machine.quantity}"
+                if machine.info:
+                    machine_info += f" - {machine.info}"
+                st.write(machine_info)
+            st.caption(inventory_badge())
+            st.markdown("</div>", unsafe_allow_html=True)
+    
+        if notes:
+            st.markdown("""
+            <div style="background: #f8f9fa; border-radius: 8px; padding: 1.5rem; margin-top: 1rem;">
+                <h3 style="color: #502DD5; margin: 0 0 1rem 0; font-weight: 500;">📝 Additional Notes</h3>
+            """, unsafe_allow_html=True)
+            st.write(notes)
+            st.markdown("</div>", unsafe_allow_html=True)
     
-    # Meet Your Guidewheel Buddy Section
-    st.markdown("""
-    <div style="background: linear-gradient(135deg, #502DD5 0%, #32B3F1 100%); border-radius: 12px; padding: 2rem; margin: 2rem 0; text-align: center; color: white;">
-        <div style="font-size: 3rem; margin-bottom: 1rem;">🤝</div>
-        <h2 style="color: white; margin: 0 0 1rem 0; font-weight: 600;">Meet Your Guidewheel Buddy</h2>
-        <p style="color: rgba(255,255,255,0.9); margin: 0; font-size: 1.1rem; line-height: 1.6;">
-            <strong>Alex</strong> will reach out to guide your setup and answer any questions. 
-            He's worked with 100+ factories and loves seeing machines come to life in real time.
-        </p>
-    </div>
-    """, unsafe_allow_html=True)
+        st.markdown("""
+        <div style="background: #f8f9fa; border-radius: 8px; padding: 1.5rem; margin-top: 1rem;">
+            <h3 style="color: #502DD5; margin: 0 0 1rem 0; font-weight: 500;">🏭 Line Layout</h3>
+            <p style="margin: 0;">{}</p>
+        </div>
+        """.format(layout_summary), unsafe_allow_html=True)
     
-    # Welcome Message
-    st.markdown("""
-    <div style="background: white; border: 1px solid #e1e5e9; border-radius: 12px; padding: 2rem; margin: 2rem 0; box-shadow: 0 2px 8px rgba(0,0,0,0.08); text-align: center;">
-        <div style="font-size: 2rem; margin-bottom: 1rem;">🎉</div>
-        <h2 style="color: #2c3e50; margin: 0 0 0.5rem 0; font-weight: 600;">Welcome to the Guidewheel Family!</h2>
-        <p style="color: #7f8c8d; margin: 0; font-size: 1.1rem;">We're excited to help you get started with intelligent machine management.</p>
-    </div>
-    """, unsafe_allow_html=True)
+        # Asset Summary
+        machine_photo_count = st.session_state.machines.photo_count()
+        other_photo_count = (len(other_photos) if other_photos else 0) + (len(layout_sketches) if layout_sketches else 0)
+    
+        st.markdown(f"""
+        <div style="background: #f8f9fa; border-radius: 8px; padding: 1.5rem; margin-top: 1rem;">
+            <h3 style="color: #502DD5; margin: 0 0 1rem 0; font-weight: 500;">📸 Uploaded Assets</h3>
+            <p style="margin: 0.5rem 0;"><strong>Machine photos:</strong> {machine_photo_count}</p>
+            <p style="margin: 0.5rem 0;"><strong>Other photos:</strong> {other_photo_count}</p>
+            <p style="margin: 0.5rem 0;"><strong>Total assets:</strong> {machine_photo_count + other_photo_count}</p>
+        </div>
+        """, unsafe_allow_html=True)
     
-    # Display uploaded photos in a grid
-    machine_photos_to_show = [machine for machine in st.session_state.machines if machine.get('photo')]
-    if machine_photos_to_show or other_photos or layout_sketches:
+        st.markdown("</div>", unsafe_allow_html=True)
+    
+        # Meet Your Guidewheel Buddy Section
         st.markdown("""
-        <div style="background: white; border: 1px solid #e1e5e9; border-radius: 12px; padding: 2rem; margin: 2rem 0; box-shadow: 0 2px 8px rgba(0,0,0,0.08);">
-            <h3 style="color: #2c3e50; margin: 0 0 1.5rem 0; font-weight: 500;">📸 Uploaded Assets</h3>
+        <div style="background: linear-gradient(135deg, #502DD5 0%, #32B3F1 100%); border-radius: 12px; padding: 2rem; margin: 2rem 0; text-align: center; color: white;">
+            <div style="font-size: 3rem; margin-bottom: 1rem;">🤝</div>
+            <h2 style="color: white; margin: 0 0 1rem 0; font-weight: 600;">Meet Your Guidewheel Buddy</h2>
+            <p style="color: rgba(255,255,255,0.9); margin: 0; font-size: 1.1rem; line-height: 1.6;">
+                <strong>Alex</strong> will reach out to guide your setup and answer any questions. 
+                He's worked with 100+ factories and loves seeing machines come to life in real time.
+            </p>
+        </div>
         """, unsafe_allow_html=True)
+    
+        # Welcome Message
+        st.markdown("""
+        <div style="background: white; border: 1px solid #e1e5e9; border-radius: 12px; padding: 2rem; margin: 2rem 0; box-shadow: 0 2px 8px rgba(0,0,0,0.08); text-align: center;">
+            <div style="font-size: 2rem; margin-bottom: 1rem;">🎉</div>
+            <h2 style="color: #2c3e50; margin: 0 0 0.5rem 0; font-weight: 600;">Welcome to the Guidewheel Family!</h2>
+            <p style="color: #7f8c8d; margin: 0; font-size: 1.1rem;">We're excited to help you get started with intelligent machine management.</p>
+        </div>
+        """, unsafe_allow_html=True)
+    
+        # Display uploaded photos in a grid
+        machine_photos_to_show = [machine for machine in st.session_state.machines if machine.photo]
+        if machine_photos_to_show or other_photos or layout_sketches:
+            st.markdown("""
+            <div style="background: white; border: 1px solid #e1e5e9; border-radius: 12px; padding: 2rem; margin: 2rem 0; box-shadow: 0 2px 8px rgba(0,0,0,0.08);">
+                <h3 style="color: #2c3e50; margin: 0 0 1.5rem 0; font-weight: 500;">📸 Uploaded Assets</h3>
+            """, unsafe_allow_html=True)
         
-        if machine_photos_to_show:
-            st.subheader("Machine Photos:")
-            cols = st.columns(3)
-            for i, machine in enumerate(machine_photos_to_show):
-                with cols[i % 3]:
-                    st.image(machine['photo'], caption=f"{machine['type']}", use_column_width=True)
+            if machine_photos_to_show:
+                st.subheader("Machine Photos:")
+                cols = st.columns(3)
+                for i, machine in enumerate(machine_photos_to_show):
+                    with cols[i % 3]:
+                        thumbnail = photo_thumbnail(machine.photo)
+                        if thumbnail:
+                            st.image(thumbnail, caption=f"{machine.type}", use_column_width=True)
         
-        if other_photos:
-            st.subheader("Additional Photos:")
-            cols = st.columns(3)
-            for i, photo in enumerate(other_photos):
-                with cols[i % 3]:
-                    st.image(photo, caption=f"Photo {i+1}", use_column_width=True)
+            if other_photos:
+                st.subheader("Additional Photos:")
+                cols = st.columns(3)
+                for i, photo in enumerate(other_photos):
+                    with cols[i % 3]:
+                        thumbnail = photo_thumbnail(photo)
+                        if thumbnail:
+                            st.image(thumbnail, caption=f"Photo {i+1}", use_column_width=True)
         
-        if layout_sketches:
-            st.subheader("Line Layout Sketches:")
-            cols = st.columns(3)
-            for i, sketch in enumerate(layout_sketches):
-                with cols[i % 3]:
-                    st.image(sketch, caption=f"Layout {i+1}", use_column_width=True)
+            if layout_sketches:
+                st.subheader("Line Layout Sketches:")
+                cols = st.columns(3)
+                for i, sketch in enumerate(layout_sketches):
+                    with cols[i % 3]:
+                        thumbnail = photo_thumbnail(sketch)
+                        if thumbnail:
+                            st.image(thumbnail, caption=f"Layout {i+1}", use_column_width=True)
         
-        st.markdown("</div>", unsafe_allow_html=True) 
\ No newline at end of file
+            st.markdown("</div>", unsafe_allow_html=True) 
+
+# Per-section timings: one log line per rerun with PROFILE_LOG, a sidebar table with PROFILE_PANEL
+finish_rerun(log=PROFILE_LOG)
+if PROFILE_PANEL:
+    render_profile_panel()
@@ -0,0 +1,700 @@
+"""Session, storage and suggestion logic shared by onboarding_app.py and onboarding_app_fresh.py.
+
+The two apps only differ in layout and styling; everything that reads or writes session
+state, the stores on disk or the suggestion API lives here so both behave the same.
+"""
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+
+import streamlit as st
+
+from autocomplete import BUILTIN_VOCABULARY_PATH, build_indexes, load_vocabulary
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from config import get_setting, get_int_setting, get_float_setting
+from draft_store import DraftStore, empty_draft, machine_splice
+from image_pipeline import ImagePipeline
+from inventory import MAX_QUANTITY, MachineInventory
+from inventory_view import filter_machines, paginate
+from machine_catalog import CATALOG, suggestions_for
+from machine_import import import_machines, read_rows
+from model_reference import BUILTIN_REFERENCE_PATH, ModelReference
+from outbox import Outbox
+from photo_store import PhotoStore
+from section_profiler import profile_section, serve_metrics
+from stream_parser import ObjectStreamParser
+from suggestion_cache import SuggestionCache
+from submission_store import SubmissionStore
+from suggestion_client import SuggestionClient, SuggestionsPending
+from upload_processor import UploadProcessor
+
+OPENAI_API_URL = get_setting("OPENAI_API_URL", "https://api.openai.com/v1/chat/completions")
+SUGGESTION_MODEL = "gpt-3.5-turbo"
+# Bump whenever the prompt changes so cached answers from the old prompt are not served
+PROMPT_VERSION = 1
+
+@st.cache_resource
+def get_suggestion_cache():
+    """Process-wide suggestion cache shared by every session"""
+    return SuggestionCache(
+        max_entries=get_int_setting("SUGGESTION_CACHE_SIZE", 128),
+        ttl_seconds=get_int_setting("SUGGESTION_CACHE_TTL_SECONDS", 24 * 60 * 60),
+        path=get_setting("SUGGESTION_CACHE_PATH")
+    )
+
+# Expired photo refs and drafts are swept this often for as long as the process runs
+COLLECT_INTERVAL_SECONDS = 60 * 60
+
+def collect_periodically(name, collect):
+    """Call collect() now and then every COLLECT_INTERVAL_SECONDS on a daemon thread"""
+    def run():
+        while True:
+            try:
+                collect()
+            except (OSError, sqlite3.Error):
+                # Another worker may be sweeping the same files; try again next round
+                pass
+            time.sleep(COLLECT_INTERVAL_SECONDS)
+    threading.Thread(target=run, name=name, daemon=True).start()
+
+@st.cache_resource
+def get_photo_store():
+    """Process-wide photo store; machines in session state keep only photo keys"""
+    store = PhotoStore(get_setting("PHOTO_STORE_PATH", os.path.join(tempfile.gettempdir(), "onboarding_photos")))
+    # Drop photos whose sessions and drafts have ended, at startup and then hourly
+    collect_periodically("photo-collect", store.collect)
+    return store
+
+@st.cache_resource
+def get_image_pipeline():
+    """Process-wide photo pipeline; thumbnails are cached in the photo store by content hash"""
+    return ImagePipeline(get_photo_store())
+
+@st.cache_resource
+def get_upload_processor():
+    """Process-wide background pool that thumbnails photos while the form is being filled in"""
+    return UploadProcessor(get_image_pipeline(), max_workers=get_int_setting("UPLOAD_WORKERS", 4))
+
+def queue_uploads(uploads):
+    """Hand new uploads to the background pool as they arrive, returning their photo keys"""
+    keys = st.session_state.setdefault('upload_keys', {})
+    for upload in uploads:
+        if upload.file_id not in keys:
+            keys[upload.file_id] = get_upload_processor().submit(upload)
+    return [keys[upload.file_id] for upload in uploads]
+
+# Sessions can be abandoned at any time, so their photo references expire unless refreshed
+PHOTO_REF_TTL_SECONDS = 24 * 60 * 60
+
+def sync_photo_refs():
+    """Tell the photo store which photos this session points at, so unused ones can be collected"""
+    keys = set(st.session_state.machines.photo_keys())
+    keys.update(st.session_state.get('other_photo_keys', []), st.session_state.get('layout_sketch_keys', []))
+    owner = st.session_state.setdefault('photo_owner', f"session:{uuid.uuid4().hex}")
+    synced = st.session_state.get('synced_photo_refs')
+    if synced is None or synced[0] != keys or time.time() - synced[1] > PHOTO_REF_TTL_SECONDS / 2:
+        get_photo_store().set_refs(owner, keys, expires_at=time.time() + PHOTO_REF_TTL_SECONDS)
+        st.session_state.synced_photo_refs = (keys, time.time())
+
+def photo_thumbnail(key):
+    """Thumbnail path of a photo, usually already processed; shows a placeholder and returns None if it can't be read"""
+    try:
+        get_upload_processor().wait(key)
+        return get_image_pipeline().variant_path(key)
+    except ValueError as e:
+        st.caption(f"🖼️ Photo unavailable: {e}")
+        return None
+
+# Type-ahead vocabulary; MACHINE_VOCABULARY_PATH can point at an extra file of types and models
+@st.cache_resource
+def get_autocomplete():
+    """Process-wide (machine type index, model index) built from the catalog and vocabulary files"""
+    paths = [BUILTIN_VOCABULARY_PATH, *filter(None, [get_setting("MACHINE_VOCABULARY_PATH")])]
+    return build_indexes(CATALOG, load_vocabulary(*paths))
+
+def autocomplete_options(index, current):
+    """Selectbox options: the current value and its closest matches first, then the rest of the vocabulary.
+
+    The browser narrows these as the user types; anything else typed is kept as a new entry.
+    """
+    options = dict.fromkeys([current] if current else [])
+    options.update(dict.fromkeys(index.suggest(current)))
+    options.update(dict.fromkeys(index.suggest("", limit=len(index))))
+    return list(options)
+
+# Mapped on the first model lookup rather than at startup; MODEL_REFERENCE_PATH can replace the bundled file
+@st.cache_resource
+def get_model_reference():
+    """Process-wide offline manufacturer/model reference"""
+    return ModelReference(get_setting("MODEL_REFERENCE_PATH", BUILTIN_REFERENCE_PATH))
+
+def fill_from_reference(machine):
+    """Complete a machine from the model reference: the full model name, and its type and info if left empty"""
+    record = get_model_reference().lookup(machine.model) if machine.model else None
+    if record is not None:
+        machine.model = record.name
+        machine.type = machine.type or record.type
+        machine.info = machine.info or record.specs()
+    return machine
+
+# Drafts nobody resumes within this window are dropped, along with their hold on photos
+DRAFT_TTL_SECONDS = 7 * 24 * 60 * 60
+
+@st.cache_resource
+def get_draft_store():
+    """Process-wide store of autosaved drafts, resumable through the ?draft= link"""
+    path = get_setting("DRAFT_STORE_PATH", os.path.join(tempfile.gettempdir(), "onboarding_drafts.sqlite3"))
+    store = DraftStore(path)
+    collect_periodically("draft-collect", lambda: store.collect(DRAFT_TTL_SECONDS))
+    return store
+
+def current_draft():
+    """The parts of the session worth resuming: machines plus the photo uploads and layout choice"""
+    return {"machines": st.session_state.machines.to_dicts(), "fields": {
+        "layout_option": st.session_state.get('layout_option'),
+        "other_photos": st.session_state.get('other_photo_keys', []),
+        "layout_sketches": st.session_state.get('layout_sketch_keys', []),
+    }}
+
+def restore_draft():
+    """Start the session from the draft named in the URL, if any; photos stay in the store until shown"""
+    token = st.query_params.get("draft")
+    draft = get_draft_store().load(token) if token else None
+    if draft is None:
+        st.session_state.draft_token = None
+        st.session_state.setdefault('machines', MachineInventory())
+        st.session_state.saved_draft = empty_draft()
+        return
+    st.session_state.draft_token = token
+    st.session_state.machines = MachineInventory.from_dicts(draft["machines"])
+    fields = draft["fields"]
+    if fields.get("layout_option"):
+        st.session_state.layout_option = fields["layout_option"]
+    st.session_state.other_photo_keys = st.session_state.restored_other_photos = fields.get("other_photos", [])
+    st.session_state.layout_sketch_keys = st.session_state.restored_layout_sketches = fields.get("layout_sketches", [])
+    st.session_state.saved_draft = current_draft()
+    if st.session_state.machines or fields.get("other_photos") or fields.get("layout_sketches"):
+        st.toast(f"📝 Picked up your draft with {len(st.session_state.machines)} machines")
+
+def autosave_draft():
+    """Append what changed since the last autosave to this session's draft"""
+    if st.session_state.get('draft_submitted'):
+        return
+    saved = st.session_state.saved_draft
+    draft = current_draft()
+    ops = []
+    splice = machine_splice(saved["machines"], draft["machines"])
+    if splice is not None:
+        ops.append(splice)
+    for field, value in draft["fields"].items():
+        if saved["fields"].get(field) != value:
+            ops.append({"op": "set", "field": field, "value": value})
+    if not ops:
+        return
+    token = st.session_state.draft_token
+    if token is None:
+        if not draft["machines"] and not draft["fields"]["other_photos"] and not draft["fields"]["layout_sketches"]:
+            # Nothing worth resuming yet, so no draft or link is created
+            st.session_state.saved_draft = draft
+            return
+        token = st.session_state.draft_token = DraftStore.new_token()
+        ops = [machine_splice([], draft["machines"])] + [
+            {"op": "set", "field": field, "value": value} for field, value in draft["fields"].items()
+        ]
+        st.query_params["draft"] = token
+    get_draft_store().append(token, [op for op in ops if op is not None])
+    st.session_state.saved_draft = draft
+    # A saved draft keeps its photos for as long as the draft itself may be resumed
+    get_photo_store().set_refs(
+        f"draft:{token}",
+        {machine["photo"] for machine in draft["machines"] if machine["photo"]}
+        | set(draft["fields"]["other_photos"]) | set(draft["fields"]["layout_sketches"]),
+        expires_at=time.time() + DRAFT_TTL_SECONDS
+    )
+
+def clear_restored_photos():
+    st.session_state.restored_other_photos = []
+    st.session_state.restored_layout_sketches = []
+
+@st.cache_resource
+def get_submission_store():
+    """Process-wide durable submission log; its writer thread batches fsyncs across sessions"""
+    return SubmissionStore(get_setting("SUBMISSION_STORE_PATH", os.path.join(tempfile.gettempdir(), "onboarding_submissions")))
+
+@st.cache_resource
+def get_outbox():
+    """Process-wide worker pushing stored submissions to OUTBOX_WEBHOOK_URLS; None when none are set"""
+    urls = [url.strip() for url in (get_setting("OUTBOX_WEBHOOK_URLS") or "").split(",") if url.strip()]
+    if not urls:
+        return None
+    token = get_setting("OUTBOX_WEBHOOK_TOKEN")
+    store = get_submission_store()
+    return Outbox(
+        store.db_path,
+        urls,
+        headers={"Authorization": f"Bearer {token}"} if token else None,
+        batch_size=get_int_setting("OUTBOX_BATCH_SIZE", 50),
+        max_attempts=get_int_setting("OUTBOX_MAX_ATTEMPTS", 10),
+        # With several workers sharing the store, one delivers and the rest stand by
+        lock_path=os.path.join(store.directory, "outbox.lock")
+    ).start()
+
+@st.cache_resource
+def get_metrics_server():
+    """Process-wide /metrics endpoint with section timings; None unless PROFILE_METRICS_PORT is set"""
+    port = get_int_setting("PROFILE_METRICS_PORT", 0)
+    return serve_metrics(port) if port else None
+
+@st.cache_resource
+def get_suggestion_client():
+    """Async suggestion client on one event loop shared by every session"""
+    return SuggestionClient(
+        OPENAI_API_URL,
+        max_concurrency=get_int_setting("SUGGESTION_MAX_CONCURRENCY", 8),
+        deadline_seconds=get_float_setting("SUGGESTION_DEADLINE_SECONDS", 10.0),
+        breaker=CircuitBreaker(
+            failure_threshold=get_int_setting("SUGGESTION_BREAKER_FAILURES", 5),
+            reset_timeout_seconds=get_float_setting("SUGGESTION_BREAKER_RESET_SECONDS", 30.0),
+            slow_call_seconds=get_float_setting("SUGGESTION_SLOW_CALL_SECONDS", 5.0)
+        )
+    )
+
+def cache_late_suggestions(cache, cache_key, response):
+    """Cache an AI answer that arrived after the hedged catalog answer was served"""
+    if response.status_code == 200:
+        try:
+            cache.set(cache_key, json.loads(response.json()['choices'][0]['message']['content']))
+        except (KeyError, IndexError, ValueError):
+            pass
+
+# LLM API configuration
+def get_machine_suggestions(industry, on_machine=None, on_error=st.error):
+    """Get machine suggestions from LLM based on industry
+
+    When on_machine is given and streaming is enabled, each machine is passed to it
+    as soon as the streamed response closes its JSON object. If the API fails, on_error
+    is called with a message and None is returned; each app shows it in its own way.
+    """
+    try:
+        prompt = f"""Based on the {industry} industry, suggest 6-8 common machines that would be found in a typical manufacturing facility. 
+        For each machine, provide:
+        - Machine type (e.g., Lathe, Milling Machine, CNC Router)
+        - Typical quantity (1-3)
+        - Brief description of its use in this industry
+        
+        Return as JSON array with format:
+        [{{"type": "Machine Type", "model": "", "info": "Brief description", "quantity": 1}}]
+        
+        Focus on machines that are essential for {industry} manufacturing."""
+        
+        # For demo purposes, serve the built-in catalog if the API is not configured
+        if not get_setting("OPENAI_API_KEY"):
+            return suggestions_for(industry)
+        
+        cache = get_suggestion_cache()
+        cache_key = (industry, PROMPT_VERSION, SUGGESTION_MODEL)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        headers = {
+            "Authorization": f"Bearer {get_setting('OPENAI_API_KEY')}",
+            "Content-Type": "application/json"
+        }
+        
+        data = {
+            "model": SUGGESTION_MODEL,
+            "messages": [
+                {"role": "system", "content": "You are a manufacturing expert. Provide accurate, industry-specific machine suggestions."},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.7,
+            "max_tokens": 500
+        }
+        
+        stream_suggestions = str(get_setting("SUGGESTION_STREAMING", "true")).lower() == "true"
+        # Optional latency budget: past it the catalog is served and the AI answer back-filled later
+        hedge_seconds = get_float_setting("SUGGESTION_HEDGE_SECONDS", 0) or None
+        if on_machine is not None and stream_suggestions and hedge_seconds is None:
+            data["stream"] = True
+            started = time.perf_counter()
+            timing = {"first_machine_seconds": None}
+            parser = ObjectStreamParser()
+            suggestions = []
+            # Sessions asking for the same industry while it is streaming read the same upstream stream
+            for chunk in get_suggestion_client().stream(cache_key, headers, data):
+                for machine in parser.feed(chunk):
+                    if timing["first_machine_seconds"] is None:
+                        timing["first_machine_seconds"] = time.perf_counter() - started
+                    suggestions.append(machine)
+                    on_machine(machine)
+            timing["total_seconds"] = time.perf_counter() - started
+            st.session_state.suggestion_timing = timing
+            if not suggestions:
+                on_error("AI response format issue")
+                return None
+            cache.set(cache_key, suggestions)
+            return suggestions
+        
+        # Concurrent sessions asking for the same industry share one upstream call
+        try:
+            response = get_suggestion_client().post(
+                cache_key, headers, data,
+                hedge_seconds=hedge_seconds,
+                on_late_response=lambda late: cache_late_suggestions(cache, cache_key, late)
+            )
+        except SuggestionsPending:
+            # Serve the catalog now; backfill_pending_suggestions swaps in the AI answer if it lands
+            fallback = suggestions_for(industry)
+            st.session_state.pending_suggestions = {
+                "key": cache_key,
+                "served": MachineInventory.from_dicts(fallback),
+                "since": time.time()
+            }
+            return fallback
+        if response.status_code == 200:
+            result = response.json()
+            suggestions_text = result['choices'][0]['message']['content']
+            try:
+                # Parse JSON from response
+                suggestions = json.loads(suggestions_text)
+                cache.set(cache_key, suggestions)
+                return suggestions
+            except json.JSONDecodeError:
+                on_error("AI response format issue")
+                return None
+        else:
+            on_error(f"API Error: {response.status_code}")
+            return None
+            
+    except CircuitOpenError:
+        # The API is failing or slow; answer from the catalog instead of waiting for a timeout
+        st.warning("AI suggestions are temporarily unavailable. Using fallback suggestions.")
+        return suggestions_for(industry)
+    except Exception as e:
+        on_error(f"Error getting suggestions: {str(e)}")
+        return None
+
+def init_session():
+    """Set up session state on every rerun, resuming the draft linked in the URL on the first one"""
+    if 'saved_draft' not in st.session_state:
+        restore_draft()
+    st.session_state.setdefault('celebration_index', 0)
+    st.session_state.setdefault('inventory_page', 0)
+    # Built at startup so the first edit panel doesn't wait for it
+    get_autocomplete()
+
+# Celebration messages for machine additions
+celebration_messages = [
+    "🎉 Another machine joins the team!",
+    "🛠️ You're building a powerhouse!",
+    "🔧 That one's a beauty. Welcome aboard!",
+    "🚀 Let's keep the momentum rolling!",
+    "💪 That machine is ready to work!"
+]
+
+def show_celebration():
+    """Show celebration message and balloons, then rotate to next message"""
+    message = celebration_messages[st.session_state.celebration_index]
+    st.success(message)
+    st.balloons()
+    # Rotate to next celebration message
+    st.session_state.celebration_index = (st.session_state.celebration_index + 1) % len(celebration_messages)
+
+def inventory_badge():
+    """Inventory totals for the header badge, read from the inventory's running aggregates"""
+    machines = st.session_state.machines
+    parts = [f"{machines.total_quantity()} machines", f"{machines.type_count()} types", f"📸 {machines.photo_count()}/{len(machines)}"]
+    if machines.missing_model_count():
+        parts.append(f"{machines.missing_model_count()} without a model")
+    return " • ".join(parts)
+
+# Inventory button callbacks. State changes happen before the fragment reruns, so
+# Edit/Remove/Save/Cancel need no explicit st.rerun and never rerun the whole app.
+def start_editing(machine_id):
+    """Open the edit panel for a machine"""
+    st.session_state.editing_machine = machine_id
+
+def finish_editing(saved):
+    """Close the edit panel, celebrating on save"""
+    st.session_state.editing_machine = None
+    st.session_state.celebrate = saved
+    st.session_state.pop('edit_error', None)
+
+def save_edit(machine_id):
+    """Commit the edit form to the machine in one step; an unreadable new photo rejects the whole save"""
+    index = st.session_state.machines.position(machine_id)
+    if index is None:
+        finish_editing(False)
+        return
+    machine = st.session_state.machines[index]
+    type_index, model_index = get_autocomplete()
+    # Spelling variants such as "cnc lathe" or "CNC-Lathe" are stored as the one canonical type
+    machine.type = type_index.canonical(st.session_state[f"edit_type_{machine_id}"] or "")
+    machine.quantity = st.session_state[f"edit_qty_{machine_id}"]
+    machine.model = model_index.canonical(st.session_state[f"edit_model_{machine_id}"] or "")
+    machine.info = st.session_state[f"edit_info_{machine_id}"]
+    fill_from_reference(machine)
+    photo = st.session_state[f"machine_photo_{machine_id}"]
+    if photo is not None:
+        key = queue_uploads([photo])[0]
+        try:
+            # A single photo is thumbnailed quickly, and waiting keeps a broken file off the machine
+            get_upload_processor().wait(key)
+        except ValueError as e:
+            st.session_state.edit_error = e
+            return
+        machine.photo = key
+    st.session_state.machines[index] = machine
+    finish_editing(True)
+
+def remove_machine(machine_id):
+    """Remove a machine, closing the edit panel if it was the one being edited"""
+    st.session_state.machines.remove(machine_id)
+    if st.session_state.get('editing_machine') == machine_id:
+        st.session_state.editing_machine = None
+
+def change_inventory_page(step):
+    """Move the inventory view forward or back a page"""
+    st.session_state.inventory_page += step
+
+def reset_inventory_page():
+    """Jump back to the first page when the filter changes"""
+    st.session_state.inventory_page = 0
+
+def visible_machines():
+    """Render the filter and pager, and return the (index, machine) pairs on the current page"""
+    machines = st.session_state.machines
+    # Large plants are paged so each rerun only renders one page of machine cards
+    page_size = get_int_setting("INVENTORY_PAGE_SIZE", 20)
+    if len(machines) <= page_size:
+        return list(enumerate(machines))
+    
+    query = st.text_input(
+        "🔍 Filter machines",
+        placeholder="Search by type, model or info",
+        key="inventory_filter",
+        on_change=reset_inventory_page
+    )
+    matches = filter_machines(machines, query)
+    page_machines, page, page_count = paginate(matches, st.session_state.inventory_page, page_size)
+    st.session_state.inventory_page = page
+    
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        st.button("◀ Previous", key="inventory_prev", on_click=change_inventory_page, args=(-1,), disabled=page == 0, use_container_width=True)
+    with col2:
+        st.caption(f"Page {page + 1} of {page_count} • {len(matches)} of {len(machines)} machines")
+    with col3:
+        st.button("Next ▶", key="inventory_next", on_click=change_inventory_page, args=(1,), disabled=page >= page_count - 1, use_container_width=True)
+    if not matches:
+        st.caption("No machines match this filter.")
+    return page_machines
+
+def collect_photo_uploads(other_photos, layout_sketches):
+    """Queue the facility photo and layout sketch uploads; layout_sketches is None when sketches were skipped"""
+    # Photos restored from a draft cannot be put back into the uploaders, so they are kept alongside them
+    restored_other = st.session_state.get('restored_other_photos', [])
+    restored_sketches = st.session_state.get('restored_layout_sketches', []) if layout_sketches is not None else []
+    if restored_other or restored_sketches:
+        st.caption(f"📝 {len(restored_other) + len(restored_sketches)} photos from your saved draft are included.")
+        st.button("Remove saved draft photos", key="clear_restored_photos", on_click=clear_restored_photos)
+    st.session_state.other_photo_keys = list(dict.fromkeys(restored_other + queue_uploads(other_photos or [])))
+    st.session_state.layout_sketch_keys = list(dict.fromkeys(restored_sketches + queue_uploads(layout_sketches or [])))
+    sync_photo_refs()
+    autosave_draft()
+
+def edit_machine_form(edit_idx, photo_heading):
+    """Edit form for the machine at edit_idx, committed by save_edit; photo_heading renders the app's own photo section header"""
+    # Widget keys use the machine's id so they stay with it when machines above are removed
+    machine_id = st.session_state.machines.id_at(edit_idx)
+    machine = st.session_state.machines[edit_idx]
+    type_index, model_index = get_autocomplete()
+    
+    # Edits stay in the form until Save, so typing never reruns the app and Cancel leaves the machine untouched
+    with st.form(key=f"edit_form_{machine_id}", border=False):
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.selectbox(
+                "Machine Type",
+                autocomplete_options(type_index, machine.type),
+                index=0 if machine.type else None,
+                placeholder="e.g., Lathe, Milling Machine, CNC Router",
+                accept_new_options=True,
+                key=f"edit_type_{machine_id}"
+            )
+            st.number_input(
+                "Quantity",
+                min_value=1,
+                max_value=MAX_QUANTITY,
+                value=machine.quantity,
+                key=f"edit_qty_{machine_id}"
+            )
+        
+        with col2:
+            st.selectbox(
+                "Model",
+                autocomplete_options(model_index, machine.model),
+                index=0 if machine.model else None,
+                placeholder="e.g., Haas VF-2, Bridgeport Series I",
+                accept_new_options=True,
+                key=f"edit_model_{machine_id}"
+            )
+            st.text_input(
+                "Additional Info",
+                value=machine.info,
+                placeholder="Serial number, year, modifications, etc.",
+                key=f"edit_info_{machine_id}"
+            )
+        
+        record = get_model_reference().lookup(machine.model) if machine.model else None
+        if record is not None:
+            st.caption(f"📘 {record.name}: {record.summary()}")
+        elif machine.model:
+            st.caption("📘 This model isn't in the offline reference, so it is kept as entered")
+        
+        # Machine photo upload
+        photo_heading()
+        st.file_uploader(
+            f"Upload photo of Machine {edit_idx + 1}",
+            type=["jpg", "jpeg", "png"],
+            key=f"machine_photo_{machine_id}"
+        )
+        if machine.photo:
+            # Restored drafts only carry photo keys; the thumbnail is loaded when the machine is opened
+            try:
+                get_upload_processor().wait(machine.photo)
+                st.image(get_image_pipeline().variant_path(machine.photo), width=160, caption="Current photo; upload another to replace it")
+            except ValueError as e:
+                st.error(f"❌ {e}")
+                machine.photo = None
+                st.session_state.machines[edit_idx] = machine
+        if 'edit_error' in st.session_state:
+            st.error(f"❌ {st.session_state.pop('edit_error')}")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            st.form_submit_button("✅ Save Changes", key=f"save_{machine_id}", on_click=save_edit, args=(machine_id,), use_container_width=True)
+        with col2:
+            st.form_submit_button("❌ Cancel", key=f"cancel_{machine_id}", on_click=finish_editing, args=(False,), use_container_width=True)
+
+@st.fragment
+@profile_section("bulk_import")
+def bulk_import_section():
+    """Spreadsheet upload that streams asset-register rows into the machine inventory"""
+    with st.expander("📄 Import machines from a spreadsheet"):
+        upload = st.file_uploader(
+            "Upload a CSV or XLSX asset register with type, model, info and quantity columns",
+            type=["csv", "xlsx"],
+            key="machine_import_file"
+        )
+        if upload is not None and st.button("Import machines", key="machine_import_run", use_container_width=True):
+            try:
+                result = import_machines(read_rows(upload, upload.name), st.session_state.machines)
+            except ValueError as e:
+                st.error(f"❌ {e}")
+                return
+            st.session_state.machines.extend(result.machines)
+            st.session_state.import_result = result
+            # The inventory lives in another fragment, so refresh the whole app
+            st.rerun()
+        
+        result = st.session_state.get('import_result')
+        if result is not None:
+            st.success(
+                f"Imported {len(result.machines)} of {result.rows_read} rows • "
+                f"{result.duplicate_count} duplicates skipped • {result.error_count} rows with errors"
+            )
+            for error in result.errors:
+                st.caption(error)
+            if result.error_count > len(result.errors):
+                st.caption(f"…and {result.error_count - len(result.errors)} more")
+
+@st.fragment(run_every=2)
+@profile_section("suggestion_backfill")
+def backfill_pending_suggestions():
+    """Swap in AI suggestions that arrived after the hedged catalog answer was served"""
+    pending = st.session_state.get("pending_suggestions")
+    if pending is None:
+        return
+    deadline = get_suggestion_client().deadline_seconds
+    if st.session_state.machines != pending["served"] or time.time() - pending["since"] > deadline:
+        # The user has started editing the list, or the AI answer is not coming
+        del st.session_state.pending_suggestions
+        return
+    suggestions = get_suggestion_cache().get(pending["key"], record_stats=False)
+    if suggestions is None:
+        st.caption("⏳ Still waiting for AI suggestions; showing industry defaults for now.")
+        return
+    del st.session_state.pending_suggestions
+    st.session_state.machines = MachineInventory.from_dicts(suggestions)
+    st.rerun()
+
+def render_sidebar_stats():
+    """Suggestion cache, API client, outbox and streaming counters, kept in the collapsed sidebar for ops"""
+    cache_stats = get_suggestion_cache().stats()
+    st.sidebar.caption(
+        f"Suggestion cache: {cache_stats['hits']} hits • {cache_stats['misses']} misses • {cache_stats['entries']} industries cached"
+    )
+    client_stats = get_suggestion_client().stats()
+    st.sidebar.caption(
+        f"Suggestion API: {client_stats['upstream_calls']} upstream calls • {client_stats['coalesced_calls']} coalesced • "
+        f"circuit {client_stats['circuit'].replace('_', '-')}"
+    )
+    get_metrics_server()
+    
+    # Getting the outbox also starts its worker, so deliveries resume as soon as the app is first opened
+    outbox = get_outbox()
+    if outbox is not None:
+        outbox_stats = outbox.stats()
+        latency = outbox_stats['latency_p95']
+        st.sidebar.caption(
+            f"Outbox: {outbox_stats['queued']} queued • {outbox_stats['dead']} failed • "
+            f"p95 delivery {f'{latency:.1f}s' if latency is not None else 'n/a'} • "
+            f"{'delivering from this worker' if outbox.leader else 'standing by for another worker'}"
+        )
+    if 'suggestion_timing' in st.session_state:
+        timing = st.session_state.suggestion_timing
+        if timing["first_machine_seconds"] is not None:
+            st.sidebar.caption(
+                f"Last AI suggestions: first machine after {timing['first_machine_seconds']:.2f}s, all after {timing['total_seconds']:.2f}s"
+            )
+
+def submit_onboarding(name, email, teammate, notes):
+    """Durably store the onboarding with this session's machines and photos, returning its submission id.
+
+    Stops the script with an error if it can't be saved, so the user can submit again.
+    """
+    other_photos = st.session_state.other_photo_keys
+    layout_sketches = st.session_state.layout_sketch_keys
+    try:
+        submission_id = get_submission_store().submit({
+            "name": name,
+            "email": email,
+            "teammate": teammate,
+            "notes": notes,
+            "machines": st.session_state.machines.to_dicts(),
+            "layout_option": st.session_state.layout_option,
+            "other_photos": other_photos,
+            "layout_sketches": layout_sketches,
+        })
+    except (OSError, TimeoutError):
+        st.error("❌ We couldn't save your onboarding. Please try submitting again.")
+        st.stop()
+    # The draft has served its purpose; the submission now holds its photos
+    if st.session_state.draft_token is not None:
+        get_draft_store().delete(st.session_state.draft_token)
+        get_photo_store().set_refs(f"draft:{st.session_state.draft_token}", [])
+        del st.query_params["draft"]
+    st.session_state.draft_submitted = True
+    # The submission keeps its photos once this session's own references expire
+    get_photo_store().set_refs(
+        f"submission:{submission_id}",
+        set(st.session_state.machines.photo_keys()) | set(other_photos) | set(layout_sketches)
+    )
+    return submission_id
@@ -0,0 +1,175 @@
+import fcntl
+import hashlib
+import json
+import random
+import sqlite3
+import threading
+import time
+from collections import deque
+
+import httpx
+
+import http_client
+
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_CAP_SECONDS = 300.0
+
+
+class Outbox:
+    """Background worker that delivers stored submissions to CRM/webhook endpoints.
+
+    Delivery state lives in a deliveries table next to the submissions, so a restart picks
+    up where it left off. Each poll, every endpoint gets up to batch_size due submissions in
+    one POST. Failed batches are retried with full-jitter exponential backoff until
+    max_attempts, after which they stay dead-lettered in the table. Every submission
+    carries its id as an idempotency key, so a receiver can drop repeats after a retry.
+    With a lock_path, only the process holding that file's lock delivers; outboxes in other
+    worker processes stand by and take over when it exits.
+    """
+
+    def __init__(self, db_path, endpoints, headers=None, batch_size=50, max_attempts=10, poll_seconds=1.0, lock_path=None):
+        self.endpoints = list(endpoints)
+        self.lock_path = lock_path
+        self.leader = lock_path is None
+        self.headers = headers or {}
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.poll_seconds = poll_seconds
+        self.delivered = 0
+        self.failed_batches = 0
+        self._latencies = deque(maxlen=1000)
+        # Rowids follow the order submissions reached SQLite, so records replayed late from a
+        # dead worker's log are still new here even though their created_at is old. Only
+        # rows past this rowid are checked for new work; 0 rescans everything once at startup.
+        self._watermark = 0
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS deliveries "
+            "(submission_id TEXT NOT NULL, endpoint TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, "
+            "next_attempt_at REAL NOT NULL, delivered_at REAL, last_error TEXT, "
+            "PRIMARY KEY (submission_id, endpoint))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS deliveries_due ON deliveries (endpoint, delivered_at, next_attempt_at)")
+        self._db.commit()
+        self._thread = threading.Thread(target=self._run, name="outbox", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._wake.set()
+        self._thread.join()
+
+    def _run(self):
+        if self.lock_path is not None:
+            lock = open(self.lock_path, "a")
+            while not self._stopped.is_set():
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    self.leader = True
+                    break
+                except BlockingIOError:
+                    self._wake.wait(self.poll_seconds)
+                    self._wake.clear()
+        while not self._stopped.is_set():
+            try:
+                if self.deliver_due():
+                    # A full batch means there is a backlog; keep draining without waiting
+                    continue
+            except sqlite3.Error:
+                # The submission store may be mid-compaction; try again next poll
+                pass
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
+
+    def deliver_due(self):
+        """Queue new submissions and send one batch per endpoint with work due; True if any batch was full"""
+        now = time.time()
+        with self._lock:
+            latest = self._db.execute("SELECT MAX(rowid) FROM submissions").fetchone()[0]
+            if latest is not None and latest > self._watermark:
+                for endpoint in self.endpoints:
+                    self._db.execute(
+                        "INSERT OR IGNORE INTO deliveries (submission_id, endpoint, next_attempt_at) "
+                        "SELECT id, ?, created_at FROM submissions WHERE rowid > ? AND rowid <= ?",
+                        (endpoint, self._watermark, latest)
+                    )
+                self._db.commit()
+                self._watermark = latest
+        backlog = False
+        for endpoint in self.endpoints:
+            with self._lock:
+                batch = self._db.execute(
+                    "SELECT s.id, s.created_at, s.payload, d.attempts FROM deliveries d "
+                    "JOIN submissions s ON s.id = d.submission_id "
+                    "WHERE d.endpoint = ? AND d.delivered_at IS NULL AND d.attempts < ? AND d.next_attempt_at <= ? "
+                    "ORDER BY d.next_attempt_at LIMIT ?",
+                    (endpoint, self.max_attempts, now, self.batch_size)
+                ).fetchall()
+            if batch:
+                self._send(endpoint, batch)
+                backlog = backlog or len(batch) == self.batch_size
+        return backlog
+
+    def _send(self, endpoint, batch):
+        ids = [row[0] for row in batch]
+        body = {"submissions": [
+            {"id": submission_id, "idempotency_key": submission_id, "created_at": created_at, "payload": json.loads(payload)}
+            for submission_id, created_at, payload, _ in batch
+        ]}
+        # Retries resend the same batch key, so receivers can dedupe whole batches as well as items
+        headers = {**self.headers, "Idempotency-Key": hashlib.sha256(",".join(ids).encode()).hexdigest()}
+        error = None
+        try:
+            response = http_client.run(http_client.post_json(endpoint, body, headers=headers, max_retries=0))
+            if not 200 <= response.status_code < 300:
+                error = f"HTTP {response.status_code}"
+        except (httpx.HTTPError, httpx.InvalidURL) as e:
+            error = f"{type(e).__name__}: {e}"
+        now = time.time()
+        with self._lock:
+            if error is None:
+                self._db.executemany(
+                    "UPDATE deliveries SET delivered_at = ?, attempts = attempts + 1, last_error = NULL "
+                    "WHERE submission_id = ? AND endpoint = ?",
+                    [(now, submission_id, endpoint) for submission_id in ids]
+                )
+                self.delivered += len(ids)
+                self._latencies.extend(now - created_at for _, created_at, _, _ in batch)
+            else:
+                self._db.executemany(
+                    "UPDATE deliveries SET attempts = attempts + 1, next_attempt_at = ?, last_error = ? "
+                    "WHERE submission_id = ? AND endpoint = ?",
+                    [(now + self.backoff_delay(attempts), error, submission_id, endpoint)
+                     for submission_id, _, _, attempts in batch]
+                )
+                self.failed_batches += 1
+            self._db.commit()
+
+    @staticmethod
+    def backoff_delay(attempts):
+        """Full-jitter exponential backoff for a submission that has failed `attempts` times before"""
+        return random.uniform(0, min(BACKOFF_CAP_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempts))
+
+    def stats(self):
+        """Return queue depth, dead letters and submit-to-delivery latency for the sidebar and load tests"""
+        with self._lock:
+            queued, dead = self._db.execute(
+                "SELECT COALESCE(SUM(attempts < ?), 0), COALESCE(SUM(attempts >= ?), 0) "
+                "FROM deliveries WHERE delivered_at IS NULL",
+                (self.max_attempts, self.max_attempts)
+            ).fetchone()
+            latencies = sorted(self._latencies)
+        return {
+            "queued": queued,
+            "dead": dead,
+            "delivered": self.delivered,
+            "failed_batches": self.failed_batches,
+            "latency_p50": latencies[len(latencies) // 2] if latencies else None,
+            "latency_p95": latencies[int(len(latencies) * 0.95)] if latencies else None,
+        }
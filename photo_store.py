@@ -0,0 +1,128 @@
+import hashlib
+import io
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class PhotoStore:
+    """Content-addressed photo store on local disk, keyed by the SHA-256 of each photo.
+
+    Session state only keeps keys, and each distinct image is stored once however many
+    machines, sections or sessions point at it. Owners (a session, a submission) declare
+    the keys they use with set_refs(), and collect() deletes photos nobody references.
+    Derived files such as thumbnails live under "<key>-<suffix>" and go with their photo.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        # Shared by every app worker using this directory, so wait out their writes
+        self._db = sqlite3.connect(os.path.join(directory, "refs.sqlite3"), timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS refs "
+            "(owner TEXT NOT NULL, key TEXT NOT NULL, expires_at REAL, PRIMARY KEY (owner, key))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS refs_by_key ON refs (key)")
+        self._db.commit()
+
+    def path(self, key):
+        """Filesystem path of a stored photo; st.image accepts it directly"""
+        # Shard by the first two hex digits so no directory grows too large
+        return os.path.join(self.directory, key[:2], key)
+
+    def exists(self, key):
+        return os.path.exists(self.path(key))
+
+    @staticmethod
+    def key_for(data):
+        return hashlib.sha256(data).hexdigest()
+
+    def put(self, data):
+        """Store photo bytes and return their key"""
+        return self.put_file(io.BytesIO(data))
+
+    def put_file(self, file, chunk_size=CHUNK_SIZE):
+        """Stream a file object into the store chunk by chunk, hashing as it goes; returns the key"""
+        file.seek(0)
+        digest = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for chunk in iter(lambda: file.read(chunk_size), b""):
+                    digest.update(chunk)
+                    out.write(chunk)
+            key = digest.hexdigest()
+            if self.exists(key):
+                os.remove(tmp_path)
+                # A fresh upload restarts the grace period collect() gives unclaimed photos
+                os.utime(self.path(key))
+            else:
+                self._commit(tmp_path, key)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return key
+
+    def write(self, key, data):
+        """Store bytes under an explicit key, e.g. a derived thumbnail of a stored photo"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".part")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        self._commit(tmp_path, key)
+
+    def _commit(self, tmp_path, key):
+        # Rename into place so readers never see a partial photo
+        os.makedirs(os.path.dirname(self.path(key)), exist_ok=True)
+        os.replace(tmp_path, self.path(key))
+
+    def get(self, key):
+        with open(self.path(key), "rb") as f:
+            return f.read()
+
+    def set_refs(self, owner, keys, expires_at=None):
+        """Replace the set of photos owner references.
+
+        References with an expires_at (e.g. a browser session that may be abandoned)
+        stop counting once it passes; owners refresh them by calling set_refs again.
+        """
+        with self._lock:
+            self._db.execute("DELETE FROM refs WHERE owner = ?", (owner,))
+            self._db.executemany(
+                "INSERT OR IGNORE INTO refs (owner, key, expires_at) VALUES (?, ?, ?)",
+                [(owner, key, expires_at) for key in keys]
+            )
+            self._db.commit()
+
+    def collect(self, grace_seconds=60 * 60):
+        """Delete unreferenced photos and their derived files, returning how many photos were removed.
+
+        Files newer than grace_seconds are kept so uploads a session has not claimed yet survive.
+        """
+        now = time.time()
+        with self._lock:
+            self._db.execute("DELETE FROM refs WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+            self._db.commit()
+            referenced = {row[0] for row in self._db.execute("SELECT DISTINCT key FROM refs")}
+        removed = 0
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(".part") and entry.stat().st_mtime < now - grace_seconds:
+                # Left behind by a write that crashed part way through
+                os.remove(entry.path)
+            if not entry.is_dir():
+                continue
+            for blob in os.scandir(entry.path):
+                key = blob.name.split("-", 1)[0]
+                if key in referenced or blob.stat().st_mtime >= now - grace_seconds:
+                    continue
+                os.remove(blob.path)
+                if key == blob.name:
+                    removed += 1
+        return removed
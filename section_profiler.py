@@ -0,0 +1,159 @@
+import contextlib
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+logger = logging.getLogger("onboarding.profile")
+if not logger.handlers:
+    # Streamlit only shows warnings from other loggers, and PROFILE_LOG lines are info
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(asctime)s %(name)s %(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+# section -> [calls, seconds, elements] across every session in the process, for /metrics
+_totals = {}
+_reruns = [0, 0.0]
+_lock = threading.Lock()
+
+
+def _delta_counter():
+    """Running count of deltas this session has sent, or None outside a script run"""
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return None
+    counter = getattr(ctx, "section_delta_count", None)
+    if counter is None:
+        # Every element and block reaches the browser through ctx.enqueue, so count them there
+        counter = ctx.section_delta_count = [0]
+        enqueue = ctx.enqueue
+
+        def counting_enqueue(msg):
+            if msg.HasField("delta"):
+                counter[0] += 1
+            enqueue(msg)
+
+        ctx.enqueue = counting_enqueue
+    return counter
+
+
+@contextlib.contextmanager
+def profile_section(name):
+    """Time a page section and count the elements it renders; works as a decorator too.
+
+    Results go to this session's profile (see render_profile_panel) and to the
+    process-wide totals served by metrics_text().
+    """
+    counter = _delta_counter()
+    before = counter[0] if counter else 0
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        elements = counter[0] - before if counter else 0
+        profile = st.session_state.setdefault('section_profile', {})
+        stats = profile.setdefault(name, {"runs": 0, "total_seconds": 0.0})
+        stats["runs"] += 1
+        stats["total_seconds"] += seconds
+        stats["last_seconds"] = seconds
+        stats["last_elements"] = elements
+        stats["finished_at"] = time.perf_counter()
+        with _lock:
+            totals = _totals.setdefault(name, [0, 0.0, 0])
+            totals[0] += 1
+            totals[1] += seconds
+            totals[2] += elements
+
+
+def start_rerun():
+    """Mark the start of a full rerun; fragment reruns only update their own sections"""
+    st.session_state.profile_rerun_started = time.perf_counter()
+
+
+def finish_rerun(log=False):
+    """Record the full rerun's wall time and optionally log it as one line per rerun"""
+    seconds = time.perf_counter() - st.session_state.profile_rerun_started
+    st.session_state.profile_rerun_seconds = seconds
+    with _lock:
+        _reruns[0] += 1
+        _reruns[1] += seconds
+    if log:
+        started = st.session_state.profile_rerun_started
+        sections = " ".join(
+            f"{name}={stats['last_seconds'] * 1000:.1f}ms/{stats['last_elements']}"
+            for name, stats in st.session_state.get('section_profile', {}).items()
+            if stats["finished_at"] >= started
+        )
+        logger.info("rerun total=%.1fms %s", seconds * 1000, sections)
+
+
+def render_profile_panel():
+    """Sidebar table of this session's section timings, for debugging slow reruns"""
+    profile = st.session_state.get('section_profile', {})
+    with st.sidebar.expander("⏱️ Rerun profile"):
+        st.caption(f"Last full rerun: {st.session_state.get('profile_rerun_seconds', 0) * 1000:.1f} ms")
+        st.table([
+            {
+                "section": name,
+                "last ms": round(stats["last_seconds"] * 1000, 1),
+                "elements": stats["last_elements"],
+                "runs": stats["runs"],
+                "avg ms": round(stats["total_seconds"] / stats["runs"] * 1000, 1),
+            }
+            for name, stats in profile.items()
+        ])
+
+
+def metrics_text():
+    """Process-wide section totals in the Prometheus text exposition format"""
+    with _lock:
+        totals = sorted(_totals.items())
+        reruns = list(_reruns)
+    lines = [
+        "# HELP onboarding_section_seconds Wall time spent rendering each page section.",
+        "# TYPE onboarding_section_seconds summary",
+    ]
+    for name, (calls, seconds, _) in totals:
+        lines.append(f'onboarding_section_seconds_sum{{section="{name}"}} {seconds:.6f}')
+        lines.append(f'onboarding_section_seconds_count{{section="{name}"}} {calls}')
+    lines += [
+        "# HELP onboarding_section_elements_total Elements and blocks sent to the browser by each section.",
+        "# TYPE onboarding_section_elements_total counter",
+    ]
+    lines += [f'onboarding_section_elements_total{{section="{name}"}} {elements}' for name, (_, _, elements) in totals]
+    lines += [
+        "# HELP onboarding_rerun_seconds Wall time of full script reruns.",
+        "# TYPE onboarding_rerun_seconds summary",
+        f"onboarding_rerun_seconds_sum {reruns[1]:.6f}",
+        f"onboarding_rerun_seconds_count {reruns[0]}",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = metrics_text().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve_metrics(port, host="127.0.0.1"):
+    """Serve metrics_text() at http://host:port/metrics from a daemon thread"""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="profile-metrics", daemon=True).start()
+    return server
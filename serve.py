@@ -0,0 +1,75 @@
+"""Run several Streamlit workers for one app behind a sticky-session reverse proxy.
+
+Each worker is a separate `streamlit run` process with its own interpreter and GIL.
+The workers share the photo store, suggestion cache, draft store and submission store
+on local disk (see README, Configuration). Dead workers are restarted.
+
+    python serve.py [--workers 4] [--port 8501] [--host 0.0.0.0] [--app onboarding_app.py]
+"""
+import argparse
+import asyncio
+import os
+import secrets
+import signal
+import subprocess
+import sys
+import tempfile
+
+from sticky_proxy import StickyProxy
+
+
+def start_worker(args, index, cookie_secret):
+    # Shared so a browser moved to another worker keeps a valid XSRF cookie
+    env = dict(os.environ, STREAMLIT_SERVER_COOKIE_SECRET=cookie_secret)
+    # In-memory suggestion caches would make each worker pay for the same API calls
+    env.setdefault("SUGGESTION_CACHE_PATH", os.path.join(tempfile.gettempdir(), "onboarding_suggestions.sqlite3"))
+    if env.get("PROFILE_METRICS_PORT"):
+        env["PROFILE_METRICS_PORT"] = str(int(env["PROFILE_METRICS_PORT"]) + index)
+    return subprocess.Popen([
+        sys.executable, "-m", "streamlit", "run", args.app,
+        "--server.port", str(args.worker_port + index),
+        "--server.address", "127.0.0.1",
+        "--server.headless", "true",
+    ], env=env)
+
+
+async def supervise(args, workers, cookie_secret):
+    while True:
+        await asyncio.sleep(1)
+        for index, worker in enumerate(workers):
+            if worker.poll() is not None:
+                print(f"worker {index} exited with {worker.returncode}; restarting", file=sys.stderr)
+                workers[index] = start_worker(args, index, cookie_secret)
+
+
+async def main(args):
+    cookie_secret = os.environ.get("STREAMLIT_SERVER_COOKIE_SECRET") or secrets.token_hex(32)
+    workers = [start_worker(args, index, cookie_secret) for index in range(args.workers)]
+    proxy = StickyProxy([("127.0.0.1", args.worker_port + index) for index in range(args.workers)])
+    loop = asyncio.get_running_loop()
+    stopped = loop.create_future()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopped.cancel)
+    print(f"Serving {args.app} with {args.workers} workers on http://{args.host}:{args.port}", file=sys.stderr)
+    tasks = [asyncio.create_task(proxy.serve(args.host, args.port)), asyncio.create_task(supervise(args, workers, cookie_secret))]
+    try:
+        await stopped
+    except asyncio.CancelledError:
+        pass
+    finally:
+        for task in tasks:
+            task.cancel()
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", default="onboarding_app.py")
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1)))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 8501)))
+    parser.add_argument("--worker-port", type=int, default=8600, help="first worker port; worker i listens on this + i")
+    asyncio.run(main(parser.parse_args()))
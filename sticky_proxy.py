@@ -0,0 +1,84 @@
+import asyncio
+import itertools
+import re
+
+COOKIE_NAME = "onboarding_worker"
+MAX_HEAD_BYTES = 64 * 1024
+
+
+class StickyProxy:
+    """Reverse proxy that pins each browser to one Streamlit worker with a cookie.
+
+    Streamlit keeps a session's state in the process its websocket is connected to, so
+    every request from a browser, including websocket reconnects, has to reach the same
+    worker. New browsers are spread round-robin and told their worker in a cookie. If a
+    pinned worker is down the browser is moved to a live one, where its session restarts
+    (and can be resumed from its draft link). Only the request head is parsed; bodies and
+    websocket frames are piped through untouched.
+    """
+
+    def __init__(self, backends):
+        self.backends = list(backends)
+        self._next = itertools.cycle(range(len(self.backends)))
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self._handle, host, port, limit=MAX_HEAD_BYTES)
+        async with server:
+            await server.serve_forever()
+
+    def _pinned(self, head):
+        match = re.search(rb"^cookie:.*\b%s=(\d+)" % COOKIE_NAME.encode(), head, re.IGNORECASE | re.MULTILINE)
+        if match and int(match.group(1)) < len(self.backends):
+            return int(match.group(1))
+        return None
+
+    async def _handle(self, client_reader, client_writer):
+        try:
+            head = await client_reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            client_writer.close()
+            return
+        pinned = self._pinned(head)
+        first = pinned if pinned is not None else next(self._next)
+        for index in [first] + [i for i in range(len(self.backends)) if i != first]:
+            try:
+                upstream_reader, upstream_writer = await asyncio.open_connection(*self.backends[index])
+                break
+            except OSError:
+                continue
+        else:
+            client_writer.write(b"HTTP/1.1 502 Bad Gateway\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            await client_writer.drain()
+            client_writer.close()
+            return
+        upstream_writer.write(head)
+        await asyncio.gather(
+            self._pipe(client_reader, upstream_writer),
+            self._pipe_response(upstream_reader, client_writer, None if index == pinned else index),
+        )
+
+    async def _pipe_response(self, reader, writer, assign):
+        if assign is not None:
+            # Pin the browser to this worker with the first response on the connection
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                writer.close()
+                return
+            cookie = f"Set-Cookie: {COOKIE_NAME}={assign}; Path=/; HttpOnly; SameSite=Lax\r\n".encode()
+            writer.write(head[:-2] + cookie + b"\r\n")
+        await self._pipe(reader, writer)
+
+    @staticmethod
+    async def _pipe(reader, writer):
+        try:
+            while True:
+                data = await reader.read(64 * 1024)
+                if not data:
+                    break
+                writer.write(data)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,46 @@
+import json
+
+
+class ObjectStreamParser:
+    """Incrementally extracts top-level JSON objects from streamed text such as a JSON array.
+
+    Anything outside an object (array brackets, commas, markdown fences) is skipped, so
+    objects can be handed to the UI as soon as their closing brace arrives.
+    """
+
+    def __init__(self):
+        self._buffer = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, text):
+        """Consume the next chunk of text and return the objects it completed"""
+        objects = []
+        for char in text:
+            if self._depth == 0:
+                if char == "{":
+                    self._depth = 1
+                    self._buffer = [char]
+                continue
+            self._buffer.append(char)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._depth += 1
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        objects.append(json.loads("".join(self._buffer)))
+                    except json.JSONDecodeError:
+                        # Skip a malformed object rather than dropping the rest of the stream
+                        pass
+        return objects
@@ -0,0 +1,44 @@
+import hashlib
+import os
+import re
+import threading
+
+STYLESHEET_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# path -> (mtime_ns, size, sha256, <style> tag); shared by every session in the process
+_cache = {}
+_lock = threading.Lock()
+
+
+def minify_css(css):
+    """Strip comments and the whitespace browsers ignore from a stylesheet"""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    # Only the space after a colon is safe to drop; "a :hover" and "a:hover" are different selectors
+    css = re.sub(r":\s+", ":", css)
+    return css.replace(";}", "}").replace(" !important", "!important").strip()
+
+
+def style_tag(filename):
+    """Minified <style> block for a stylesheet next to the apps.
+
+    The file is read and minified once per process; later reruns only stat it. A changed
+    mtime triggers a re-read, and the content hash decides whether it is minified again.
+    """
+    path = os.path.join(STYLESHEET_DIR, filename)
+    stat = os.stat(path)
+    with _lock:
+        cached = _cache.get(path)
+    if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[3]
+    with open(path, "rb") as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()
+    if cached is not None and cached[2] == digest:
+        tag = cached[3]
+    else:
+        tag = f"<style>{minify_css(data.decode())}</style>"
+    with _lock:
+        _cache[path] = (stat.st_mtime_ns, stat.st_size, digest, tag)
+    return tag
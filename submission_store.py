@@ -0,0 +1,213 @@
+import fcntl
+import glob
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from concurrent.futures import Future
+
+
+class SubmissionStore:
+    """Durable onboarding submissions: an append-only log compacted into SQLite.
+
+    submit() returns once its record is fsynced to the log. A single writer thread drains
+    every submit queued while the previous fsync was running, so one fsync covers a whole
+    batch of concurrent sessions. Logged records are compacted into an indexed SQLite table
+    once compact_threshold accumulate or compact_seconds pass, and any records still in the
+    log at startup are replayed, so a crash never loses an acknowledged submission.
+
+    Several app worker processes can share a directory: each one holds an flock on its own
+    numbered log, and a starting process also replays logs whose owner has died.
+    """
+
+    def __init__(self, directory, max_batch=512, compact_threshold=1000, compact_seconds=1.0):
+        self.directory = directory
+        self.max_batch = max_batch
+        self.compact_threshold = compact_threshold
+        self.compact_seconds = compact_seconds
+        self.submitted = 0
+        self.batches = 0
+        os.makedirs(directory, exist_ok=True)
+        self._db_lock = threading.Lock()
+        self.db_path = os.path.join(directory, "submissions.sqlite3")
+        # Other workers may be compacting into the same database; wait for their write lock
+        self._db = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS submissions "
+            "(id TEXT PRIMARY KEY, created_at REAL NOT NULL, email TEXT, payload TEXT NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS submissions_by_email ON submissions (email)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS submissions_by_time ON submissions (created_at)")
+        self._db.commit()
+        self._log = self._claim_log()
+        # Records fsynced to the log but not yet in SQLite, guarded by _db_lock
+        self._uncompacted = self._replay(self._log.name)
+        self._compact()
+        # Also drops a torn final line, which would otherwise hide every record appended after it
+        self._log.truncate(0)
+        self._recover_orphaned_logs()
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self._run, name="submission-log", daemon=True)
+        self._writer.start()
+
+    @staticmethod
+    def _encode(record):
+        body = json.dumps(record, separators=(",", ":")).encode()
+        # The checksum lets replay tell a torn final line from a complete record
+        return b"%08x %s\n" % (zlib.crc32(body), body)
+
+    def _claim_log(self):
+        """Open and lock the first log no other live process holds"""
+        slot = 0
+        while True:
+            log = open(os.path.join(self.directory, f"submissions-{slot}.log"), "ab")
+            try:
+                # Held until this process exits, however it exits
+                fcntl.flock(log, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return log
+            except BlockingIOError:
+                log.close()
+                slot += 1
+
+    def _recover_orphaned_logs(self):
+        """Compact the logs of processes that died before compacting them"""
+        # submissions.log is the single log written before stores could be shared
+        for path in glob.glob(os.path.join(self.directory, "submissions*.log")):
+            if path == self._log.name:
+                continue
+            with open(path, "ab") as log:
+                try:
+                    fcntl.flock(log, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue
+                records = self._replay(path)
+                if records:
+                    with self._db_lock:
+                        self._insert(records)
+                log.truncate(0)
+                os.fsync(log.fileno())
+
+    def _replay(self, path):
+        records = []
+        if not os.path.exists(path):
+            return records
+        with open(path, "rb") as f:
+            for line in f:
+                checksum, _, body = line.rstrip(b"\n").partition(b" ")
+                if not line.endswith(b"\n") or checksum != b"%08x" % zlib.crc32(body):
+                    # Only an unacknowledged write can be torn, and only at the end
+                    break
+                records.append(json.loads(body))
+        return records
+
+    def submit(self, payload, timeout=30):
+        """Durably record a submission payload and return its id.
+
+        Raises OSError if the log cannot be written, or TimeoutError if the writer falls behind.
+        """
+        record = {"id": uuid.uuid4().hex, "created_at": time.time(), "payload": payload}
+        future = Future()
+        self._queue.put((self._encode(record), record, future))
+        future.result(timeout)
+        return record["id"]
+
+    def _run(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=self.compact_seconds)
+            except queue.Empty:
+                if self._uncompacted:
+                    self._compact()
+                continue
+            if item is None:
+                break
+            batch = [item]
+            # Everything that queued up during the last fsync rides along with this one
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)
+                    break
+                batch.append(item)
+            # The log is in append mode and _compact() truncates it, so tell() alone can be stale
+            offset = self._log.seek(0, os.SEEK_END)
+            try:
+                self._log.write(b"".join(line for line, _, _ in batch))
+                self._log.flush()
+                os.fsync(self._log.fileno())
+            except OSError as e:
+                # Cut off the partial batch so later records are not appended after a torn line
+                self._log.truncate(offset)
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.submitted += len(batch)
+            with self._db_lock:
+                self._uncompacted.extend(record for _, record, _ in batch)
+            for _, _, future in batch:
+                future.set_result(None)
+            # Compact on a timer too, so readers such as the outbox see records promptly under steady load
+            if len(self._uncompacted) >= self.compact_threshold or time.monotonic() - self._last_compact >= self.compact_seconds:
+                self._compact()
+        self._compact()
+        self._log.close()
+
+    def _compact(self):
+        """Move logged records into SQLite, then truncate the log"""
+        self._last_compact = time.monotonic()
+        if not self._uncompacted:
+            return
+        with self._db_lock:
+            self._insert(self._uncompacted)
+            self._uncompacted = []
+        self._log.truncate(0)
+        os.fsync(self._log.fileno())
+
+    def _insert(self, records):
+        rows = [
+            (record["id"], record["created_at"], record["payload"].get("email"), json.dumps(record["payload"]))
+            for record in records
+        ]
+        # Replaying a log that was compacted just before a crash re-inserts the same ids
+        self._db.executemany(
+            "INSERT OR IGNORE INTO submissions (id, created_at, email, payload) VALUES (?, ?, ?, ?)", rows
+        )
+        self._db.commit()
+
+    def get(self, submission_id):
+        """Return a submission's payload, or None if there is no such submission"""
+        with self._db_lock:
+            for record in self._uncompacted:
+                if record["id"] == submission_id:
+                    return record["payload"]
+            row = self._db.execute("SELECT payload FROM submissions WHERE id = ?", (submission_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def count(self):
+        """Number of durable submissions, compacted or not"""
+        with self._db_lock:
+            compacted = self._db.execute("SELECT COUNT(*) FROM submissions").fetchone()[0]
+            return compacted + len(self._uncompacted)
+
+    def close(self):
+        """Stop the writer after it has logged and compacted everything queued"""
+        self._queue.put(None)
+        self._writer.join()
+
+    def stats(self):
+        """Return submit and fsync counters so batching can be checked under load"""
+        return {
+            "submitted": self.submitted,
+            "fsyncs": self.batches,
+            "per_fsync": self.submitted / self.batches if self.batches else 0.0,
+            "uncompacted": len(self._uncompacted),
+        }
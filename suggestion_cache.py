@@ -0,0 +1,94 @@
+import copy
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class SuggestionCache:
+    """Thread-safe TTL + LRU cache for machine suggestions, optionally backed by SQLite on disk.
+
+    Keys are tuples such as (industry, prompt_version, model). Values must be
+    JSON-serializable so they can be written to the on-disk store.
+    """
+
+    def __init__(self, max_entries=128, ttl_seconds=24 * 60 * 60, path=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            # Several app workers can share one file, so wait out their writes
+            self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS suggestions "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def _encode_key(key):
+        return json.dumps(list(key))
+
+    def get(self, key, record_stats=True):
+        """Return a copy of the cached value for key, or None on a miss"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= now:
+                del self._entries[key]
+                entry = None
+            if entry is None and self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM suggestions WHERE key = ?",
+                    (self._encode_key(key),)
+                ).fetchone()
+                if row and row[1] > now:
+                    entry = (json.loads(row[0]), row[1])
+                    self._store(key, entry)
+            if entry is None:
+                if record_stats:
+                    self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            if record_stats:
+                self.hits += 1
+            # Callers mutate suggestions in session state, so never hand out the shared object
+            return copy.deepcopy(entry[0])
+
+    def set(self, key, value):
+        """Cache value under key for the configured TTL"""
+        expires_at = time.time() + self.ttl_seconds
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._store(key, (value, expires_at))
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO suggestions (key, value, expires_at) VALUES (?, ?, ?)",
+                    (self._encode_key(key), json.dumps(value), expires_at)
+                )
+                self._db.execute("DELETE FROM suggestions WHERE expires_at <= ?", (time.time(),))
+                self._db.commit()
+
+    def _store(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self):
+        """Return hit/miss counters so we can see how much API traffic the cache saves"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+            }
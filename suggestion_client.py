@@ -0,0 +1,203 @@
+import asyncio
+import json
+import queue
+import time
+
+import http_client
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+class SuggestionsPending(Exception):
+    """Raised when a hedged call misses its latency budget; the upstream call keeps running"""
+
+
+class _SharedStream:
+    """One upstream completion stream, the deltas received so far and the queues of its readers"""
+
+    def __init__(self):
+        self.chunks = []
+        self.readers = []
+        self.task = None
+        # Set when a reader gave up waiting for a delta, so cancelling counts as a failure
+        self.stalled = False
+
+
+class SuggestionClient:
+    """Sends LLM suggestion requests over the shared HTTP client loop.
+
+    Identical in-flight requests, streamed or not, are coalesced into one upstream call,
+    the number of concurrent upstream calls is capped, and every caller waits at most
+    deadline_seconds. A circuit breaker refuses new upstream calls while the API is
+    failing or slow.
+    """
+
+    def __init__(self, api_url, max_concurrency=8, deadline_seconds=10.0, breaker=None):
+        self.api_url = api_url
+        self.deadline_seconds = deadline_seconds
+        self.breaker = breaker or CircuitBreaker(slow_call_seconds=deadline_seconds)
+        self.upstream_calls = 0
+        self.coalesced_calls = 0
+        self._in_flight = {}
+        self._streams = {}
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    def post(self, key, headers, payload, hedge_seconds=None, on_late_response=None):
+        """Post payload to the API from a script thread; callers with the same key share one call.
+
+        Returns the httpx.Response. Raises CircuitOpenError while the circuit is open and
+        TimeoutError once the deadline passes. With hedge_seconds, raises SuggestionsPending
+        if the API has not answered within that budget; on_late_response is then called
+        from the loop thread with the response if it still arrives.
+        """
+        future = asyncio.run_coroutine_threadsafe(self._post(key, headers, payload), http_client.get_loop())
+        if hedge_seconds is None:
+            return future.result()
+        try:
+            return future.result(timeout=hedge_seconds)
+        except TimeoutError:
+            if future.done():
+                # The call itself hit its deadline rather than the hedge budget
+                raise
+            if on_late_response is not None:
+                future.add_done_callback(lambda done: self._deliver_late(done, on_late_response))
+            raise SuggestionsPending(f"No answer within {hedge_seconds}s")
+
+    @staticmethod
+    def _deliver_late(future, on_late_response):
+        if not future.cancelled() and future.exception() is None:
+            on_late_response(future.result())
+
+    async def _post(self, key, headers, payload):
+        task = self._in_flight.get(key)
+        if task is None:
+            if not self.breaker.allow():
+                raise CircuitOpenError("Suggestion API circuit is open")
+            task = asyncio.ensure_future(self._send(headers, payload))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.coalesced_calls += 1
+        # Shield the shared task so one caller timing out does not cancel it for the others
+        return await asyncio.wait_for(asyncio.shield(task), self.deadline_seconds)
+
+    def _finish(self, key, task):
+        self._in_flight.pop(key, None)
+        if not task.cancelled():
+            # Mark the error as retrieved; callers still waiting re-raise it themselves
+            task.exception()
+
+    async def _send(self, headers, payload):
+        async with self._semaphore:
+            self.upstream_calls += 1
+            started = time.monotonic()
+            try:
+                response = await http_client.post_json(self.api_url, payload, headers=headers)
+            except Exception:
+                self.breaker.record_failure()
+                raise
+            if response.status_code in http_client.RETRY_STATUSES:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success(time.monotonic() - started)
+            return response
+
+    def stream(self, key, headers, payload):
+        """Yield content deltas of a streamed completion as they arrive; callers with the same key share one stream.
+
+        A caller joining a stream already under way first gets the deltas sent so far.
+        Raises CircuitOpenError while the circuit is open, and TimeoutError if no delta
+        arrives within deadline_seconds of the previous one.
+        """
+        loop = http_client.get_loop()
+        reader = queue.Queue()
+        asyncio.run_coroutine_threadsafe(self._join_stream(key, headers, payload, reader), loop).result()
+        stalled = False
+        try:
+            while True:
+                try:
+                    chunk = reader.get(timeout=self.deadline_seconds)
+                except queue.Empty:
+                    stalled = True
+                    raise TimeoutError("Suggestion stream stalled")
+                if chunk is None:
+                    break
+                if isinstance(chunk, BaseException):
+                    # Surface upstream errors raised after the last delta
+                    raise chunk
+                yield chunk
+        finally:
+            loop.call_soon_threadsafe(self._leave_stream, key, reader, stalled)
+
+    async def _join_stream(self, key, headers, payload, reader):
+        shared = self._streams.get(key)
+        if shared is None:
+            if not self.breaker.allow():
+                raise CircuitOpenError("Suggestion API circuit is open")
+            shared = self._streams[key] = _SharedStream()
+            shared.task = asyncio.ensure_future(self._stream(key, shared, headers, payload))
+        else:
+            self.coalesced_calls += 1
+        for chunk in shared.chunks:
+            reader.put(chunk)
+        shared.readers.append(reader)
+
+    def _leave_stream(self, key, reader, stalled=False):
+        shared = self._streams.get(key)
+        if shared is None or reader not in shared.readers:
+            return
+        shared.readers.remove(reader)
+        shared.stalled = shared.stalled or stalled
+        if not shared.readers:
+            # Nobody is reading any more: every caller gave up on a stalled stream, or
+            # Streamlit stopped their scripts because the user moved on
+            shared.task.cancel()
+
+    async def _stream(self, key, shared, headers, payload):
+        started = time.monotonic()
+        first_delta_seconds = None
+        end = None
+        try:
+            async with self._semaphore:
+                self.upstream_calls += 1
+                async for line in http_client.stream_lines(self.api_url, payload, headers=headers):
+                    # Server-sent events: "data: {...}" lines terminated by "data: [DONE]"
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    delta = json.loads(data)["choices"][0]["delta"].get("content")
+                    if delta:
+                        if first_delta_seconds is None:
+                            first_delta_seconds = time.monotonic() - started
+                        shared.chunks.append(delta)
+                        for reader in shared.readers:
+                            reader.put(delta)
+        except asyncio.CancelledError:
+            # Only a stall says anything about the API; an abandoned stream just hands back its trial slot
+            if shared.stalled:
+                self.breaker.record_failure()
+            else:
+                self.breaker.release()
+            raise
+        except Exception as e:
+            self.breaker.record_failure()
+            end = e
+        else:
+            self.breaker.record_success(first_delta_seconds or 0.0)
+        finally:
+            # Later callers start a fresh stream rather than joining a finished one
+            self._streams.pop(key, None)
+            for reader in shared.readers:
+                if end is not None:
+                    reader.put(end)
+                reader.put(None)
+
+    def stats(self):
+        """Return upstream vs coalesced call counters and the circuit state"""
+        return {
+            "upstream_calls": self.upstream_calls,
+            "coalesced_calls": self.coalesced_calls,
+            "in_flight": len(self._in_flight) + len(self._streams),
+            "circuit": self.breaker.state,
+        }
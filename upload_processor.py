@@ -0,0 +1,49 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class UploadProcessor:
+    """Runs uploaded photos through the image pipeline on a fixed-size background thread pool.
+
+    submit() streams the upload into the photo store and queues the decode/validate/thumbnail
+    work, so the page keeps responding while the user fills in the rest of the form. Jobs are
+    keyed by the photo's SHA-256: a photo uploaded twice, by any session, is processed once.
+    Queued jobs hold only that key, not the photo bytes, so the queue itself is not capped.
+    Pillow releases the GIL while decoding and resizing, so threads are enough to overlap jobs.
+    """
+
+    def __init__(self, pipeline, max_workers=4):
+        self.pipeline = pipeline
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="upload")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, file):
+        """Store an uploaded file, queue it for processing and return its key straight away"""
+        # Queued jobs only hold the key; the bytes are already on disk
+        key = self.pipeline.store.put_file(file)
+        with self._lock:
+            if key in self._jobs:
+                return key
+            future = self._executor.submit(self.pipeline.ensure_variants, key)
+            self._jobs[key] = future
+        future.add_done_callback(lambda done: self._finish(key, done))
+        return key
+
+    def _finish(self, key, future):
+        # Finished jobs are dropped either way; wait() re-checks photos that have no job
+        with self._lock:
+            self._jobs.pop(key, None)
+
+    def wait(self, key, timeout=None):
+        """Block until a photo's variants are ready; raises ValueError if the photo is unreadable.
+
+        Photos with no queued job, e.g. ones restored from a draft, are checked on the
+        spot, which costs a file lookup once their thumbnail exists.
+        """
+        with self._lock:
+            future = self._jobs.get(key)
+        if future is not None:
+            future.result(timeout)
+        else:
+            self.pipeline.ensure_variants(key)